@@ -1,14 +1,34 @@
 from openai import OpenAI
 from config import ConfigManager
 from exceptions import APIKeyError, AIServiceError
-from token_management import TokenManager, FilePrioritizer
-from diff_processor import DiffProcessor
+from token_management import TokenManager, TokenEstimator, FilePrioritizer
+from diff_processor import DiffProcessor, SUMMARY_TIMEOUT
+from encoding_registry import registry, encoding_name_for_model
+from summary_cache import SummaryCache
+
+# Token budget for the diff sent with the generation prompt
+DIFF_TOKEN_LIMIT = 4000
+# Per-file diff input cap for summarization requests
+SUMMARY_INPUT_CHARS = 8000
+SUMMARY_PROMPT = (
+    "Summarize the following git diff for a single file in 1-2 sentences. "
+    "Focus on WHAT changed (e.g. 'Updated dependency X', 'Refactored auth logic')."
+)
+# Bump whenever SUMMARY_PROMPT changes so cached summaries aren't reused
+SUMMARY_PROMPT_VERSION = 1
 
 class AIService:
     def __init__(self):
         self.config = ConfigManager()
         self.client = None
         self._init_client()
+        # Summaries survive restarts; unchanged files are never re-summarized
+        self.summary_cache = SummaryCache()
+        # Diff tokens before and after canonicalization and hunk deduplication, and generated
+        # files sent as stubs, over every processed diff
+        self.diff_stats = {"diffs": 0, "tokens_before": 0, "tokens_after": 0,
+                           "hunks": 0, "duplicate_hunks": 0, "dedup_tokens": 0,
+                           "generated_files": 0, "generated_bytes": 0}
 
     def _init_client(self):
         """Initializes the OpenAI client based on current config."""
@@ -32,26 +52,54 @@ class AIService:
         # Force a reload of the config manager's internal state
         self.config = ConfigManager()
         self._init_client()
+        # The model may have changed; have its tokenizer ready before the next Generate
+        self.preload_tokenizer()
+
+    def preload_tokenizer(self):
+        """Loads the configured model's encoding on a background thread."""
+        return registry.preload([encoding_name_for_model(self.config.model_name)])
 
     def summarize_file_diff(self, file_diff_text):
         if not self.client:
              return "Summary unavailable (No AI Client)"
-        
-        prompt = (
-            "Summarize the following git diff for a single file in 1-2 sentences. "
-            "Focus on WHAT changed (e.g. 'Updated dependency X', 'Refactored auth logic')."
-        )
+
+        file_diff_text = file_diff_text[:SUMMARY_INPUT_CHARS] # Cap input for safety
+        model = f"{self.config.get_provider()}:{self.config.model_name}"
+        cached = self.summary_cache.get(model, SUMMARY_PROMPT_VERSION, file_diff_text)
+        if cached is not None:
+            return cached
+
         try:
              response = self.client.chat.completions.create(
                 model=self.config.model_name,
                 messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": file_diff_text[:8000]} # Cap input for safety
-                ]
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": file_diff_text}
+                ],
+                # DiffProcessor stops waiting after this long; end the request too
+                timeout=SUMMARY_TIMEOUT,
             )
-             return response.choices[0].message.content.strip()
+             summary = response.choices[0].message.content.strip()
         except Exception:
              return "Summary generation failed."
+        # Failures above are not cached, so the next attempt retries
+        self.summary_cache.put(model, SUMMARY_PROMPT_VERSION, file_diff_text, summary)
+        return summary
+
+    def _diff_processor(self):
+        return DiffProcessor(
+            TokenManager(self.config.model_name), FilePrioritizer(), self.summarize_file_diff,
+            estimator=TokenEstimator(), workers=self.config.get_tokenizer_workers(),
+        )
+
+    def plan_diff(self, file_stats):
+        """
+        Plans which diff bodies to fetch for the given {path: DiffStat},
+        so files that won't fit the budget are never read in full.
+        """
+        return self._diff_processor().plan_budget(
+            file_stats, token_limit=DIFF_TOKEN_LIMIT, excerpt_chars=SUMMARY_INPUT_CHARS
+        )
 
     def generate_commit_message(self, diff_text):
         if not self.client:
@@ -63,8 +111,11 @@ class AIService:
 
         # Intelligent Truncation
         # Use a limit of 4000 tokens for the diff context.
-        processor = DiffProcessor(TokenManager(), FilePrioritizer(), self.summarize_file_diff)
-        processed_diff, truncated = processor.process_diff(diff_text, token_limit=4000)
+        processor = self._diff_processor()
+        processed_diff, truncated = processor.process_diff(diff_text, token_limit=DIFF_TOKEN_LIMIT)
+        processor_stats = processor.stats()
+        for key in self.diff_stats:
+            self.diff_stats[key] += processor_stats.get(key, 0)
 
         default_system_prompt = (
             "You are a helpful assistant that generates professional git commit messages based on diffs. "
@@ -0,0 +1,99 @@
+"""
+Headless command line entry point.
+
+    python -m aicommit generate --repo . --staged
+    python -m aicommit generate --repo . --json src/app.py src/util.py
+    python -m aicommit cache clear
+
+Reuses GitService, DiffProcessor (through AIService) and the saved settings
+without importing any views module, so it runs in CI and over SSH where
+there is no display. Heavy modules (GitPython, openai, tiktoken) are only
+imported once a command actually runs, keeping `--help` and argument
+errors fast.
+"""
+import argparse
+import json
+import os
+import sys
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="aicommit", description="AI-generated git commit messages.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Generate a commit message for the current changes.")
+    generate.add_argument("--repo", default=".", help="Path to the git repository (default: current directory).")
+    generate.add_argument("--staged", action="store_true", help="Use only staged changes (what the next commit contains).")
+    generate.add_argument("--json", action="store_true", help="Print a JSON object instead of plain text.")
+    generate.add_argument("files", nargs="*", help="Limit the message to these paths.")
+
+    cache = commands.add_parser("cache", help="Inspect or clear the on-disk summary cache.")
+    cache.add_argument("action", choices=["stats", "clear"])
+    return parser
+
+def generate(args, out=sys.stdout):
+    from git_service import GitService
+    from ai_service import AIService
+
+    git = GitService()
+    repo_path = os.path.abspath(args.repo)
+    if not git.is_valid_repo(repo_path):
+        raise ValueError(f"Not a git repository: {repo_path}")
+
+    try:
+        if args.staged:
+            staged = git.get_staged_files()
+            files = [f for f in staged if f in args.files] if args.files else staged
+        else:
+            changed = git.get_changed_files()
+            files = [f for f in changed if f in args.files] if args.files else changed
+        if not files:
+            raise ValueError("No staged changes." if args.staged else "No changes.")
+
+        ai = AIService()
+        # Overlap loading the tokenizer with the git calls below
+        ai.preload_tokenizer()
+        if args.staged:
+            diff = git.get_staged_diff(files)
+        else:
+            # Same path as the GUI: plan from numstat, then fetch only what fits
+            plan = ai.plan_diff(git.get_numstat(files))
+            diff = git.get_diff(files=files, plan=plan)
+        title, desc, truncated = ai.generate_commit_message(diff)
+    finally:
+        git.close()
+
+    if args.json:
+        json.dump({"title": title, "description": desc, "truncated": truncated, "files": files}, out, indent=2)
+        out.write("\n")
+    else:
+        out.write(f"{title}\n\n{desc}\n" if desc else f"{title}\n")
+    return 0
+
+def cache(args, out=sys.stdout):
+    from summary_cache import SummaryCache
+
+    summaries = SummaryCache()
+    try:
+        if args.action == "clear":
+            out.write(f"Removed {summaries.clear()} cached summaries from {summaries.path}\n")
+        else:
+            stats = summaries.stats()
+            out.write(f"{stats['entries']} summaries, {stats['bytes'] / 1024:.1f} KiB in {stats['path']}\n")
+    finally:
+        summaries.close()
+    return 0
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == "generate":
+            return generate(args)
+        if args.command == "cache":
+            return cache(args)
+    except Exception as e:
+        print(f"aicommit: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import asyncio
+import concurrent.futures
+import threading
+
+class AsyncBridge:
+    """
+    Runs one asyncio event loop on a daemon thread for the Tk app.
+
+    `submit` schedules a coroutine from the Tk thread and returns a
+    concurrent.futures.Future; results and errors are handed back through
+    `dispatch` (e.g. `lambda cb: window.after(0, cb)`) so callbacks run on
+    the Tk main loop. Cancelling the future cancels the coroutine, which in
+    AsyncGitService kills the git child; `on_error` then gets a
+    concurrent.futures.CancelledError.
+    """
+    def __init__(self, dispatch=None):
+        self.dispatch = dispatch or (lambda callback: callback())
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro, on_done=None, on_error=None):
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+        def _done(f):
+            error = concurrent.futures.CancelledError() if f.cancelled() else f.exception()
+            if error is not None:
+                if on_error:
+                    self.dispatch(lambda: on_error(error))
+                else:
+                    print(f"Error in background task: {error}")
+            elif on_done:
+                result = f.result()
+                self.dispatch(lambda: on_done(result))
+        future.add_done_callback(_done)
+        return future
+
+    def call(self, fn, *args):
+        """Runs a plain function on the loop thread (e.g. AsyncGitService.cancel_all)."""
+        self.loop.call_soon_threadsafe(fn, *args)
+
+    def run(self, coro, timeout=None):
+        """Blocks until the coroutine finishes; for scripts and tests, not the Tk thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def stop(self):
+        if not self.loop.is_running():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=1)
+        if not self.loop.is_running():
+            self.loop.close()
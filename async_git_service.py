@@ -0,0 +1,185 @@
+import asyncio
+import os
+import subprocess
+from dataclasses import replace
+import git
+from diff_paths import iter_diff_sections
+from diff_stats import parse_numstat
+from move_detection import RENAME_OPTIONS
+from repo_status import parse_porcelain_v2
+from untracked_diff import UntrackedFileReader
+
+# Keep git from flashing console windows in the windowed Windows build
+_CREATION_FLAGS = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+class AsyncGitService:
+    """
+    asyncio service for git reads and the network operations.
+
+    Every git call is an `asyncio.create_subprocess_exec` child driven
+    from one event loop (see async_bridge.AsyncBridge), so status, diffs,
+    numstat and push/pull run concurrently without a thread each, and a
+    push that hangs on the network can be cancelled: cancelling a task
+    kills its git child, and `cancel_all()` does that for everything in
+    flight (e.g. on repo switch).
+
+    The reads give what git reports, with the same commands and parsers
+    as GitService; the prompt's extras (diff cache, untracked move pairing,
+    generated-file stubs) and commits stay in GitService.
+    """
+    def __init__(self, git_executable=None, untracked_head_lines=200, untracked_tail_lines=50):
+        self.git_executable = git_executable or git.Git.GIT_PYTHON_GIT_EXECUTABLE or "git"
+        self.path = None
+        self._opened_path = None
+        self._status = None
+        self._running = {}  # process -> owning task
+        self.untracked_reader = UntrackedFileReader(untracked_head_lines, untracked_tail_lines)
+
+    async def is_valid_repo(self, path):
+        self._status = None
+        if path == self._opened_path:
+            return True
+        # Switching repos: whatever is still running belongs to the old one
+        self.cancel_all()
+        self.path = self._opened_path = None
+        try:
+            top = await self._run(['rev-parse', '--show-toplevel'], cwd=path)
+        except (git.exc.GitCommandError, OSError):
+            return False
+        self.path = os.path.normpath(top.decode('utf-8').strip())
+        self._opened_path = path
+        return True
+
+    def cancel_all(self):
+        """Cancels every in-flight git call; their children are killed. Call on the loop thread."""
+        for task in list(self._running.values()):
+            if task is not None and not task.done():
+                task.cancel()
+
+    async def _run(self, args, input_bytes=None, ok_codes=(0,), env=None, cwd=None):
+        """Runs one git child and returns stdout; the child is killed if the caller is cancelled."""
+        proc = await asyncio.create_subprocess_exec(
+            self.git_executable, *args,
+            cwd=cwd or self.path,
+            stdin=asyncio.subprocess.PIPE if input_bytes is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            env=dict(os.environ, **env) if env else None,
+            creationflags=_CREATION_FLAGS,
+        )
+        self._running[proc] = asyncio.current_task()
+        try:
+            stdout, stderr = await proc.communicate(input_bytes)
+        except asyncio.CancelledError:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        finally:
+            self._running.pop(proc, None)
+        if proc.returncode not in ok_codes:
+            raise git.exc.GitCommandError([self.git_executable, *args], proc.returncode, stderr)
+        return stdout
+
+    def _require_repo(self):
+        if not self.path:
+            raise ValueError("Repository not initialized")
+
+    async def get_status_snapshot(self):
+        if self._status is None:
+            return await self.refresh_status()
+        return self._status
+
+    async def refresh_status(self):
+        """Takes a new snapshot with one `git status --porcelain=v2` call."""
+        self._require_repo()
+        output = await self._run(['status', '--porcelain=v2', '-z', '--branch', '--untracked-files=all'])
+        self._status = parse_porcelain_v2(output.decode('utf-8', errors='replace'))
+        return self._status
+
+    def invalidate_status(self):
+        self._status = None
+
+    async def get_diff_map(self, files):
+        """
+        Returns {path: diff}: one `git diff` for the tracked files, split
+        per file, while the untracked files' pseudo-diffs are built in
+        worker threads.
+        """
+        self._require_repo()
+        snapshot = await self.get_status_snapshot()
+        tracked = [f for f in files if f in snapshot and not snapshot.get(f).is_untracked]
+        untracked = [f for f in files if f in snapshot and snapshot.get(f).is_untracked]
+
+        output, *untracked_diffs = await asyncio.gather(
+            self._tracked_diff(tracked, snapshot),
+            *(asyncio.to_thread(self._untracked_diff, f) for f in untracked),
+        )
+        sections = {section.path: section.text.rstrip('\n')
+                    for section in iter_diff_sections(output) if section.path is not None}
+        diff_map = {f: sections.get(f, "") for f in files}
+        diff_map.update((f, diff or "") for f, diff in zip(untracked, untracked_diffs))
+        return diff_map
+
+    async def get_numstat(self, files):
+        """Returns {path: DiffStat} from one `git diff --numstat`, untracked files counted in worker threads."""
+        self._require_repo()
+        snapshot = await self.get_status_snapshot()
+        tracked = [f for f in files if f in snapshot and not snapshot.get(f).is_untracked]
+        untracked = [f for f in files if f in snapshot and snapshot.get(f).is_untracked]
+
+        output, *untracked_stats = await asyncio.gather(
+            self._tracked_diff(tracked, snapshot, '--numstat', '-z'),
+            *(asyncio.to_thread(self._untracked_stat, f) for f in untracked),
+        )
+        numstat = parse_numstat(output)
+        stats = {f: replace(numstat[f], size=self._file_size(f)) for f in tracked if f in numstat}
+        stats.update((f, stat) for f, stat in zip(untracked, untracked_stats) if stat is not None)
+        return {f: stats[f] for f in files if f in stats}
+
+    async def _tracked_diff(self, tracked_files, snapshot, *options):
+        """One `git diff HEAD` (the index before the first commit) for the given tracked files."""
+        if not tracked_files:
+            return ""
+        base = ['HEAD'] if snapshot.head_oid else ['--cached']
+        output = await self._run(['diff', *base, *RENAME_OPTIONS, *options, '--', *snapshot.diff_pathspec(tracked_files)],
+                                 env={'GIT_LITERAL_PATHSPECS': '1'})
+        return output.decode('utf-8', errors='replace')
+
+    def _untracked_diff(self, f_path):
+        try:
+            full_path = os.path.join(self.path, f_path)
+            if not os.path.isfile(full_path):
+                return None
+            return self.untracked_reader.diff(full_path, f_path)
+        except Exception as e:
+            print(f"Error reading untracked file {f_path}: {e}")
+            return None
+
+    def _untracked_stat(self, f_path):
+        try:
+            return self.untracked_reader.diff_stat(os.path.join(self.path, f_path), f_path)
+        except OSError:
+            return None
+
+    def _file_size(self, path):
+        try:
+            return os.path.getsize(os.path.join(self.path, path))
+        except OSError:
+            return 0
+
+    async def push_changes(self, remote_name="origin"):
+        self._require_repo()
+        await self._require_remote(remote_name)
+        await self._run(['push', '--porcelain', remote_name])
+        self.invalidate_status()
+
+    async def pull_changes(self, remote_name="origin"):
+        self._require_repo()
+        await self._require_remote(remote_name)
+        await self._run(['pull', remote_name])
+        self.invalidate_status()
+
+    async def _require_remote(self, remote_name):
+        remotes = (await self._run(['remote'])).decode('utf-8').split()
+        if remote_name not in remotes:
+            raise ValueError(f"Remote '{remote_name}' not found")
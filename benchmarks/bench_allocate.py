@@ -0,0 +1,87 @@
+"""
+What process_diff keeps of an over-budget diff, and what it costs.
+
+    python benchmarks/bench_allocate.py --small 30 --large 3 --locks 4
+
+Builds a diff of many small logic files, a few large ones and some large
+lockfiles, runs process_diff once against a cold token cache and reports
+how each file ended up (whole, cut, summarized, placeholder or left out),
+the tokens used of the limit, the encode calls made by the token manager
+and the time taken. The summarizer is a stand-in that answers at once.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diff_processor import DiffProcessor
+from token_management import TokenCache, TokenManager, FilePrioritizer
+
+class CountingTokenManager(TokenManager):
+    """Counts calls that encode text (cache hits included)."""
+    calls = 0
+
+    def count_tokens(self, text):
+        CountingTokenManager.calls += 1
+        return super().count_tokens(text)
+
+    def count_tokens_batch(self, texts, num_threads=1):
+        CountingTokenManager.calls += 1
+        return super().count_tokens_batch(texts, num_threads)
+
+    def truncate_with_count(self, text, limit, marker=""):
+        CountingTokenManager.calls += 1
+        return super().truncate_with_count(text, limit, marker)
+
+def synthetic_diff(small, large, locks, lines):
+    parts = []
+    for i in range(small):
+        parts.append(f"diff --git a/src/util_{i}.py b/src/util_{i}.py\n@@ -10,3 +10,3 @@ def helper_{i}():\n"
+                     f"     total = 0\n-    return total\n+    return total + {i}\n")
+    for i in range(large):
+        body = "".join(f"+    result_{j} = compute(value, offset={j})\n" for j in range(lines))
+        parts.append(f"diff --git a/src/core_{i}.py b/src/core_{i}.py\n@@ -1,0 +1,{lines} @@ def run_{i}():\n{body}")
+    for i in range(locks):
+        body = "".join(f'+  "pkg-{i}-{j}": "^1.{j}.0",\n' for j in range(lines))
+        parts.append(f"diff --git a/deps/{i}/package-lock.json b/deps/{i}/package-lock.json\n@@ -1,0 +1,{lines} @@\n{body}")
+    return "".join(parts)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--small", type=int, default=30)
+    parser.add_argument("--large", type=int, default=3)
+    parser.add_argument("--locks", type=int, default=4)
+    parser.add_argument("--lines", type=int, default=300)
+    parser.add_argument("--encoding", default="cl100k_base")
+    parser.add_argument("--limit", type=int, default=4000)
+    args = parser.parse_args()
+
+    diff_text = synthetic_diff(args.small, args.large, args.locks, args.lines)
+    token_manager = CountingTokenManager(args.encoding, cache=TokenCache())
+    # Load the encoding before timing anything
+    TokenManager(args.encoding, cache=TokenCache()).count_tokens("warm up")
+    processor = DiffProcessor(token_manager, FilePrioritizer(), lambda text: "Bumped dependency versions.")
+
+    CountingTokenManager.calls = 0
+    start = time.perf_counter()
+    final_text, _ = processor.process_diff(diff_text, token_limit=args.limit)
+    elapsed = time.perf_counter() - start
+    calls = CountingTokenManager.calls
+
+    sections = final_text.split("diff --git ")[1:]
+    summarized = sum("[SUMMARIZED]" in s.split("\n", 1)[0] for s in sections)
+    placeholders = sum("[TRUNCATED]" in s.split("\n", 1)[0] for s in sections)
+    cut = sum("...[Truncated]..." in s for s in sections)
+    whole = len(sections) - summarized - placeholders - cut
+    files = args.small + args.large + args.locks
+    print(f"{files} files: {whole} whole, {cut} cut, {summarized} summarized, {placeholders} placeholders, "
+          f"{files - len(sections)} left out")
+    print(f"small files whole: {sum('util_' in s and '[Truncated]' not in s for s in sections)}/{args.small}")
+    print(f"tokens: {token_manager.count_tokens(final_text)}/{args.limit}  encode calls: {calls}  "
+          f"{elapsed * 1000:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Batch tokenization of a many-file diff at different worker counts.
+
+    python benchmarks/bench_batch_tokenize.py --files 10000 --workers 1 2 4 8 16
+
+Builds a synthetic diff of --files sections and times DiffProcessor in
+exact-counting mode (parse_diff plus proportional truncation) for each
+worker count, every run against a cold token cache. tiktoken releases the
+GIL while encoding, so the time should fall with workers up to the number
+of physical cores.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diff_processor import DiffProcessor
+from token_management import TokenCache, TokenManager, FilePrioritizer
+
+def synthetic_diff(files, lines):
+    parts = []
+    for i in range(files):
+        body = "".join(
+            f"+    result_{j} = compute(value_{i}, offset={j}, name='item {i}-{j}')\n" for j in range(lines)
+        )
+        parts.append(
+            f"diff --git a/src/module_{i}.py b/src/module_{i}.py\n"
+            f"--- a/src/module_{i}.py\n+++ b/src/module_{i}.py\n"
+            f"@@ -1,0 +1,{lines} @@\n{body}"
+        )
+    return "\n".join(parts)
+
+def time_process(diff_text, encoding, workers, token_limit):
+    processor = DiffProcessor(TokenManager(encoding, cache=TokenCache()), FilePrioritizer(), workers=workers)
+    start = time.perf_counter()
+    processor.process_diff(diff_text, token_limit=token_limit)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--encoding", default="cl100k_base")
+    parser.add_argument("--limit", type=int, default=4000)
+    args = parser.parse_args()
+
+    diff_text = synthetic_diff(args.files, args.lines)
+    # Load the encoding before timing anything
+    TokenManager(args.encoding, cache=TokenCache()).count_tokens("warm up")
+
+    print(f"{args.files} files, {len(diff_text) / 1024 / 1024:.1f} MB, {os.cpu_count()} CPUs")
+    baseline = None
+    for workers in args.workers:
+        elapsed = time_process(diff_text, args.encoding, workers, args.limit)
+        baseline = baseline or elapsed
+        print(f"workers={workers:<3d} {elapsed * 1000:9.1f} ms   ({baseline / elapsed:.2f}x)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
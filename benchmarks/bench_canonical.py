@@ -0,0 +1,57 @@
+"""
+Tokens saved by canonicalizing diffs, measured on a repository's history.
+
+    python benchmarks/bench_canonical.py --repo . --commits 200
+
+Takes the diffs of the last --commits commits of --repo (git show, as
+GitService produces them), runs each through DiffProcessor.parse_diff and
+reports the tokens before and after canonicalization (index lines, ---/+++
+headers and trailing whitespace dropped, renames and mode changes folded
+into the diff --git line), in total and for the median commit.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diff_processor import DiffProcessor
+from token_management import TokenCache, TokenManager, FilePrioritizer
+
+def commit_diffs(repo, commits):
+    shas = subprocess.run(["git", "-C", repo, "rev-list", f"--max-count={commits}", "--no-merges", "HEAD"],
+                          capture_output=True, text=True, check=True).stdout.split()
+    for sha in shas:
+        yield subprocess.run(["git", "-C", repo, "show", "--format=", sha],
+                             capture_output=True, text=True, errors="replace", check=True).stdout
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repo", default=".")
+    parser.add_argument("--commits", type=int, default=200)
+    parser.add_argument("--encoding", default="cl100k_base")
+    args = parser.parse_args()
+
+    token_manager = TokenManager(args.encoding, cache=TokenCache(max_tokens=0))
+    processor = DiffProcessor(token_manager, FilePrioritizer(), lambda text: "")
+    ratios = []
+    for diff in commit_diffs(args.repo, args.commits):
+        if not diff:
+            continue
+        before, after = processor.tokens_before, processor.tokens_after
+        processor.parse_diff(diff)
+        if processor.tokens_before > before:
+            ratios.append((processor.tokens_after - after) / (processor.tokens_before - before))
+
+    if not ratios:
+        print("no commits with a diff")
+        return 1
+    stats = processor.stats()
+    print(f"{len(ratios)} commits: {stats['tokens_before']} tokens before, {stats['tokens_after']} after "
+          f"({stats['tokens_after'] / stats['tokens_before']:.2f}x, median commit {statistics.median(ratios):.2f}x)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
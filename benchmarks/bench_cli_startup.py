@@ -0,0 +1,65 @@
+"""
+Cold-start time of the headless CLI.
+
+    python benchmarks/bench_cli_startup.py --runs 10
+
+Times fresh interpreter runs of `python -m aicommit --help` (argument
+parsing only) and of importing everything `generate` needs, and fails if
+the CLI exceeds its budget or pulls in any GUI module.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budget for `aicommit --help` on a fresh interpreter, interpreter startup included
+CLI_HELP_BUDGET_MS = 150
+
+GUI_MODULES = ("views", "customtkinter", "tkinter")
+
+def time_runs(args, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def gui_modules_loaded():
+    code = (
+        "import sys, aicommit, git_service, ai_service;"
+        f"print(','.join(m for m in sys.modules if m.split('.')[0] in {GUI_MODULES!r}))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True)
+    return result.stdout.strip()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = time_runs(["-c", "pass"], args.runs)
+    cli_help = time_runs(["-m", "aicommit", "--help"], args.runs)
+    generate_imports = time_runs(["-c", "import aicommit, git_service, ai_service"], args.runs)
+    gui_app = time_runs(["-c", "import main"], args.runs)
+
+    print(f"python -c pass              {baseline:7.1f} ms")
+    print(f"aicommit --help             {cli_help:7.1f} ms   (budget {CLI_HELP_BUDGET_MS} ms)")
+    print(f"aicommit generate imports   {generate_imports:7.1f} ms")
+    print(f"GUI main.py imports         {gui_app:7.1f} ms")
+
+    loaded = gui_modules_loaded()
+    if loaded:
+        print(f"FAIL: CLI imported GUI modules: {loaded}")
+        return 1
+    if cli_help > CLI_HELP_BUDGET_MS:
+        print("FAIL: aicommit --help is over budget")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
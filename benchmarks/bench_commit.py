@@ -0,0 +1,97 @@
+"""
+Compares GitPython's index-based commit with GitService's plumbing path.
+
+    python benchmarks/bench_commit.py --files 100000 --stage 2000
+
+Builds a throwaway repo with --files tracked files, modifies --stage of
+them and times stage + commit both ways on identical copies.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from git import Repo
+from git_service import GitService
+
+def build_repo(path, n_files):
+    os.makedirs(path)
+    subprocess.run(['git', 'init', '-q', path], check=True)
+    # A detached auto-gc would repack objects while the repo is being copied
+    subprocess.run(['git', 'config', 'gc.auto', '0'], cwd=path, check=True)
+    for i in range(n_files):
+        sub = os.path.join(path, f"d{i // 1000:03d}")
+        os.makedirs(sub, exist_ok=True)
+        with open(os.path.join(sub, f"f{i}.txt"), "w") as f:
+            f.write(f"{i}\n")
+    env = dict(os.environ, GIT_AUTHOR_NAME="bench", GIT_AUTHOR_EMAIL="bench@example.com",
+               GIT_COMMITTER_NAME="bench", GIT_COMMITTER_EMAIL="bench@example.com")
+    subprocess.run(['git', 'add', '-A'], cwd=path, check=True)
+    subprocess.run(['git', 'commit', '-q', '-m', 'init'], cwd=path, check=True, env=env)
+
+def modify(path, n_stage):
+    files = []
+    for i in range(n_stage):
+        rel = f"d{i // 1000:03d}/f{i}.txt"
+        with open(os.path.join(path, rel), "a") as f:
+            f.write("changed\n")
+        files.append(rel)
+    return files
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def bench_gitpython(path, files):
+    repo = Repo(path)
+    def run():
+        repo.git.add(files)
+        repo.index.commit("bench")
+    result = measure(run)
+    repo.close()
+    return result
+
+def bench_plumbing(path, files):
+    service = GitService()
+    service.is_valid_repo(path)
+    def run():
+        service.stage_files(files)
+        service.commit_changes("bench")
+    result = measure(run)
+    service.close()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=50000)
+    parser.add_argument("--stage", type=int, default=1000)
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp()
+    try:
+        template = os.path.join(base, "template")
+        print(f"Building repo with {args.files} files...")
+        build_repo(template, args.files)
+
+        for name, bench in [("GitPython index.commit", bench_gitpython), ("plumbing", bench_plumbing)]:
+            path = os.path.join(base, name.split()[0])
+            shutil.copytree(template, path)
+            files = modify(path, args.stage)
+            elapsed, peak = bench(path, files)
+            print(f"{name:24s} {elapsed * 1000:9.1f} ms   peak Python memory {peak / 1024 / 1024:7.1f} MiB")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Tokens saved by reducing diff context, measured on a repository's history.
+
+    python benchmarks/bench_context.py --repo . --commits 200
+
+Takes the diffs of the last --commits commits of --repo (git show -U3, as
+GitService produces them), re-renders each with one and with no context
+line (diff_context.reduce_context) and reports the tokens of each form,
+plus how many changed lines fit in a --limit token window on average.
+Totals are dominated by the largest commits (often bulk additions with no
+context to drop), so the median per-commit ratio is shown as well.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diff_context import reduce_context
+from token_management import TokenCache, TokenManager
+
+def commit_diffs(repo, commits):
+    shas = subprocess.run(["git", "-C", repo, "rev-list", f"--max-count={commits}", "--no-merges", "HEAD"],
+                          capture_output=True, text=True, check=True).stdout.split()
+    for sha in shas:
+        yield subprocess.run(["git", "-C", repo, "show", "--format=", "-U3", sha],
+                             capture_output=True, text=True, errors="replace", check=True).stdout
+
+def changed_lines(diff):
+    return sum(1 for line in diff.splitlines()
+               if line[:1] in "+-" and not line.startswith(("+++ ", "--- ")))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repo", default=".")
+    parser.add_argument("--commits", type=int, default=200)
+    parser.add_argument("--encoding", default="cl100k_base")
+    parser.add_argument("--limit", type=int, default=4000)
+    args = parser.parse_args()
+
+    token_manager = TokenManager(args.encoding, cache=TokenCache(max_tokens=0))
+    totals = {3: 0, 1: 0, 0: 0}
+    ratios = {1: [], 0: []}
+    changes = 0
+    count = 0
+    for diff in commit_diffs(args.repo, args.commits):
+        if not diff:
+            continue
+        count += 1
+        changes += changed_lines(diff)
+        full = token_manager.count_tokens(diff)
+        totals[3] += full
+        for context in ratios:
+            tokens = token_manager.count_tokens(reduce_context(diff, context))
+            totals[context] += tokens
+            ratios[context].append(tokens / full if full else 1.0)
+
+    if not count:
+        print("no commits with a diff")
+        return 1
+    print(f"{count} commits, {changes} changed lines")
+    for context, tokens in totals.items():
+        per_window = changes * args.limit / tokens if tokens else 0
+        median = statistics.median(ratios[context]) if context in ratios else 1.0
+        print(f"-U{context}: {tokens:9d} tokens ({tokens / totals[3]:.2f}x, median commit {median:.2f}x)  "
+              f"{per_window:7.0f} changed lines per {args.limit} tokens")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
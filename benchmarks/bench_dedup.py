@@ -0,0 +1,64 @@
+"""
+What a codemod diff costs with and without cross-file hunk deduplication.
+
+    python benchmarks/bench_dedup.py --files 600 --unique 6
+
+Builds a diff in which every one of --files files gets the same import
+change, and --unique of them also a change of their own, then runs
+process_diff with deduplication off and on. Reports the tokens of the
+parsed diff, whether it fit the --limit budget, how many summaries were
+requested, the dedup compression ratio and the time taken.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diff_processor import DiffProcessor
+from token_management import TokenCache, TokenManager, FilePrioritizer
+
+def codemod_diff(files, unique):
+    step = max(files // unique, 1) if unique else files + 1
+    parts = []
+    for i in range(files):
+        parts.append(
+            f"diff --git a/pkg/mod_{i}.py b/pkg/mod_{i}.py\nindex 1111111..2222222 100644\n"
+            f"--- a/pkg/mod_{i}.py\n+++ b/pkg/mod_{i}.py\n"
+            f"@@ -1,5 +1,5 @@\n # Copyright 2023 Example Corp\n import os\n"
+            f"-from legacy.transport.client import HttpClient, RetryPolicy\n"
+            f"+from transport.client import HttpClient, RetryPolicy\n import mod_{i}_helpers\n"
+        )
+        if i % step == 0:
+            parts.append(f"@@ -40,3 +40,3 @@ def run_{i}():\n     value = load({i})\n"
+                         f"-    return value\n+    return value + {i}\n")
+    return "".join(parts)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=600)
+    parser.add_argument("--unique", type=int, default=6)
+    parser.add_argument("--encoding", default="cl100k_base")
+    parser.add_argument("--limit", type=int, default=4000)
+    args = parser.parse_args()
+
+    diff_text = codemod_diff(args.files, args.unique)
+    # Load the encoding before timing anything
+    TokenManager(args.encoding, cache=TokenCache()).count_tokens("warm up")
+    for deduplicate in (False, True):
+        summaries = []
+        processor = DiffProcessor(TokenManager(args.encoding, cache=TokenCache()), FilePrioritizer(),
+                                  lambda text: summaries.append(text) or "Updated imports.",
+                                  deduplicate=deduplicate)
+        start = time.perf_counter()
+        _, truncated = processor.process_diff(diff_text, token_limit=args.limit)
+        elapsed = time.perf_counter() - start
+        stats = processor.stats()
+        print(f"dedup {'on ' if deduplicate else 'off'}: {stats['tokens_after']:7d} tokens, "
+              f"{'truncated' if truncated else 'fits'} in {args.limit}, {len(summaries)} summaries, "
+              f"ratio {stats['dedup_ratio']:.1f}x, {elapsed * 1000:.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Time-to-first-paint of the GUI (needs a display).
+
+    python benchmarks/bench_gui_startup.py --runs 5 --record startup_history.jsonl
+
+Launches `main.py --startup-trace --exit-after-startup` and reads its
+timeline. For comparison it also times the previous eager order, where
+GitService and AIService were built before the window. --record appends
+the medians with the current commit to a JSON-lines file so regressions
+can be tracked over time.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_MARK_RE = re.compile(r"^\[startup\]\s+([\d.]+) ms\s+(.+)$")
+
+EAGER_SERVICES = (
+    "import time; t0 = time.perf_counter();"
+    "from git_service import GitService; from ai_service import AIService;"
+    "GitService(); AIService();"
+    "print((time.perf_counter() - t0) * 1000)"
+)
+
+def run_gui():
+    try:
+        result = subprocess.run(
+            [sys.executable, "main.py", "--startup-trace", "--exit-after-startup"],
+            cwd=ROOT, capture_output=True, text=True, timeout=120,
+        )
+    except subprocess.TimeoutExpired:
+        raise RuntimeError("main.py did not exit within 120 s")
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "main.py failed")
+    marks = {}
+    for line in result.stdout.splitlines():
+        match = _MARK_RE.match(line)
+        if match:
+            marks[match.group(2)] = float(match.group(1))
+    return marks
+
+def run_eager_services():
+    result = subprocess.run([sys.executable, "-c", EAGER_SERVICES], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--record", help="Append the results to this JSON-lines file.")
+    args = parser.parse_args()
+
+    try:
+        runs = [run_gui() for _ in range(args.runs)]
+    except RuntimeError as e:
+        print(f"Could not start the GUI: {e}")
+        return 2
+    eager_services = statistics.median(run_eager_services() for _ in range(args.runs))
+
+    first_paint = statistics.median(r["first paint"] for r in runs)
+    services_ready = statistics.median(r["services ready"] for r in runs)
+    # Previously the window was only built after both services
+    eager_first_paint = eager_services + first_paint
+
+    print(f"first paint               {first_paint:8.1f} ms")
+    print(f"services ready            {services_ready:8.1f} ms")
+    print(f"eager order first paint  ~{eager_first_paint:8.1f} ms   (services {eager_services:.1f} ms before the window)")
+
+    if args.record:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        with open(args.record, "a") as f:
+            f.write(json.dumps({
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit,
+                "first_paint_ms": round(first_paint, 1), "services_ready_ms": round(services_ready, 1),
+            }) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
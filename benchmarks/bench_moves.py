@@ -0,0 +1,79 @@
+"""
+Tokens a directory move costs, with and without rename detection.
+
+    python benchmarks/bench_moves.py --files 200 --edited 10
+
+Builds a repository with --files files under src/, moves the directory to
+lib/ without telling git (so the new files are untracked and the old ones
+deleted) and edits --edited of them. Reports the tokens of the diff as it
+was produced before (a deletion plus an untracked pseudo-diff per file),
+of the diff GitService produces now, and of what DiffProcessor makes of
+it, along with the time get_diff_map took.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diff_processor import DiffProcessor
+from git_service import GitService
+from token_management import TokenCache, TokenManager, FilePrioritizer
+
+def build_repo(path, n_files, n_edited):
+    os.makedirs(os.path.join(path, "src"))
+    subprocess.run(['git', 'init', '-q', path], check=True)
+    for i in range(n_files):
+        with open(os.path.join(path, "src", f"mod_{i}.py"), "w") as f:
+            f.write("".join(f"value_{j} = compute({i}, {j})\n" for j in range(60)))
+    env = dict(os.environ, GIT_AUTHOR_NAME="bench", GIT_AUTHOR_EMAIL="bench@example.com",
+               GIT_COMMITTER_NAME="bench", GIT_COMMITTER_EMAIL="bench@example.com")
+    subprocess.run(['git', 'add', '-A'], cwd=path, check=True)
+    subprocess.run(['git', 'commit', '-q', '-m', 'init'], cwd=path, check=True, env=env)
+    os.rename(os.path.join(path, "src"), os.path.join(path, "lib"))
+    for i in range(n_edited):
+        with open(os.path.join(path, "lib", f"mod_{i}.py"), "a") as f:
+            f.write("edited = True\n")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--edited", type=int, default=10)
+    parser.add_argument("--encoding", default="cl100k_base")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        path = os.path.join(root, "repo")
+        build_repo(path, args.files, args.edited)
+        service = GitService()
+        service.is_valid_repo(path)
+        files = service.get_changed_files()
+        deleted = [f for f in files if not service.get_status_snapshot().get(f).is_untracked]
+        added = [f for f in files if f not in deleted]
+
+        before = service.repo.git.diff('HEAD', '--no-renames', '--', *deleted)
+        before = "\n".join([before, *(service._untracked_diff(f) for f in added)])
+        start = time.perf_counter()
+        after = service.get_diff(files)
+        elapsed = time.perf_counter() - start
+        service.close()
+
+        token_manager = TokenManager(args.encoding, cache=TokenCache())
+        chunks = DiffProcessor(token_manager, FilePrioritizer()).parse_diff(after)
+        processed = sum(c.token_count for c in chunks)
+        print(f"{args.files} files moved, {args.edited} edited")
+        print(f"without rename detection: {token_manager.count_tokens(before):8d} tokens")
+        print(f"with rename detection:    {token_manager.count_tokens(after):8d} tokens  "
+              f"(get_diff {elapsed * 1000:.0f} ms)")
+        print(f"after DiffProcessor:      {processed:8d} tokens in {len(chunks)} chunks")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
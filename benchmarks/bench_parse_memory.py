@@ -0,0 +1,67 @@
+"""
+Peak memory of DiffProcessor.parse_diff relative to the size of the diff.
+
+    python benchmarks/bench_parse_memory.py --files 20000 --lines 40
+
+Builds a synthetic diff and measures, with tracemalloc, the peak memory
+allocated by parse_diff on top of the diff text itself: once in estimator
+mode (offsets only) and once with exact counting (one window of text at a
+time, plus token ids).
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diff_processor import DiffProcessor
+from token_management import TokenCache, TokenEstimator, TokenManager, FilePrioritizer
+
+def synthetic_diff(files, lines):
+    parts = []
+    for i in range(files):
+        body = "".join(f"+    value_{j} = compute({i}, {j})\n" for j in range(lines))
+        parts.append(
+            f"diff --git a/src/dir {i % 7}/module_{i}.py b/src/dir {i % 7}/module_{i}.py\n"
+            f"--- a/src/dir {i % 7}/module_{i}.py\t\n+++ b/src/dir {i % 7}/module_{i}.py\t\n"
+            f"@@ -1,0 +1,{lines} @@\n{body}"
+        )
+    return "".join(parts)
+
+def measure(processor, diff_text):
+    # Timed untraced: tracemalloc slows down every allocation
+    start = time.perf_counter()
+    chunks = processor.parse_diff(diff_text)
+    elapsed = time.perf_counter() - start
+    del chunks
+    tracemalloc.start()
+    chunks = processor.parse_diff(diff_text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(chunks), peak, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument("--encoding", default="cl100k_base")
+    args = parser.parse_args()
+
+    diff_text = synthetic_diff(args.files, args.lines)
+    size = len(diff_text)
+    # Load the encoding before measuring anything
+    token_manager = TokenManager(args.encoding, cache=TokenCache(max_tokens=0))
+    token_manager.count_tokens("warm up")
+
+    print(f"diff: {args.files} files, {size / 1024 / 1024:.1f} MB")
+    for label, estimator in (("estimator", TokenEstimator()), ("exact", None)):
+        processor = DiffProcessor(token_manager, FilePrioritizer(), estimator=estimator, workers=1)
+        count, peak, elapsed = measure(processor, diff_text)
+        print(f"{label:10s} {count} chunks  peak +{peak / 1024 / 1024:6.1f} MB ({peak / size:.2f}x diff)  "
+              f"{elapsed * 1000:8.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Latency of process_diff when many chunks have to be summarized.
+
+    python benchmarks/bench_summarize.py --files 12 --latency 0.8
+
+The summarizer is a stand-in that sleeps for --latency seconds per call,
+like an LLM round trip. Each sacrificed file is a large lockfile, so all
+of them have to be summarized; the run is repeated with summary_workers=1
+(one call at a time) and with the default pool.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diff_processor import DiffProcessor, SUMMARY_WORKERS
+from token_management import TokenCache, TokenManager, FilePrioritizer
+
+def synthetic_diff(files, lines):
+    parts = []
+    for i in range(files):
+        body = "".join(f'+  "pkg-{i}-{j}": "^1.{j}.0",\n' for j in range(lines))
+        parts.append(f"diff --git a/deps/{i}/package-lock.json b/deps/{i}/package-lock.json\n@@ -1,0 +1,{lines} @@\n{body}")
+    parts.append("diff --git a/main.py b/main.py\n@@ -1 +1 @@\n-print(1)\n+print(2)\n")
+    return "".join(parts)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=12)
+    parser.add_argument("--lines", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.8)
+    parser.add_argument("--limit", type=int, default=4000)
+    args = parser.parse_args()
+
+    def summarizer(text):
+        time.sleep(args.latency)
+        return "Bumped dependency versions."
+
+    diff_text = synthetic_diff(args.files, args.lines)
+    token_manager = TokenManager(cache=TokenCache())
+    token_manager.count_tokens(diff_text)
+
+    for workers in (1, SUMMARY_WORKERS):
+        processor = DiffProcessor(token_manager, FilePrioritizer(), summarizer, summary_workers=workers)
+        start = time.perf_counter()
+        final_text, _ = processor.process_diff(diff_text, token_limit=args.limit)
+        elapsed = time.perf_counter() - start
+        summarized = final_text.count("[SUMMARIZED]")
+        print(f"summary_workers={workers:<2d} {summarized} summaries  {elapsed:6.2f} s "
+              f"({elapsed / args.latency:.1f} round trips)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Speed and accuracy of the TokenEstimator mode of DiffProcessor.
+
+    python benchmarks/bench_token_estimator.py --repo . --commits 200 --size-mb 20
+    python benchmarks/bench_token_estimator.py --repo ~/src/big-project --calibrate
+
+Per-file diff sections are taken from the repository's own history
+(`git log -p`), so the accuracy numbers reflect real diffs. The speed test
+concatenates them into one diff of --size-mb and runs process_diff with
+exact counting and with the estimator, each against a cold token cache.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diff_paths import split_diff_by_file
+from diff_processor import DiffProcessor
+from token_management import TokenCache, TokenEstimator, TokenManager, FilePrioritizer, FileCategory
+
+def history_sections(repo, commits):
+    output = subprocess.run(
+        ['git', 'log', '-p', '--no-color', '--format=', f'-{commits}'],
+        cwd=repo, capture_output=True, text=True, errors='replace', check=True,
+    ).stdout
+    sections = []
+    for block in output.split('\ndiff --git ')[1:]:
+        for path, section in split_diff_by_file('diff --git ' + block).items():
+            sections.append((path, section))
+    return sections
+
+def accuracy(sections, token_manager, estimator, prioritizer):
+    samples, errors = [], {}
+    for path, section in sections:
+        category = prioritizer.categorize_file(path)
+        exact = token_manager.count_tokens(section)
+        samples.append((section, category, exact))
+        estimate, _ = estimator.estimate(section, category)
+        if exact:
+            errors.setdefault(category, []).append(abs(estimate - exact) / exact)
+    return samples, errors
+
+def time_process(diff_text, encoding, estimator, token_limit):
+    processor = DiffProcessor(TokenManager(encoding, cache=TokenCache()), FilePrioritizer(), estimator=estimator)
+    start = time.perf_counter()
+    processor.process_diff(diff_text, token_limit=token_limit)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repo", default=".")
+    parser.add_argument("--commits", type=int, default=200)
+    parser.add_argument("--size-mb", type=float, default=20)
+    parser.add_argument("--encoding", default="cl100k_base")
+    parser.add_argument("--limit", type=int, default=4000)
+    parser.add_argument("--calibrate", action="store_true", help="Print fitted bytes/token constants.")
+    args = parser.parse_args()
+
+    sections = history_sections(args.repo, args.commits)
+    if not sections:
+        print("No diffs found in history.")
+        return 1
+    token_manager = TokenManager(args.encoding, cache=TokenCache())
+    estimator = TokenEstimator()
+    samples, errors = accuracy(sections, token_manager, estimator, FilePrioritizer())
+
+    print(f"{len(sections)} file diffs from {args.commits} commits")
+    print(f"{'category':10s} {'files':>6s} {'p95 err':>8s} {'max err':>8s}   (allowed {estimator.error:.0%})")
+    for category in FileCategory:
+        errs = sorted(errors.get(category, []))
+        if errs:
+            p95 = errs[min(len(errs) - 1, int(len(errs) * 0.95))]
+            print(f"{category.name:10s} {len(errs):6d} {p95:8.1%} {errs[-1]:8.1%}")
+
+    if args.calibrate:
+        fitted = TokenEstimator.calibrate(samples)
+        print("\nFitted CATEGORY_BYTES_PER_TOKEN:")
+        for category, bpt in sorted(fitted.bytes_per_token.items(), key=lambda item: item[0].value):
+            print(f"    FileCategory.{category.name}: {bpt:.2f},")
+        print(f"Worst relative error with fitted constants: {fitted.error:.1%}")
+
+    # Repeat history until the combined diff reaches the requested size
+    target = int(args.size_mb * 1024 * 1024)
+    parts, size, i = [], 0, 0
+    while size < target:
+        path, section = sections[i % len(sections)]
+        parts.append(section.replace(f"a/{path} b/{path}", f"a/{i}/{path} b/{i}/{path}", 1))
+        size += len(parts[-1])
+        i += 1
+    diff_text = "\n".join(parts)
+
+    exact_s = time_process(diff_text, args.encoding, None, args.limit)
+    estimated_s = time_process(diff_text, args.encoding, TokenEstimator(), args.limit)
+    print(f"\nprocess_diff on {size / 1024 / 1024:.1f} MB ({i} files), limit {args.limit} tokens:")
+    print(f"exact counting   {exact_s * 1000:9.1f} ms")
+    print(f"estimator        {estimated_s * 1000:9.1f} ms   ({exact_s / estimated_s:.1f}x faster)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
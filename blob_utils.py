@@ -0,0 +1,11 @@
+import hashlib
+
+NO_NEWLINE_MARKER = "\\ No newline at end of file"
+
+def blob_oid(content: bytes) -> str:
+    """Computes the git blob id of raw content (what `git hash-object` prints)."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+def is_binary(content: bytes) -> bool:
+    """Same heuristic git uses: a NUL byte in the first 8000 bytes."""
+    return b"\0" in content[:8000]
@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from typing import List
+
+# Ways a chunk can appear in the final diff
+OMIT = "omit"         # left out entirely
+DROP = "drop"         # header plus a placeholder line
+SUMMARY = "summary"   # header plus an LLM summary
+PREFIX = "prefix"     # cut to `limit` tokens, ending in a truncation marker
+CONTEXT = "context"   # whole, with fewer context lines around the changes
+FULL = "full"
+
+# Budget steps the solver works in; costs are rounded up to a step
+DEFAULT_RESOLUTION = 512
+# Beyond this many chunks only the most valuable per token are planned;
+# the others get their cheapest option (a placeholder) while the budget lasts
+MAX_PLANNED_CHUNKS = 256
+
+@dataclass
+class ChunkOption:
+    """One way to include a chunk: what it costs in tokens and what it is worth."""
+    kind: str
+    cost: int
+    value: float
+    limit: int = 0   # token budget of a PREFIX cut, marker included
+    context: int = None   # context lines kept (CONTEXT, and PREFIX cuts of a reduced diff)
+
+OMITTED = ChunkOption(OMIT, 0, 0.0)
+
+def allocate(choices: List[List[ChunkOption]], budget: int,
+             resolution: int = DEFAULT_RESOLUTION) -> List[ChunkOption]:
+    """
+    Picks one option per chunk so that the total value is as high as
+    possible and the total cost stays within budget: a multiple-choice
+    knapsack, solved exactly by dynamic programming over the budget in
+    `resolution` steps. Leaving a chunk out is always allowed. Chunks
+    past MAX_PLANNED_CHUNKS take their cheapest option first, in order of
+    value per token, until the budget runs out.
+    """
+    plan = [OMITTED] * len(choices)
+    if budget <= 0:
+        return plan
+    unit = -(-budget // resolution)
+    steps = budget // unit
+
+    planned = []
+    for index, options in enumerate(choices):
+        frontier = []
+        # An option is only worth trying if it beats every cheaper one
+        sized = [(-(-o.cost // unit), o) for o in options if o.kind != OMIT and o.cost <= budget]
+        for size, option in sorted(sized, key=lambda item: (item[0], -item[1].value)):
+            if option.value > (frontier[-1][1].value if frontier else 0.0):
+                frontier.append((size, option))
+        if frontier:
+            planned.append((index, frontier))
+    if len(planned) > MAX_PLANNED_CHUNKS:
+        # Plan the chunks that make the most of a token; the rest are shown as cheaply as they can be
+        planned.sort(key=lambda item: -max(o.value / max(size, 1) for size, o in item[1]))
+        for index, options in planned[MAX_PLANNED_CHUNKS:]:
+            size, option = options[0]
+            if size <= steps:
+                plan[index] = option
+                steps -= size
+        planned = sorted(planned[:MAX_PLANNED_CHUNKS])
+
+    # best[b]: highest value of the chunks so far within b steps; one row
+    # per chunk is kept for walking the choices back
+    rows = [[0.0] * (steps + 1)]
+    for _, options in planned:
+        best = rows[-1]
+        new = best[:]
+        for size, option in options:
+            value = option.value
+            new[size:] = [c if c > t else t for c, t in zip([v + value for v in best[:steps + 1 - size]], new[size:])]
+        rows.append(new)
+
+    remaining = steps
+    for (index, options), row, previous in zip(reversed(planned), reversed(rows), reversed(rows[:-1])):
+        if row[remaining] == previous[remaining]:
+            continue
+        for size, option in options:
+            if size <= remaining and previous[remaining - size] + option.value == row[remaining]:
+                plan[index] = option
+                remaining -= size
+                break
+    return plan
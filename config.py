@@ -135,5 +135,10 @@ class ConfigManager:
         self.settings["theme"] = theme
         self.save_settings()
 
+    def get_tokenizer_workers(self):
+        """Threads for batch tokenization; None (the default) means one per CPU."""
+        workers = self.settings.get("tokenizer_workers")
+        return workers if isinstance(workers, int) and workers > 0 else None
+
     def get_supported_models(self, provider):
         return PROVIDER_MODELS.get(provider, [])
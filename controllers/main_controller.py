@@ -1,13 +1,23 @@
 import threading
 import os
+from concurrent.futures import CancelledError
 from models.app_state import AppState
 
 class MainController:
-    def __init__(self, app_state: AppState, main_window, git_service, ai_service):
+    def __init__(self, app_state: AppState, main_window, git_service, ai_service, watcher_factory=None,
+                 async_git=None, bridge=None):
         self.state = app_state
         self.view = main_window
         self.git = git_service
         self.ai = ai_service
+        # Optional: watcher_factory(path, on_change, is_ignored) -> RepoWatcher
+        self.watcher_factory = watcher_factory
+        self.watcher = None
+        self.git.check_head = True
+        # Optional: push/pull run as AsyncGitService coroutines on an AsyncBridge
+        # loop, so a hung remote can be cancelled along with its git child
+        self.async_git = async_git
+        self.bridge = bridge
         
         # bind view events
         self.view.on_select_repo = self.select_directory
@@ -24,9 +34,20 @@ class MainController:
         # Initial checks or loads
         pass
 
+    def shutdown(self):
+        self._stop_watcher()
+        if self.bridge is not None:
+            try:
+                self.bridge.stop()
+            except Exception as e:
+                print(f"Error stopping async loop: {e}")
+
     def select_directory(self):
         path = self.view.ask_directory()
         if path:
+            if self.bridge is not None and path != self.state.repo_path:
+                # A push or pull still running belongs to the old repo
+                self.bridge.call(self.async_git.cancel_all)
             self.state.repo_path = path
             self.view.update_repo_path(path)
             self.refresh_repo()
@@ -38,6 +59,7 @@ class MainController:
         def _task():
             try:
                 if not self.git.is_valid_repo(path):
+                    self._stop_watcher()
                     self._update_ui_safe(lambda: self.view.update_branch("Invalid"))
                     self._update_ui_safe(lambda: self.view.commit_view.set_file_list([]))
                     return
@@ -68,6 +90,7 @@ class MainController:
                 
                 # Update diffs for initial selection
                 self._update_diffs_for_selection()
+                self._start_watcher(path)
                 
             except Exception as e:
                 self._update_ui_safe(lambda: self.view.show_error("Error", str(e)))
@@ -77,6 +100,60 @@ class MainController:
         self.view.set_loading(True, "Loading repo...")
         threading.Thread(target=_task, daemon=True).start()
 
+    def _start_watcher(self, path):
+        if not self.watcher_factory:
+            return
+        if self.watcher and self.watcher.root == os.path.abspath(path):
+            return
+        self._stop_watcher()
+        self.watcher = self.watcher_factory(path, self._on_repo_change, self.git.get_ignored)
+        self.watcher.start()
+        # The watcher reports HEAD and ref changes itself
+        self.git.check_head = False
+
+    def _stop_watcher(self):
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+        self.git.check_head = True
+
+    def _on_repo_change(self, paths, git_changed):
+        """
+        Called from the watcher thread with a debounced batch of touched paths.
+        Only those paths are re-queried, unless the index, HEAD or refs moved.
+        """
+        try:
+            if git_changed:
+                snapshot = self.git.refresh_status(optional_locks=False)
+            else:
+                snapshot = self.git.refresh_paths(sorted(paths))
+        except Exception as e:
+            print(f"Error refreshing changed paths: {e}")
+            return
+
+        files = snapshot.changed_files
+        current = set(self.state.changed_files)
+        new = set(files)
+        added = [f for f in files if f not in current]
+        removed = [f for f in self.state.changed_files if f not in new]
+        self.state.apply_file_changes(added, removed)
+
+        def _apply():
+            for f in removed:
+                self.view.commit_view.remove_file(f)
+            for f in added:
+                self.view.commit_view.add_file(f, f in self.state.selected_files)
+        if added or removed:
+            self._update_ui_safe(_apply)
+        if git_changed:
+            branch = self.git.get_current_branch()
+            self.state.current_branch = branch
+            self._update_ui_safe(lambda: self.view.update_branch(branch))
+
+        # Unchanged files are served from the diff cache, so only touched ones hit git
+        if added or removed or git_changed or paths & self.state.selected_files:
+            self._update_diffs_for_selection()
+
     def on_file_selection_change(self, selected_files):
         self.state.selected_files = set(selected_files)
         
@@ -91,12 +168,8 @@ class MainController:
         selected = list(self.state.selected_files)
         
         def _task():
-            # Limit to 8 for performance/display
-            display_files = selected[:8]
-            diff_map = {}
-            for f in display_files:
-                diff = self.git.get_diff(files=[f])
-                diff_map[f] = diff
+            # One git call for the whole selection instead of one per file
+            diff_map = self.git.get_diff_map(selected) if selected else {}
             
             self._update_ui_safe(lambda: self.view.diff_view.update_diffs(diff_map))
         
@@ -110,7 +183,9 @@ class MainController:
 
         def _task():
             try:
-                diff = self.git.get_diff(files=files)
+                # Plan from numstat first so only files that fit the budget are read in full
+                plan = self.ai.plan_diff(self.git.get_numstat(files))
+                diff = self.git.get_diff(files=files, plan=plan)
                 title, desc, truncated = self.ai.generate_commit_message(diff)
                 
                 self.state.truncation_warning = truncated
@@ -163,6 +238,10 @@ class MainController:
         threading.Thread(target=_task, daemon=True).start()
 
     def push_repo(self):
+        if self.bridge is not None:
+            self._run_remote("Push", self.async_git.push_changes)
+            return
+
         def _task():
             try:
                 self.git.push_changes()
@@ -176,6 +255,10 @@ class MainController:
         threading.Thread(target=_task, daemon=True).start()
 
     def pull_repo(self):
+        if self.bridge is not None:
+            self._run_remote("Pull", self.async_git.pull_changes, refresh=True)
+            return
+
         def _task():
             try:
                 self.git.pull_changes()
@@ -189,6 +272,32 @@ class MainController:
         self.view.set_loading(True, "Pulling...")
         threading.Thread(target=_task, daemon=True).start()
 
+    def _run_remote(self, action, operation, refresh=False):
+        """Runs a push or pull on the bridge's loop; callbacks arrive on the Tk thread."""
+        path = self.state.repo_path
+
+        async def _task():
+            if not path or not await self.async_git.is_valid_repo(path):
+                raise ValueError("Repository not initialized")
+            await operation()
+
+        def _done(_):
+            self.view.set_loading(False)
+            self.view.set_status(f"{action} complete.")
+            if refresh:
+                self.refresh_repo()
+
+        def _error(e):
+            self.view.set_loading(False)
+            if isinstance(e, CancelledError):
+                # Cancelled on repo switch
+                self.view.set_status(f"{action} cancelled.")
+                return
+            self.view.show_error(f"{action} Error", str(e))
+
+        self.view.set_loading(True, f"{action}ing...")
+        self.bridge.submit(_task(), on_done=_done, on_error=_error)
+
     def open_settings(self):
         # We pass a save callback that reloads config if needed? 
         # gui.py: on_save_callback=lambda: self.log("Configuration updated.")
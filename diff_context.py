@@ -0,0 +1,99 @@
+import re
+
+_HUNK_RE = re.compile(r"@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@(.*)")
+
+def _range(start: int, count: int) -> str:
+    # git's notation: an empty range starts at the line before it
+    if count == 0:
+        return f"{max(start - 1, 0)},0"
+    return str(start) if count == 1 else f"{start},{count}"
+
+def _reduce_hunk(header: str, old_start: int, new_start: int, annotation: str, lines, context: int, out):
+    changed = [line[:1] in ("+", "-") for line in lines]
+    distance = [len(lines)] * len(lines)
+    last = None
+    for i, is_change in enumerate(changed):
+        if is_change:
+            last = i
+        if last is not None:
+            distance[i] = i - last
+    last = None
+    for i in range(len(lines) - 1, -1, -1):
+        if changed[i]:
+            last = i
+        if last is not None:
+            distance[i] = min(distance[i], last - i)
+    keep = [d <= context for d in distance]
+    for i, line in enumerate(lines):
+        # "\ No newline at end of file" travels with the line before it
+        if line.startswith("\\") and i:
+            keep[i] = keep[i - 1]
+    if all(keep):
+        out.append(header)
+        out.extend(lines)
+        return
+
+    old_line, new_line = old_start, new_start
+    run = []
+    for i, line in enumerate(lines):
+        if keep[i]:
+            if not run:
+                run_old, run_new, old_count, new_count = old_line, new_line, 0, 0
+            run.append(line)
+        elif run:
+            out.append(f"@@ -{_range(run_old, old_count)} +{_range(run_new, new_count)} @@{annotation}\n")
+            out.extend(run)
+            run = []
+        kind = line[:1]
+        if kind in (" ", "\n"):
+            old_line += 1
+            new_line += 1
+            if keep[i]:
+                old_count += 1
+                new_count += 1
+        elif kind == "-":
+            old_line += 1
+            if keep[i]:
+                old_count += 1
+        elif kind == "+":
+            new_line += 1
+            if keep[i]:
+                new_count += 1
+    if run:
+        out.append(f"@@ -{_range(run_old, old_count)} +{_range(run_new, new_count)} @@{annotation}\n")
+        out.extend(run)
+
+def reduce_context(text: str, context: int) -> str:
+    """
+    Rewrites a unified diff as if it had been produced with `-U<context>`:
+    context lines further than `context` from any change are dropped,
+    hunks are split where they fall apart and their ranges recomputed.
+    Each new hunk keeps the function-name annotation of the hunk it came
+    from. File headers, and sections without hunks (binary files, stats
+    stubs), are passed through unchanged.
+    """
+    out = []
+    hunk = None
+    lines = text.splitlines(keepends=True)
+    for line in lines:
+        if line.startswith("@@ "):
+            match = _HUNK_RE.match(line)
+            if match:
+                if hunk:
+                    _reduce_hunk(*hunk, context, out)
+                old_start, old_count, new_start, new_count, annotation = match.groups()
+                # Empty ranges name the line before them; count from the next one
+                hunk = (line, int(old_start) + (old_count == "0"), int(new_start) + (new_count == "0"),
+                        annotation.rstrip("\r\n"), [])
+                continue
+        if hunk and line[:1] in (" ", "+", "-", "\\", "\n"):
+            hunk[4].append(line)
+            continue
+        if hunk:
+            # Anything else ends the hunk (the next file's headers)
+            _reduce_hunk(*hunk, context, out)
+            hunk = None
+        out.append(line)
+    if hunk:
+        _reduce_hunk(*hunk, context, out)
+    return "".join(out)
@@ -0,0 +1,228 @@
+import re
+
+_ESCAPES = {
+    'a': 7, 'b': 8, 't': 9, 'n': 10, 'v': 11, 'f': 12, 'r': 13,
+    '"': 34, '\\': 92,
+}
+
+def unquote_path(path: str) -> str:
+    """
+    Reverses git's C-style path quoting ("a/caf\\303\\251.txt" -> a/café.txt).
+    Unquoted paths are returned unchanged.
+    """
+    if len(path) < 2 or not (path.startswith('"') and path.endswith('"')):
+        return path
+
+    body = path[1:-1]
+    out = bytearray()
+    i = 0
+    while i < len(body):
+        ch = body[i]
+        if ch != '\\' or i + 1 >= len(body):
+            out.extend(ch.encode('utf-8'))
+            i += 1
+            continue
+        nxt = body[i + 1]
+        if nxt in '01234567':
+            out.append(int(body[i + 1:i + 4], 8))
+            i += 4
+        else:
+            out.append(_ESCAPES.get(nxt, ord(nxt)))
+            i += 2
+    return out.decode('utf-8', errors='replace')
+
+_QUOTE_ESCAPES = {v: k for k, v in _ESCAPES.items()}
+
+def quote_path(path: str) -> str:
+    """
+    Quotes a path the way git does in diff headers (core.quotePath=true):
+    paths with '"', '\\', control or non-ASCII bytes are wrapped in quotes
+    with C-style and octal escapes. Other paths are returned unchanged.
+    """
+    raw = path.encode('utf-8', errors='surrogateescape')
+    if not any(b < 0x20 or b >= 0x7f or b in (0x22, 0x5c) for b in raw):
+        return path
+    out = []
+    for b in raw:
+        if b in _QUOTE_ESCAPES:
+            out.append('\\' + _QUOTE_ESCAPES[b])
+        elif b < 0x20 or b >= 0x7f:
+            out.append('\\%03o' % b)
+        else:
+            out.append(chr(b))
+    return '"' + ''.join(out) + '"'
+
+def _read_token(text: str, start: int):
+    """Reads one (possibly quoted) path token; returns (token, end_index)."""
+    if text.startswith('"', start):
+        i = start + 1
+        while i < len(text):
+            if text[i] == '\\':
+                i += 2
+                continue
+            if text[i] == '"':
+                return text[start:i + 1], i + 1
+            i += 1
+        return text[start:], len(text)
+    end = text.find(' ', start)
+    if end == -1:
+        end = len(text)
+    return text[start:end], end
+
+def parse_diff_git_line(line: str):
+    """
+    Parses a "diff --git a/<old> b/<new>" header into (old_path, new_path).
+    Handles quoted paths and paths containing spaces. Returns (None, None)
+    if the line can't be parsed.
+    """
+    prefix = "diff --git "
+    if not line.startswith(prefix):
+        return None, None
+    rest = line[len(prefix):].rstrip('\r\n')
+
+    if rest.startswith('"'):
+        a_token, end = _read_token(rest, 0)
+        b_token = rest[end:].lstrip(' ')
+        a_path, b_path = unquote_path(a_token), unquote_path(b_token)
+    elif rest.endswith('"'):
+        # Only the destination is quoted: a/plain "b/quoted"
+        quote_start = rest.rfind(' "')
+        a_path, b_path = rest[:quote_start], unquote_path(rest[quote_start + 1:])
+    else:
+        # Unquoted: for non-renames both sides are equal, which lets us
+        # split exactly even when the path itself contains " b/".
+        half = (len(rest) - 1) // 2
+        if len(rest) % 2 == 1 and rest[half] == ' ' and rest[2:half] == rest[half + 3:]:
+            a_path, b_path = rest[:half], rest[half + 1:]
+        else:
+            b_index = rest.find(" b/")
+            if b_index == -1:
+                return None, None
+            a_path, b_path = rest[:b_index], rest[b_index + 1:]
+
+    return _strip_prefix(a_path, "a/"), _strip_prefix(b_path, "b/")
+
+def _strip_prefix(path: str, prefix: str) -> str:
+    return path[len(prefix):] if path.startswith(prefix) else path
+
+def _header_path(token: str):
+    """Path from a ---/+++ line: None for /dev/null, else unquoted with its a/ or b/ prefix removed."""
+    # git adds a tab after names that contain spaces
+    if token.endswith('\t'):
+        token = token[:-1]
+    if token == '/dev/null':
+        return None
+    path = unquote_path(token)
+    return path[2:] if path.startswith(('a/', 'b/')) else path
+
+class DiffSection:
+    """
+    One file's section of a combined `git diff`, held as (start, end)
+    offsets into the shared diff text. Only the header lines are parsed;
+    `text` slices the section out when it is actually needed.
+
+    `status` is "M", "A" (new file), "D" (deleted), "R" (renamed) or
+    "C" (copied). For additions old_path is None, for deletions new_path.
+    """
+    __slots__ = ("buffer", "start", "end", "old_path", "new_path", "status", "old_mode", "new_mode")
+
+    def __init__(self, buffer: str, start: int, end: int):
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+        self.old_path = None
+        self.new_path = None
+        self.status = "M"
+        self.old_mode = None
+        self.new_mode = None
+
+    @property
+    def path(self):
+        """The destination path, or the source path for deletions."""
+        return self.new_path or self.old_path
+
+    @property
+    def text(self) -> str:
+        return self.buffer[self.start:self.end]
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __repr__(self):
+        return f"DiffSection({self.path!r}, {self.status}, {self.start}:{self.end})"
+
+    def _apply_header_line(self, line: str) -> bool:
+        """Applies one extended header line; False if the line isn't one."""
+        if line.startswith('old mode '):
+            self.old_mode = line[9:]
+        elif line.startswith('new mode '):
+            self.new_mode = line[9:]
+        elif line.startswith('deleted file mode '):
+            self.status, self.old_mode, self.new_path = "D", line[18:], None
+        elif line.startswith('new file mode '):
+            self.status, self.new_mode, self.old_path = "A", line[14:], None
+        elif line.startswith('rename from '):
+            self.status, self.old_path = "R", unquote_path(line[12:])
+        elif line.startswith('rename to '):
+            self.new_path = unquote_path(line[10:])
+        elif line.startswith('copy from '):
+            self.status, self.old_path = "C", unquote_path(line[10:])
+        elif line.startswith('copy to '):
+            self.new_path = unquote_path(line[8:])
+        elif line.startswith('--- '):
+            self.old_path = _header_path(line[4:])
+        elif line.startswith('+++ '):
+            self.new_path = _header_path(line[4:])
+        elif not line.startswith(('index ', 'similarity index ', 'dissimilarity index ')):
+            return False
+        return True
+
+_NON_SPACE_RE = re.compile(r'\S')
+
+def _parse_section(text: str, start: int, end: int) -> DiffSection:
+    section = DiffSection(text, start, end)
+    eol = text.find('\n', start, end)
+    eol = end if eol == -1 else eol
+    section.old_path, section.new_path = parse_diff_git_line(text[start:eol])
+
+    # Extended headers and ---/+++ lines are authoritative for renames,
+    # quoted names and names with spaces; stop at the first hunk
+    pos = eol + 1
+    while pos < end:
+        eol = text.find('\n', pos, end)
+        eol = end if eol == -1 else eol
+        line = text[pos:eol].rstrip('\r')
+        if not section._apply_header_line(line) or line.startswith('+++ '):
+            break
+        pos = eol + 1
+    return section
+
+def iter_diff_sections(diff_text: str):
+    """
+    Yields a DiffSection per file of a combined `git diff`, in order,
+    without copying the diff. Text before the first "diff --git" line
+    (if any) comes out as a section with no path.
+    """
+    # str.find is much faster than a MULTILINE regex over a large diff
+    if diff_text.startswith('diff --git '):
+        start = 0
+    else:
+        start = diff_text.find('\ndiff --git ') + 1 or len(diff_text)
+        if _NON_SPACE_RE.search(diff_text, 0, start):
+            yield DiffSection(diff_text, 0, start)
+
+    while start < len(diff_text):
+        end = diff_text.find('\ndiff --git ', start) + 1 or len(diff_text)
+        yield _parse_section(diff_text, start, end)
+        start = end
+
+def split_diff_by_file(diff_text: str) -> dict:
+    """
+    Splits combined `git diff` output into {path: section}, keyed by the
+    destination path (or the source path for deletions).
+    """
+    sections = {}
+    for section in iter_diff_sections(diff_text):
+        if section.path is not None:
+            sections[section.path] = section.text.rstrip('\n')
+    return sections
@@ -1,150 +1,777 @@
+import heapq
+import math
+import os
 import re
-from dataclasses import dataclass
-from typing import List, Callable, Tuple
-from token_management import TokenManager, FilePrioritizer, FileCategory
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Callable, Tuple
+from budget_allocator import ChunkOption, allocate, OMIT, DROP, SUMMARY, PREFIX, CONTEXT, FULL
+from diff_context import reduce_context
+from diff_paths import DiffSection, iter_diff_sections, quote_path
+from diff_stats import DiffStat, format_stats_stub, is_stats_stub
+from generated_files import GENERATED_SNIFF_BYTES, is_generated_name, looks_generated
+from hunk_dedup import hunk_fingerprint, same_hunk_note, split_hunks
+from token_management import TokenManager, TokenEstimator, FilePrioritizer, FileCategory
+
+# Rough cost model used to plan which diff bodies to fetch (see plan_budget)
+PLAN_BYTES_PER_TOKEN = 3.5
+PLAN_AVG_LINE_BYTES = 40
+PLAN_CONTEXT_RATIO = 0.75   # context lines per changed line
+PLAN_HEADER_TOKENS = 25
+
+# Below this many bytes of text, threads cost more than they save
+PARALLEL_TOKENIZE_MIN_BYTES = 256 * 1024
+# Text materialized at once while counting parse_diff's chunks
+COUNT_WINDOW_CHARS = 1024 * 1024
+SUMMARY_WORKERS = 8
+SUMMARY_TIMEOUT = 30.0
+TRUNCATED_MARKER = "...[Truncated]..."
+REMAINING_MARKER = "...[Remaining Diff Truncated]..."
+OMITTED_MARKER = "...[{count} more files omitted]..."
+
+# What each way of including a chunk is worth next to the whole chunk,
+# before the chunk's category weight (1 / category priority). A cut is
+# worth a placeholder plus a share of the rest of PREFIX_VALUE that grows
+# with sqrt(fraction kept): the first lines of a diff say the most, so
+# sharing a budget between files beats keeping one of them whole.
+SUMMARY_VALUE = 0.7
+DROP_VALUE = 0.15
+PREFIX_VALUE = 0.8
+# Whole chunk re-rendered with this many context lines (git diff -U<n>)
+CONTEXT_VALUES = {1: 0.95, 0: 0.85}
+# Cut sizes offered per chunk: steps of the budget, plus hunk boundaries
+PREFIX_LEVELS = 8
+MAX_HUNK_CUTS = 8
+PREFIX_CATEGORIES = (FileCategory.LOGIC, FileCategory.CONFIG, FileCategory.DOCS, FileCategory.UNKNOWN)
+# Times the budget is re-planned to ask for more summaries
+SUMMARY_ROUNDS = 2
+# Pure renames from one directory to another, this many or more, become one line
+MIN_DIRECTORY_MOVE = 2
+# Paths named after a hunk that stands in for its copies in other files
+DEDUP_LISTED_PATHS = 20
+
+# Extended header lines that canonicalize_section folds into the "diff --git" line
+_FOLDED_HEADERS = (
+    "index ", "--- ", "+++ ", "old mode ", "new mode ", "new file mode ", "deleted file mode ",
+    "similarity index ", "dissimilarity index ", "rename from ", "rename to ", "copy from ", "copy to ",
+)
+# Not the lone space of an empty context line, which a diff needs
+_TRAILING_SPACE_RE = re.compile(r"(?<=\S)[ \t\r]+$", re.MULTILINE)
+_NO_NEWLINE_RE = re.compile(r"^\\.*\n?", re.MULTILINE)
+_CHANGED_LINE_RE = re.compile(r"^[+-].*\n?", re.MULTILINE)
+_FIRST_LINE_HUNK_RE = re.compile(r"@@ -\d+(?:,\d+)? \+1(?:,\d+)? @@")
+_STATUS_NOTES = {"A": "new file", "D": "deleted", "R": "renamed", "C": "copied"}
+
+def _has_whitespace_only_change(body: str) -> bool:
+    # Also true for a line moved within the file; either way the body is kept as is
+    removed, added = set(), set()
+    for line in body.splitlines():
+        if line.startswith("-"):
+            removed.add(line[1:].rstrip())
+        elif line.startswith("+"):
+            added.add(line[1:].rstrip())
+    return not removed.isdisjoint(added)
+
+def canonicalize_section(section: DiffSection, removed: List[str] = None) -> str:
+    """
+    A file's diff without what costs tokens but tells the model nothing:
+    the index line and ---/+++ lines go, mode, rename and copy headers
+    become a note on the "diff --git" line ("[renamed, 97% similar]"),
+    and trailing whitespace and "\\ No newline at end of file" lines are
+    dropped, except in files whose changes are only that. Text that was
+    left out is appended to `removed`, if given.
+    """
+    text = section.text
+    if section.path is None:
+        return text
+    body_start = text.find("\n@@") + 1 or len(text)
+    lines = text[:body_start].splitlines(keepends=True)
+    kept, similarity = [], None
+    for line in lines[1:]:
+        if line.startswith(_FOLDED_HEADERS):
+            if line.startswith("similarity index "):
+                similarity = line[17:].strip()
+            if removed is not None:
+                removed.append(line)
+        else:
+            kept.append(line)
+
+    notes = []
+    if section.status in _STATUS_NOTES:
+        notes.append(_STATUS_NOTES[section.status] + (f", {similarity} similar" if similarity else ""))
+    if section.status == "A" and section.new_mode and section.new_mode != "100644":
+        notes.append(f"mode {section.new_mode}")
+    elif section.old_mode and section.new_mode and section.old_mode != section.new_mode:
+        notes.append(f"mode {section.old_mode} -> {section.new_mode}")
+    header = lines[0].rstrip("\r\n") if lines else ""
+    if notes:
+        header += f" [{', '.join(notes)}]"
+    if lines and (lines[0].endswith("\n") or notes):
+        header += "\n"
+
+    body = text[body_start:]
+    # Cheap checks first: most bodies have nothing to drop
+    if ("\n\\" in body or _TRAILING_SPACE_RE.search(body)) and not _has_whitespace_only_change(body):
+        if removed is not None:
+            removed.extend(m.group(0) for m in _TRAILING_SPACE_RE.finditer(body))
+            removed.extend(m.group(0) for m in _NO_NEWLINE_RE.finditer(body))
+        body = _NO_NEWLINE_RE.sub("", _TRAILING_SPACE_RE.sub("", body))
+    return header + "".join(kept) + body
+
+def _move_roots(old_path: str, new_path: str):
+    """
+    The directories a file moved between, once the path they end in alike
+    is taken off: ("src", "lib") for src/a/x.py -> lib/a/x.py. None when
+    the file name itself changed.
+    """
+    old_parts, new_parts = old_path.split("/"), new_path.split("/")
+    common = 0
+    while common < min(len(old_parts), len(new_parts)) and old_parts[-1 - common] == new_parts[-1 - common]:
+        common += 1
+    if not common:
+        return None
+    return "/".join(old_parts[:-common]), "/".join(new_parts[:-common])
+
+def _is_pure_rename(section: DiffSection, canonical: str) -> bool:
+    # canonicalize_section leaves a rename with nothing else to show as its header line
+    return section.status == "R" and canonical.endswith(" [renamed, 100% similar]\n") and canonical.count("\n") == 1
+
+def _directory_move(old_root: str, new_root: str, count: int) -> str:
+    a_name = quote_path(f"a/{old_root}/" if old_root else "a/")
+    b_name = quote_path(f"b/{new_root}/" if new_root else "b/")
+    return f"diff --git {a_name} {b_name} [{count} files renamed, 100% similar]\n"
+
+def _generated_stub(section: DiffSection):
+    """
+    The stats stub of a file whose diff is generated (by its name, or by
+    the first few KB of the new side of its hunks), or None. Only counts lines of
+    the rest, so a generated diff is never tokenized.
+    """
+    if section.path is None:
+        return None
+    buffer, start, end = section.buffer, section.start, section.end
+    body = buffer.find("\n@@", start, end)
+    if body == -1:
+        # No hunks: binary, a pure rename, or already a stub
+        return None
+    if not is_generated_name(section.path):
+        head = buffer[body:min(end, body + GENERATED_SNIFF_BYTES)].split("\n")[1:]
+        # The new file's first lines are only there if the first hunk starts at its top
+        top = _FIRST_LINE_HUNK_RE.match(head[0]) is not None
+        if not looks_generated(section.path, "\n".join(line[1:] for line in head[1:] if line[:1] in ("+", " ")), top):
+            return None
+    added, deleted = buffer.count("\n+", body, end), buffer.count("\n-", body, end)
+    return format_stats_stub(DiffStat(path=section.path, added=added, deleted=deleted, is_generated=True)) + "\n"
 
-@dataclass
 class DiffChunk:
-    filename: str
-    content: str
-    token_count: int = 0
-    category: FileCategory = FileCategory.UNKNOWN
+    """
+    One file's part of the diff being budgeted. Chunks from parse_diff
+    whose text canonicalization left as it was hold only their DiffSection
+    (offsets into the diff) and slice the text out on each read of
+    `content`; the others hold their canonical text, computed once.
+    """
+    __slots__ = ("filename", "_content", "section", "token_count", "category", "token_error", "fingerprints")
+
+    def __init__(self, filename: str, content: str = None, token_count: int = 0,
+                 category: FileCategory = FileCategory.UNKNOWN, token_error: int = 0, section: DiffSection = None,
+                 fingerprints: list = None):
+        self.filename = filename
+        self._content = content
+        self.section = section
+        self.token_count = token_count
+        self.category = category
+        self.token_error = token_error    # > 0 while token_count is only an estimate
+        self.fingerprints = fingerprints  # hunk_fingerprint of each hunk, for _deduplicate_hunks
+
+    @property
+    def content(self) -> str:
+        if self._content is not None:
+            return self._content
+        if self.section is None:
+            return ""
+        return self.section.text
+
+    @content.setter
+    def content(self, value: str):
+        self._content = value
+
+    def __len__(self):
+        return len(self._content) if self._content is not None or self.section is None else len(self.section)
+
+    def __repr__(self):
+        return f"DiffChunk({self.filename!r}, {self.category.name}, tokens={self.token_count})"
+
+@dataclass
+class DiffPlan:
+    """Which files to fetch in full, as summarization excerpts, or as stats only."""
+    full_files: List[str] = field(default_factory=list)
+    summary_files: List[str] = field(default_factory=list)
+    stats_files: List[DiffStat] = field(default_factory=list)
+    excerpt_chars: int = 8000
+
+class _TokenTally:
+    """
+    Running total of chunk token counts with the combined error of the
+    chunks that are still estimates. `fits` exact-counts the most uncertain
+    chunks only while the interval straddles the limit, as many at a time
+    as it takes to settle it if the estimates are right, in one batch.
+    """
+    def __init__(self, chunks, count_exact, estimated=False):
+        # count_exact(chunks) replaces their estimates by exact counts
+        self.count_exact = count_exact
+        self.total = sum(c.token_count for c in chunks)
+        self.slack = 0
+        self._uncertain = []
+        if estimated:
+            self.slack = sum(c.token_error for c in chunks)
+            self._uncertain = [(-c.token_error, i, c) for i, c in enumerate(chunks) if c.token_error]
+            heapq.heapify(self._uncertain)
+
+    def fits(self, limit):
+        while self.slack:
+            if self.total + self.slack <= limit:
+                return True
+            if self.total - self.slack > limit:
+                return False
+            # Error to take out to decide either way
+            gap = min(self.total + self.slack - limit, limit - (self.total - self.slack) + 1)
+            batch, error = [], 0
+            while self._uncertain and error < gap:
+                _, _, chunk = heapq.heappop(self._uncertain)
+                if chunk.token_error:
+                    batch.append(chunk)
+                    error += chunk.token_error
+            self.make_exact(batch)
+        return self.total <= limit
+
+    def make_exact(self, chunks):
+        chunks = [c for c in chunks if c.token_error]
+        before = [(c.token_count, c.token_error) for c in chunks]
+        self.count_exact(chunks)
+        for chunk, (count, error) in zip(chunks, before):
+            self.total += chunk.token_count - count
+            self.slack -= error
+
+def _placeholder(chunk, reason: str = "Diff too large") -> str:
+    return f"diff --git {chunk.filename} [TRUNCATED]\n...{reason}...\n"
+
+def _summary_header(chunk) -> str:
+    return f"diff --git {chunk.filename} [SUMMARIZED]\n"
 
 class DiffProcessor:
-    def __init__(self, token_manager: TokenManager, file_prioritizer: FilePrioritizer, summarizer: Callable[[str], str] = None):
+    def __init__(self, token_manager: TokenManager, file_prioritizer: FilePrioritizer, summarizer: Callable[[str], str] = None,
+                 estimator: TokenEstimator = None, workers: int = None,
+                 parallel_min_bytes: int = PARALLEL_TOKENIZE_MIN_BYTES,
+                 summary_workers: int = SUMMARY_WORKERS, summary_timeout: float = SUMMARY_TIMEOUT,
+                 canonicalize: bool = True, deduplicate: bool = True, route_generated: bool = True):
         self.token_manager = token_manager
         self.file_prioritizer = file_prioritizer
         self.summarizer = summarizer
+        # Optional: estimate chunk sizes and count exactly only near the budget edge
+        self.estimator = estimator
+        # Threads for batch tokenization of large diffs; defaults to one per CPU
+        self.workers = workers if isinstance(workers, int) and workers > 0 else (os.cpu_count() or 1)
+        self.parallel_min_bytes = parallel_min_bytes
+        # Concurrent summarizer calls, and seconds to wait for each
+        self.summary_workers = max(1, summary_workers)
+        self.summary_timeout = summary_timeout
+        # Strip boilerplate from each chunk before it is counted (see canonicalize_section)
+        self.canonicalize = canonicalize
+        # Over the budget, send a hunk repeated across files once, with the list of files (see _deduplicate_hunks)
+        self.deduplicate = deduplicate
+        # Replace generated files' diffs with stats stubs before counting (see _generated_stub)
+        self.route_generated = route_generated
+        self.diffs = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.hunks = 0
+        self.duplicate_hunks = 0
+        self.dedup_tokens = 0
+        self.generated_files = 0
+        self.generated_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Tokens of the diffs parsed so far before and after canonicalization
+        and hunk deduplication. "Before" adds the tokens of the removed text
+        to "after" (a run of trailing whitespace counts as one), and with an
+        estimator both are estimates. dedup_ratio is the compression from
+        deduplication alone (only done to diffs over their budget): tokens
+        with the duplicate hunks over tokens sent.
+        Generated files replaced by stubs are counted apart, in diff bytes
+        never tokenized.
+        """
+        saved = self.tokens_before - self.tokens_after
+        return {
+            "diffs": self.diffs,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "saved_ratio": saved / self.tokens_before if self.tokens_before else 0.0,
+            "hunks": self.hunks,
+            "duplicate_hunks": self.duplicate_hunks,
+            "dedup_tokens": self.dedup_tokens,
+            "dedup_ratio": (self.tokens_after + self.dedup_tokens) / self.tokens_after if self.tokens_after else 1.0,
+            "generated_files": self.generated_files,
+            "generated_bytes": self.generated_bytes,
+        }
+
+    def _count_batch(self, texts: List[str]) -> List[int]:
+        """
+        Exact counts for many texts in one batched call when the token
+        manager supports it (multi-threaded above parallel_min_bytes),
+        otherwise one count_tokens call per text.
+        """
+        if not texts:
+            return []
+        if getattr(type(self.token_manager), "count_tokens_batch", None) is None:
+            return [self.token_manager.count_tokens(text) for text in texts]
+        threads = self.workers if sum(len(t) for t in texts) >= self.parallel_min_bytes else 1
+        return self.token_manager.count_tokens_batch(texts, threads)
+
+    def _count_exact(self, chunks: List[DiffChunk]):
+        """
+        Replaces the chunks' token counts by exact ones, counted in batches
+        that materialize at most COUNT_WINDOW_CHARS of text at a time.
+        """
+        start = 0
+        while start < len(chunks):
+            end, size = start, 0
+            while end < len(chunks) and (end == start or size + len(chunks[end]) <= COUNT_WINDOW_CHARS):
+                size += len(chunks[end])
+                end += 1
+            window = chunks[start:end]
+            for chunk, count in zip(window, self._count_batch([c.content for c in window])):
+                chunk.token_count, chunk.token_error = count, 0
+            start = end
+
+    def _summarize_chunks(self, chunks: List[DiffChunk]) -> List[str]:
+        """
+        Replacement contents for chunks, in order. Summarizer calls run
+        concurrently, up to summary_workers at a time, and a call that takes
+        longer than summary_timeout seconds is abandoned for a placeholder.
+        """
+        if not self.summarizer:
+            return [_placeholder(c) for c in chunks]
+
+        contents = []
+        executor = ThreadPoolExecutor(max_workers=min(self.summary_workers, len(chunks)),
+                                      thread_name_prefix="summarize")
+        try:
+            for start in range(0, len(chunks), self.summary_workers):
+                group = chunks[start:start + self.summary_workers]
+                futures = [executor.submit(self.summarizer, c.content) for c in group]
+                wait(futures, timeout=self.summary_timeout)
+                for chunk, future in zip(group, futures):
+                    if not future.done():
+                        future.cancel()
+                        contents.append(_placeholder(chunk, "Diff too large and summarization timed out"))
+                    elif future.exception() is not None:
+                        contents.append(_placeholder(chunk, "Diff too large and summarization failed"))
+                    else:
+                        contents.append(f"{_summary_header(chunk)}{future.result()}\n")
+        finally:
+            # Don't wait for abandoned calls
+            executor.shutdown(wait=False, cancel_futures=True)
+        return contents
+
+    def estimate_stat_tokens(self, stat: DiffStat) -> int:
+        """Estimates a file's diff cost from its numstat line and byte counts."""
+        if stat.is_binary or stat.is_generated:
+            return PLAN_HEADER_TOKENS
+        est_bytes = stat.changed_lines * PLAN_AVG_LINE_BYTES * (1 + PLAN_CONTEXT_RATIO)
+        if stat.size:
+            # A diff can't show much more than the old and new content
+            est_bytes = min(est_bytes, 2 * stat.size)
+        return PLAN_HEADER_TOKENS + int(est_bytes / PLAN_BYTES_PER_TOKEN)
+
+    def plan_budget(self, stats: Dict[str, DiffStat], token_limit: int = 4000,
+                    max_summaries: int = 16, excerpt_chars: int = 8000,
+                    headroom: float = 1.5) -> DiffPlan:
+        """
+        Decides, before any diff body is read, which files are fetched in full.
+        Files are taken in priority order (category, then size) while their
+        estimated cost fits the budget; estimates are rough, so the budget is
+        padded by `headroom` and process_diff makes the exact cut afterwards.
+        The rest are fetched as capped excerpts for the summarizer, or only as
+        numstat stubs once `max_summaries` is reached (or with no summarizer).
+        Generated and vendored files always get a stub.
+        """
+        plan = DiffPlan(excerpt_chars=excerpt_chars)
+        costed = []
+        for path, stat in stats.items():
+            category = self.file_prioritizer.categorize_file(path)
+            priority = self.file_prioritizer.category_priority[category]
+            costed.append((priority, self.estimate_stat_tokens(stat), path, stat))
+        costed.sort(key=lambda item: (item[0], item[1]))
+
+        budget = token_limit * headroom
+        used = 0
+        for _, cost, path, stat in costed:
+            if stat.is_generated:
+                plan.stats_files.append(stat)
+            elif used + cost <= budget:
+                plan.full_files.append(path)
+                used += cost
+            elif self.summarizer and not stat.is_binary and len(plan.summary_files) < max_summaries:
+                plan.summary_files.append(path)
+            else:
+                plan.stats_files.append(stat)
+        return plan
 
     def parse_diff(self, diff_text: str) -> List[DiffChunk]:
+        """
+        One chunk per file. Chunks point into diff_text rather than copying
+        it, and exact counting materializes one window of them at a time,
+        so memory stays close to the size of the diff itself.
+        """
         chunks = []
-        # Split by "diff --git "
-        # Use a regex lookahead to keep the delimiter or just split and prepend.
-        parts = diff_text.split("diff --git ")
-        
-        for part in parts:
-            if not part.strip():
-                continue
-            
-            content = "diff --git " + part
-            
-            # Extract filename
-            # First line: a/path b/path
-            first_line = part.splitlines()[0]
-            # Heuristic: split by space, take last element, strip b/
-            # This handles simple cases. Spaces in filenames might fail this simple check.
-            # But git diff output usually quotes filenames with spaces?
-            # Let's look for " b/" pattern.
-            
-            file_path = "unknown"
-            # Try to find " b/"
-            b_index = first_line.find(" b/")
-            if b_index != -1:
-                file_path = first_line[b_index+3:].strip()
-            else:
-                # Fallback
-                tokens = first_line.split()
-                if len(tokens) >= 2:
-                    file_path = tokens[-1].lstrip("b/")
-            
-            # Count tokens
-            count = self.token_manager.count_tokens(content)
+        removed = []
+        moves = {}
+        for section in iter_diff_sections(diff_text):
+            file_path = section.path or "unknown"
             cat = self.file_prioritizer.categorize_file(file_path)
-            
-            chunks.append(DiffChunk(filename=file_path, content=content, token_count=count, category=cat))
-            
+            stub = _generated_stub(section) if self.route_generated else None
+            if stub is not None:
+                self.generated_files += 1
+                self.generated_bytes += len(section)
+                count, error = self.estimator.estimate(stub, cat) if self.estimator else (0, 0)
+                chunks.append(DiffChunk(file_path, stub, token_count=count, category=cat, token_error=error))
+                continue
+            text = canonicalize_section(section, removed) if self.canonicalize else None
+            if text is not None and _is_pure_rename(section, text):
+                roots = _move_roots(section.old_path, section.new_path)
+                if roots is not None:
+                    moves.setdefault(roots, []).append(len(chunks))
+            fingerprints = None
+            if self.deduplicate:
+                fingerprints = [hunk_fingerprint(hunk) for hunk in split_hunks(text or section.text)[1]]
+                self.hunks += len(fingerprints)
+            # Count tokens (estimated here, or exactly in windows below)
+            count, error = self.estimator.estimate(text or section.text, cat) if self.estimator else (0, 0)
+            if text is not None and len(text) == len(section) and text == section.text:
+                # Nothing to strip; keep pointing into the diff instead of holding a copy
+                text = None
+            chunks.append(DiffChunk(file_path, text, token_count=count, category=cat, token_error=error, section=section,
+                                    fingerprints=fingerprints))
+        self._collapse_directory_moves(chunks, moves, removed)
+        chunks = [chunk for chunk in chunks if chunk is not None]
+
+        if not self.estimator:
+            self._count_exact(chunks)
+
+        self.diffs += 1
+        after = sum(c.token_count for c in chunks)
+        self.tokens_after += after
+        self.tokens_before += after
+        if removed:
+            spaces = sum(1 for piece in removed if piece.isspace())
+            removed_tokens, = self._count_batch(["".join(piece for piece in removed if not piece.isspace())])
+            self.tokens_before += spaces + removed_tokens
         return chunks
 
+    def _deduplicate_hunks(self, chunks: List[DiffChunk]) -> List[DiffChunk]:
+        """
+        Keeps the first copy of each hunk that recurs in other files (by
+        the chunks' hunk fingerprints) and drops the copies there, naming
+        their files in a line after the copy that was kept: a mass edit
+        costs about one hunk. Repeats within one file are left alone.
+        Chunks left with no hunks of their own go. Linear in the size of
+        the diff; only the chunks with a repeated hunk are read again.
+        Returns the new chunk list, with the rewritten chunks recounted.
+        """
+        owners = {}    # fingerprint -> index of the first chunk with it, or -1 once in two files
+        for i, chunk in enumerate(chunks):
+            for fingerprint in chunk.fingerprints or ():
+                if fingerprint is not None and owners.setdefault(fingerprint, i) not in (i, -1):
+                    owners[fingerprint] = -1
+        repeated = {fingerprint for fingerprint, owner in owners.items() if owner == -1}
+        if not repeated:
+            return chunks
+
+        kept = {}      # fingerprint -> (index of the chunk that keeps it, its pieces, index of the hunk)
+        copies = {}    # fingerprint -> paths of the dropped copies
+        rewritten = {}
+        duplicates = []
+        for i, chunk in enumerate(chunks):
+            if not chunk.fingerprints or repeated.isdisjoint(chunk.fingerprints):
+                continue
+            header, hunks = split_hunks(chunk.content)
+            pieces = [header]
+            own = False
+            for hunk, fingerprint in zip(hunks, chunk.fingerprints):
+                if fingerprint in repeated and fingerprint not in kept:
+                    pieces.append(hunk if hunk.endswith("\n") else hunk + "\n")
+                    kept[fingerprint] = (i, pieces, len(pieces) - 1)
+                    copies[fingerprint] = []
+                    own = True
+                elif fingerprint in repeated and kept[fingerprint][0] != i:
+                    paths = copies[fingerprint]
+                    if chunk.filename not in paths[-1:]:
+                        paths.append(chunk.filename)
+                    duplicates.append(hunk)
+                    self.duplicate_hunks += 1
+                else:
+                    pieces.append(hunk)
+                    own = True
+            rewritten[i] = pieces if own else None
+
+        for fingerprint, (_, pieces, index) in kept.items():
+            if copies[fingerprint]:
+                pieces[index] += same_hunk_note(copies[fingerprint], DEDUP_LISTED_PATHS)
+        before = sum(chunks[i].token_count for i in rewritten)
+        changed = []
+        for i, pieces in rewritten.items():
+            if pieces is not None:
+                chunk = chunks[i]
+                chunk.content = "".join(pieces)
+                changed.append(chunk)
+        if self.estimator:
+            for chunk in changed:
+                chunk.token_count, chunk.token_error = self.estimator.estimate(chunk.content, chunk.category)
+        else:
+            self._count_exact(changed)
+        duplicate_tokens, = self._count_batch(["".join(duplicates)])
+        self.dedup_tokens += duplicate_tokens
+        self.tokens_after -= before - sum(chunk.token_count for chunk in changed)
+        return [chunk for i, chunk in enumerate(chunks) if rewritten.get(i, True) is not None]
+
+    def _collapse_directory_moves(self, chunks: List[DiffChunk], moves: Dict[tuple, List[int]],
+                                  removed: List[str]):
+        """
+        Replaces the pure renames of each directory move, given as
+        {(old root, new root): chunk indexes}, by a single line in place of
+        the first of them, so moving a tree costs what moving a file does.
+        The others are set to None.
+        """
+        for (old_root, new_root), indexes in moves.items():
+            if len(indexes) < MIN_DIRECTORY_MOVE:
+                continue
+            text = _directory_move(old_root, new_root, len(indexes))
+            filename = f"{new_root}/" if new_root else "/"
+            cat = self.file_prioritizer.categorize_file(filename)
+            count, error = self.estimator.estimate(text, cat) if self.estimator else (0, 0)
+            removed.extend(chunks[i].content for i in indexes)
+            chunks[indexes[0]] = DiffChunk(filename, text, token_count=count, category=cat, token_error=error)
+            for i in indexes[1:]:
+                chunks[i] = None
+
+    def _hunk_cut_limits(self, text: str, token_count: int, marker_cost: int) -> List[int]:
+        """Estimated budgets for keeping the first hunks of a text, at most MAX_HUNK_CUTS of them."""
+        if not text:
+            return []
+        starts = []
+        pos = text.find("\n@@")
+        # The first hunk is never cut off on its own
+        pos = text.find("\n@@", pos + 1) if pos != -1 else -1
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = text.find("\n@@", pos + 1)
+        if len(starts) > MAX_HUNK_CUTS:
+            step = len(starts) / MAX_HUNK_CUTS
+            starts = [starts[int(i * step)] for i in range(MAX_HUNK_CUTS)]
+        return [math.ceil(token_count * start / len(text)) + marker_cost for start in starts]
+
+    def _first_change_limit(self, text: str, token_count: int, marker_cost: int) -> int:
+        """Estimated budget for a cut that keeps the first added or removed line, 0 if there is none."""
+        body = text.find("\n@@")
+        match = _CHANGED_LINE_RE.search(text, body + 1) if body != -1 else None
+        if match is None:
+            return 0
+        return math.ceil(token_count * match.end() / len(text)) + marker_cost
+
+    def _reduced_versions(self, chunks: List[DiffChunk], token_limit: int) -> Dict[int, Dict[int, list]]:
+        """
+        {chunk index: {context lines: [text, token count]}} for the chunks
+        that get shorter with less context (see diff_context.reduce_context).
+        Versions that might fit the budget are counted in one batch; the
+        others keep a size-proportional estimate, good enough to plan cuts.
+        """
+        versions, texts, owners = {}, [], []
+        for i, chunk in enumerate(chunks):
+            if chunk.category not in PREFIX_CATEGORIES or chunk.token_count <= 0:
+                continue
+            content = chunk.content
+            if "\n@@" not in content or is_stats_stub(content):
+                continue
+            text = content
+            for context in sorted(CONTEXT_VALUES, reverse=True):
+                reduced = reduce_context(text, context)
+                if len(reduced) >= len(text):
+                    continue
+                text = reduced
+                estimate = math.ceil(chunk.token_count * len(text) / len(content))
+                versions.setdefault(i, {})[context] = [text, estimate]
+                if estimate <= token_limit:
+                    texts.append(text)
+                    owners.append((i, context))
+        for (i, context), count in zip(owners, self._count_batch(texts)):
+            versions[i][context][1] = count
+        return versions
+
+    def _chunk_options(self, chunk: DiffChunk, token_limit: int, drop_cost: int,
+                       marker_cost: int, separator: int, versions: Dict[int, list] = None) -> List[ChunkOption]:
+        """
+        Full, reduced-context, placeholder and cut options of a chunk;
+        summaries are added per round by _plan. Cuts are taken from the
+        one-line-context version when there is one, which shows more of
+        the changes in the same tokens.
+        """
+        weight = 1.0 / self.file_prioritizer.category_priority[chunk.category]
+        options = [ChunkOption(FULL, chunk.token_count + separator, weight)]
+        if is_stats_stub(chunk.content):
+            # Already as small as this file gets
+            return options
+        options.append(ChunkOption(DROP, drop_cost + separator, DROP_VALUE * weight))
+        versions = versions or {}
+        for context, (_, count) in versions.items():
+            if count <= token_limit:
+                options.append(ChunkOption(CONTEXT, count + separator, CONTEXT_VALUES[context] * weight, context=context))
+        if chunk.category in PREFIX_CATEGORIES and chunk.token_count > 0:
+            source, context = None, None
+            if 1 in versions:
+                (source, token_count), context = versions[1], 1
+            else:
+                source, token_count = chunk.content, chunk.token_count
+            costs = {token_limit * k // PREFIX_LEVELS for k in range(1, PREFIX_LEVELS + 1)}
+            costs.update(limit + separator for limit in self._hunk_cut_limits(source, token_count, marker_cost))
+            # A cut that keeps only headers and context shows nothing of the change
+            shortest = max(marker_cost + 1, self._first_change_limit(source, token_count, marker_cost))
+            for cost in sorted(costs):
+                limit = cost - separator
+                if limit >= token_count:
+                    break
+                if limit >= shortest:
+                    kept = math.sqrt((limit - marker_cost) / token_count)
+                    value = (DROP_VALUE + (PREFIX_VALUE - DROP_VALUE) * kept) * weight
+                    options.append(ChunkOption(PREFIX, cost, value, limit, context))
+        return options
+
+    def _plan(self, chunks: List[DiffChunk], token_limit: int):
+        """
+        Chooses how every chunk is shown (see budget_allocator.allocate).
+        Summaries are planned at the cost of their header alone, since
+        their length isn't known until they exist; the chosen ones are
+        generated concurrently and the budget is planned again with their
+        real sizes, asking for more summaries at most SUMMARY_ROUNDS times.
+        A plan that leaves files out is made again with room for the note
+        counting them. Returns the
+        plan and, per chunk, the text its option is made from (None for
+        the chunk's own content).
+        """
+        placeholders = [_placeholder(c) for c in chunks]
+        summarizable = [i for i, c in enumerate(chunks)
+                        if self.summarizer and c.category != FileCategory.LOGIC and not is_stats_stub(c.content)]
+        separator, marker_cost, note_cost, *costs = self._count_batch(
+            ["\n", "\n" + TRUNCATED_MARKER, "\n" + OMITTED_MARKER.format(count=len(chunks))]
+            + placeholders + [_summary_header(chunks[i]) for i in summarizable])
+        header_costs = dict(zip(summarizable, costs[len(chunks):]))
+
+        reduced = self._reduced_versions(chunks, token_limit)
+        base = [self._chunk_options(c, token_limit, cost, marker_cost, separator, reduced.get(i))
+                for i, (c, cost) in enumerate(zip(chunks, costs))]
+        contents = dict(enumerate(placeholders))
+        summarized = {}
+        for round_number in range(SUMMARY_ROUNDS + 1):
+            choices = []
+            for i, options in enumerate(base):
+                weight = options[0].value
+                if i in summarized:
+                    # Replaces the plain placeholder, also when summarizing failed
+                    worth = SUMMARY_VALUE if summarized[i][1] else DROP_VALUE
+                    options = [o for o in options if o.kind != DROP]
+                    options.append(ChunkOption(SUMMARY, summarized[i][0] + separator, worth * weight))
+                elif i in header_costs and round_number < SUMMARY_ROUNDS:
+                    options = options + [ChunkOption(SUMMARY, header_costs[i] + separator, SUMMARY_VALUE * weight)]
+                choices.append(options)
+            # The first chunk has no separator in front of it
+            plan = allocate(choices, token_limit + separator)
+            if any(option.kind == OMIT for option in plan):
+                plan = allocate(choices, token_limit + separator - note_cost)
+
+            wanted = [i for i, option in enumerate(plan) if option.kind == SUMMARY and i not in summarized]
+            if not wanted:
+                break
+            summaries = self._summarize_chunks([chunks[i] for i in wanted])
+            for i, summary, count in zip(wanted, summaries, self._count_batch(summaries)):
+                contents[i] = summary
+                summarized[i] = (count, summary.startswith(_summary_header(chunks[i])))
+
+        sources = []
+        for i, option in enumerate(plan):
+            if option.kind in (DROP, SUMMARY):
+                sources.append(contents[i])
+            elif option.context is not None:
+                sources.append(reduced[i][option.context][0])
+            else:
+                sources.append(None)
+        return plan, sources
+
     def process_diff(self, diff_text: str, token_limit: int = 4000) -> Tuple[str, bool]:
         chunks = self.parse_diff(diff_text)
-        total_tokens = sum(c.token_count for c in chunks)
-        
-        if total_tokens <= token_limit:
+        tally = _TokenTally(chunks, self._count_exact, estimated=self.estimator is not None)
+        fits = tally.fits(token_limit)
+        if not fits and self.deduplicate:
+            # Repeated hunks are only folded when the diff doesn't fit as it is
+            deduplicated = self._deduplicate_hunks(chunks)
+            if deduplicated is not chunks:
+                chunks = deduplicated
+                tally = _TokenTally(chunks, self._count_exact, estimated=self.estimator is not None)
+                fits = tally.fits(token_limit)
+
+        if fits:
+            if self.canonicalize or self.deduplicate or self.generated_files:
+                return "".join(c.content for c in chunks), False
             return diff_text, False
 
-        # Order of categories to sacrifice: IGNORED -> LOCK -> UNKNOWN -> DOCS -> CONFIG -> LOGIC
-        # We leave LOGIC out of this blind sacrifice loop so it can be handled by proportional budgeting
-        # to ensure we don't just wipe out the first logic file we see.
-        sacrifice_order = [
-            FileCategory.IGNORED,
-            FileCategory.LOCK,
-            FileCategory.UNKNOWN,
-            FileCategory.DOCS,
-            FileCategory.CONFIG
-        ]
-        
-        current_tokens = total_tokens
-        
-        for category in sacrifice_order:
-            if current_tokens <= token_limit:
-                break
-                
-            target_chunks = [c for c in chunks if c.category == category]
-            # Sort by size (largest first) to make biggest impact
-            target_chunks.sort(key=lambda c: c.token_count, reverse=True)
-            
-            for chunk in target_chunks:
-                if current_tokens <= token_limit:
-                    break
-                
-                # Summarize
-                if self.summarizer:
-                    try:
-                        summary = self.summarizer(chunk.content)
-                        new_content = f"diff --git {chunk.filename} [SUMMARIZED]\n{summary}\n"
-                    except Exception:
-                        new_content = f"diff --git {chunk.filename} [TRUNCATED]\n...Diff too large and summarization failed...\n"
+        if self.estimator:
+            # Plan chunks that might still be kept whole at their exact size,
+            # counted in one batch; the rest can only be cut, summarized or
+            # left out anyway
+            tally.make_exact([c for c in chunks if c.token_count - c.token_error <= token_limit])
+
+        # One choice per chunk (whole, with less context, cut, summarized,
+        # placeholder or left out) for the most category-weighted content within the budget,
+        # instead of summarizing by category and then cutting every chunk
+        plan, sources = self._plan(chunks, token_limit)
+
+        # Newer token managers cut at line boundaries and return the count in one pass
+        cut_with_count = getattr(type(self.token_manager), "truncate_with_count", None) is not None
+
+        if not cut_with_count:
+            marker_cost = self.token_manager.count_tokens("\n" + TRUNCATED_MARKER)
+
+        parts = []
+        for chunk, option, source in zip(chunks, plan, sources):
+            if option.kind == OMIT:
+                continue
+            if source is None:
+                source = chunk.content
+            if option.kind == PREFIX:
+                if cut_with_count:
+                    # Marker included in the budget; only ~limit tokens get encoded
+                    source, _ = self.token_manager.truncate_with_count(source, option.limit, marker=TRUNCATED_MARKER)
                 else:
-                    new_content = f"diff --git {chunk.filename} [TRUNCATED]\n...Diff too large...\n"
-                
-                new_count = self.token_manager.count_tokens(new_content)
-                
-                # Only apply if it saves space
-                if new_count < chunk.token_count:
-                    diff = chunk.token_count - new_count
-                    chunk.content = new_content
-                    chunk.token_count = new_count
-                    current_tokens -= diff
-
-        # If still over limit, apply proportional budgeting
-        if current_tokens > token_limit:
-            # We need to reduce current_tokens to token_limit.
-            # We should target ALL chunks to share the burden, or perhaps just the remaining "full" chunks.
-            # But simpler to budget everyone proportional to their current size.
-            
-            # Calculate total size of all chunks currently
-            total_current_size = sum(c.token_count for c in chunks)
-            
-            # This should equal current_tokens, but let's be safe
-            if total_current_size == 0:
-                 return "", True # Should not happen if over limit
-
-            # Allocate budget
-            for chunk in chunks:
-                # ratio = chunk_size / total_current_size
-                # budget = token_limit * ratio
-                ratio = chunk.token_count / total_current_size
-                budget = int(token_limit * ratio)
-                
-                # Ensure at least some budget (e.g. header) if possible, but strict limit applies.
-                # If budget is smaller than current, truncate.
-                if budget < chunk.token_count:
-                    # Truncate content
-                    # We need to be careful not to corrupt headers if possible, 
-                    # but TokenManager.truncate_to_limit is raw text truncation.
-                    chunk.content = self.token_manager.truncate_to_limit(chunk.content, budget)
-                    chunk.content += "\n...[Truncated]..."
-                    chunk.token_count = self.token_manager.count_tokens(chunk.content)
+                    # Raw text truncation, leaving room for the marker
+                    source = self.token_manager.truncate_to_limit(source, max(option.limit - marker_cost, 0))
+                    source += "\n" + TRUNCATED_MARKER
+            parts.append(source)
+
+        omitted = sum(1 for option in plan if option.kind == OMIT)
+        if omitted:
+            parts.append(OMITTED_MARKER.format(count=omitted))
 
         # Reconstruct
-        final_text = "\n".join([c.content for c in chunks])
+        final_text = "\n".join(parts)
         
         # Final safety check (hard truncate if somehow still over, e.g. due to "...[Truncated]..." additions)
-        # But allow a small buffer if needed, or just hard cut.
-        # The spec implies strict enforcement.
-        final_count = self.token_manager.count_tokens(final_text)
-        if final_count > token_limit:
-             final_text = self.token_manager.truncate_to_limit(final_text, token_limit)
-             final_text += "\n...[Remaining Diff Truncated]..."
-            
+        # The spec implies strict enforcement. The assembled text is counted
+        # in one call: per-line sums overcount tokens that merge across lines
+        # ("\n\n"), and would chop tails that fit.
+        if self.token_manager.count_tokens(final_text) > token_limit:
+            if cut_with_count:
+                final_text, _ = self.token_manager.truncate_with_count(final_text, token_limit, marker=REMAINING_MARKER)
+            else:
+                final_text = self.token_manager.truncate_to_limit(final_text, token_limit)
+                final_text += "\n" + REMAINING_MARKER
+
         return final_text, True
@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+from typing import Optional
+from diff_paths import quote_path
+
+STATS_ONLY_MARKER = "[STATS ONLY]"
+
+@dataclass(frozen=True)
+class DiffStat:
+    """Size of one file's diff, as reported by `git diff --numstat`."""
+    path: str
+    added: int
+    deleted: int
+    is_binary: bool = False
+    size: int = 0                   # bytes of the file (worktree, or HEAD blob if deleted)
+    orig_path: Optional[str] = None
+    is_generated: bool = False      # generated or vendored (see generated_files)
+
+    @property
+    def changed_lines(self) -> int:
+        return self.added + self.deleted
+
+def parse_numstat(output: str) -> dict:
+    """
+    Parses `git diff --numstat -z` output into {path: DiffStat}.
+    Renames are reported as "added\\tdeleted\\t\\0old\\0new\\0".
+    """
+    stats = {}
+    records = output.split('\0')
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if not record:
+            continue
+        added, deleted, path = record.split('\t', 2)
+        orig_path = None
+        if not path:
+            orig_path, path = records[i], records[i + 1]
+            i += 2
+        is_binary = added == '-'
+        stats[path] = DiffStat(
+            path=path,
+            added=0 if is_binary else int(added),
+            deleted=0 if is_binary else int(deleted),
+            is_binary=is_binary,
+            orig_path=orig_path,
+        )
+    return stats
+
+def format_stats_stub(stat: DiffStat) -> str:
+    """A one-file diff section that carries only the change statistics."""
+    a_name, b_name = quote_path(f"a/{stat.path}"), quote_path(f"b/{stat.path}")
+    if stat.is_binary:
+        detail = f"binary file, {stat.size} bytes"
+    else:
+        # A size of 0 means it isn't known (stubs made from a diff)
+        detail = f"+{stat.added} -{stat.deleted} lines" + (f", {stat.size} bytes" if stat.size else "")
+    if stat.is_generated:
+        detail = f"generated, {detail}"
+    return f"diff --git {a_name} {b_name}\n{STATS_ONLY_MARKER} {detail}"
+
+def is_stats_stub(content: str) -> bool:
+    first_newline = content.find('\n')
+    return first_newline != -1 and content.startswith(STATS_ONLY_MARKER, first_newline + 1)
@@ -0,0 +1,102 @@
+import threading
+import tiktoken
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# Fallback for tiktoken releases that predate a model family; checked in order
+_MODEL_PREFIX_ENCODINGS = (
+    ("gpt-5", "o200k_base"),
+    ("gpt-4.1", "o200k_base"),
+    ("gpt-4o", "o200k_base"),
+    ("o1", "o200k_base"),
+    ("o3", "o200k_base"),
+    ("o4", "o200k_base"),
+    ("gpt-4", "cl100k_base"),
+    ("gpt-3.5", "cl100k_base"),
+)
+
+def encoding_name_for_model(model: str) -> str:
+    """
+    Picks the tiktoken encoding for a model name. Models tiktoken doesn't
+    know (Gemini, Ollama) are approximated with cl100k_base.
+    """
+    if not isinstance(model, str) or not model:
+        return DEFAULT_ENCODING
+    try:
+        return tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        pass
+    for prefix, name in _MODEL_PREFIX_ENCODINGS:
+        if model.startswith(prefix):
+            return name
+    return DEFAULT_ENCODING
+
+def resolve_encoding_name(name_or_model: str) -> str:
+    """Accepts either an encoding name ("o200k_base") or a model name ("gpt-4o")."""
+    if name_or_model in tiktoken.list_encoding_names():
+        return name_or_model
+    return encoding_name_for_model(name_or_model)
+
+class EncodingRegistry:
+    """
+    Process-wide cache of tiktoken encodings keyed by encoding name.
+
+    The first load of an encoding reads (or downloads) its BPE file, which
+    can take seconds; `preload` does that on a background thread at startup
+    so TokenManager and the diff pipeline only ever get a ready encoding.
+    Concurrent requests for the same encoding wait for a single load.
+    """
+    def __init__(self):
+        self._encodings = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str):
+        with self._lock:
+            encoding = self._encodings.get(name)
+            if encoding is not None:
+                return encoding
+            loading = self._loading.get(name)
+            is_loader = loading is None
+            if is_loader:
+                loading = self._loading[name] = threading.Event()
+
+        if not is_loader:
+            loading.wait()
+            with self._lock:
+                encoding = self._encodings.get(name)
+            # The other loader failed; try ourselves so the caller sees the error
+            return encoding if encoding is not None else self.get(name)
+
+        try:
+            encoding = tiktoken.get_encoding(name)
+            with self._lock:
+                self._encodings[name] = encoding
+            return encoding
+        finally:
+            with self._lock:
+                self._loading.pop(name, None)
+            loading.set()
+
+    def for_model(self, model: str):
+        return self.get(encoding_name_for_model(model))
+
+    def is_loaded(self, name: str) -> bool:
+        with self._lock:
+            return name in self._encodings
+
+    def preload(self, names) -> threading.Thread:
+        """Loads the given encodings on a daemon thread; returns the thread."""
+        def _run():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"Error preloading encoding {name}: {e}")
+
+        thread = threading.Thread(target=_run, daemon=True)
+        thread.start()
+        return thread
+
+# Shared by TokenManager, DiffProcessor and any other token counting code
+registry = EncodingRegistry()
@@ -0,0 +1,68 @@
+import re
+
+# Attributes asked of `git check-attr`: "-diff" (or the "binary" macro) and
+# GitHub linguist's generated/vendored markers
+GENERATED_ATTRIBUTES = ("diff", "linguist-generated", "linguist-vendored")
+
+# Only this much of a file (or of a diff's changed lines) is looked at
+GENERATED_SNIFF_BYTES = 8192
+# Minified code: a single line at least this long, in a code or asset file
+MINIFIED_LINE_BYTES = 4096
+MINIFIED_SUFFIXES = (".js", ".mjs", ".cjs", ".css", ".json", ".map")
+# Lines at the top of a file searched for a generator's marker comment
+HEADER_LINES = 5
+
+GENERATED_SUFFIXES = (
+    ".min.js", ".min.css", ".min.mjs", ".bundle.js", ".js.map", ".css.map",
+    "_pb2.py", "_pb2_grpc.py", ".pb.go", ".pb.cc", ".pb.h", ".pb.swift", "_pb.js", "_pb.d.ts",
+    ".g.dart", ".freezed.dart", ".generated.cs", ".designer.cs", "_generated.go",
+)
+
+_COMMENT_STARTS = ("#", "//", "/*", "*", "<!--", "--", ";", "'", '"""', "%")
+# Markers that code generators put at the top of their output
+_GENERATED_RE = re.compile(
+    r"\bcode generated\b.*\bdo not edit\b|@generated\b|<auto-generated\b"
+    r"|\bgenerated by the protocol buffer compiler\b|\bautogenerated by thrift\b",
+    re.IGNORECASE,
+)
+
+def parse_check_attr(output: str) -> dict:
+    """
+    Parses `git check-attr -z` output, "path NUL attribute NUL info NUL"
+    repeated, into {path: {attribute: info}}. info is "set", "unset",
+    "unspecified" or the attribute's value.
+    """
+    records = output.split("\0")
+    attributes = {}
+    for i in range(0, len(records) - 2, 3):
+        attributes.setdefault(records[i], {})[records[i + 1]] = records[i + 2]
+    return attributes
+
+def is_generated_by_attributes(attributes: dict) -> bool:
+    """True for files marked -diff (or binary), linguist-generated or linguist-vendored."""
+    if attributes.get("diff") == "unset":
+        return True
+    return any(attributes.get(name) in ("set", "true") for name in ("linguist-generated", "linguist-vendored"))
+
+def is_generated_name(path: str) -> bool:
+    """Names that build tools and code generators give their output."""
+    return path.lower().endswith(GENERATED_SUFFIXES)
+
+def looks_generated(path: str, head: str, top: bool = True) -> bool:
+    """
+    Cheap checks on the first few KB of a file: a known generator's marker
+    in a comment at the top ("Code generated ... DO NOT EDIT", "@generated",
+    "Generated by the protocol buffer compiler"), or for JS, CSS, JSON and
+    source maps, a line so long it must be minified. With top=False head
+    is from further down the file and only the second check applies.
+    """
+    head = head[:GENERATED_SNIFF_BYTES]
+    lines = head.split("\n")
+    if top:
+        for line in lines[:HEADER_LINES]:
+            stripped = line.strip()
+            if stripped.startswith(_COMMENT_STARTS) and _GENERATED_RE.search(stripped):
+                return True
+    if not path.lower().endswith(MINIFIED_SUFFIXES):
+        return False
+    return any(len(line) >= MINIFIED_LINE_BYTES for line in lines)
@@ -1,16 +1,65 @@
 import git
-from git import Repo
+from git import Actor, Repo
 from git.exc import InvalidGitRepositoryError
+from git.index.fun import run_commit_hook
 import os
+import subprocess
+import tempfile
+import threading
+from dataclasses import replace
+import time
+from diff_cache import DiffCache
+from diff_paths import iter_diff_sections, parse_diff_git_line
+from diff_stats import DiffStat, format_stats_stub, parse_numstat
+from generated_files import GENERATED_ATTRIBUTES, GENERATED_SNIFF_BYTES, is_generated_by_attributes, \
+    is_generated_name, looks_generated, parse_check_attr
+from move_detection import RENAME_OPTIONS, find_moves
+from repo_status import parse_porcelain_v2
+from untracked_diff import UntrackedFileReader
+
+# Worktree files modified this recently may still change within the same
+# mtime tick, so their diffs are not cached (git's "racy clean" problem).
+_RACY_WINDOW_NS = 2_000_000_000
+
+# Above this many touched paths a full status is cheaper than a path-limited one
+_MAX_PATHSPEC_REFRESH = 1000
+
+# Keep git from flashing console windows in the windowed Windows build
+_CREATION_FLAGS = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+EXCERPT_MARKER = "...[Excerpt truncated]..."
+
+def _clip(diff_text, max_chars):
+    """Cuts a diff to at most max_chars, at a line boundary."""
+    if len(diff_text) <= max_chars:
+        return diff_text
+    cut = diff_text.rfind("\n", 0, max_chars)
+    return diff_text[:cut if cut > 0 else max_chars] + "\n" + EXCERPT_MARKER
 
 class GitService:
-    def __init__(self):
+    def __init__(self, untracked_head_lines=200, untracked_tail_lines=50):
         self.repo = None
         self.path = None
+        self._status = None
+        self.diff_cache = DiffCache()
+        # (snapshot, {new path: Move}, {(new paths, options): diff}): untracked
+        # moves are paired, and their diffs made, once per snapshot
+        self._moves = None
+        self._object_lock = threading.Lock()
+        self.untracked_reader = UntrackedFileReader(untracked_head_lines, untracked_tail_lines)
+        # Without a watcher nothing tells us about commits or checkouts made
+        # outside the app, so HEAD is re-read before a snapshot is reused
+        self.check_head = False
 
     def is_valid_repo(self, path):
+        self._status = None
+        if self.repo and path == self.path:
+            # Keep the open repo so its cat-file processes stay warm
+            return True
+        self.close()
         try:
             self.repo = Repo(path)
+            self.diff_cache.clear()
             self.path = path
             return True
         except InvalidGitRepositoryError:
@@ -20,102 +69,621 @@ class GitService:
              self.repo = None
              return False
 
+    def close(self):
+        """Shuts down the repo's persistent git processes."""
+        if self.repo:
+            self.repo.close()
+        self.repo = None
+        self.path = None
+        self._status = None
+
     def get_status(self):
         if not self.repo:
             return "No repository selected."
         return self.repo.git.status()
 
-    def get_diff(self, files=None):
+    def get_status_snapshot(self):
+        """
+        Returns the cached RepoStatusSnapshot, taking a new one if needed.
+        All file/branch queries read from this single status scan.
+        """
+        if not self.repo:
+            raise ValueError("Repository not initialized")
+        if self._status is None or (self.check_head and self._head_moved()):
+            self.refresh_status()
+        return self._status
+
+    def _head_moved(self):
+        """True if HEAD no longer points where the cached snapshot says (one `git rev-parse`)."""
+        try:
+            output = self._run_git(['rev-parse', '-q', '--verify', 'HEAD'], ok_codes=(0, 1))
+        except Exception as e:
+            print(f"Error reading HEAD: {e}")
+            return True
+        return (output.decode('ascii', errors='replace').strip() or None) != self._status.head_oid
+
+    def refresh_status(self, optional_locks=True):
+        """Takes a new snapshot with one `git status --porcelain=v2` call."""
+        if not self.repo:
+            raise ValueError("Repository not initialized")
+        env = {} if optional_locks else {'env': dict(os.environ, GIT_OPTIONAL_LOCKS='0')}
+        output = self.repo.git.status('--porcelain=v2', '-z', '--branch', '--untracked-files=all', **env)
+        self._status = parse_porcelain_v2(output)
+        return self._status
+
+    def read_blob(self, oid):
+        """Reads blob content through GitPython's persistent `git cat-file --batch` process."""
+        if not self.repo:
+            raise ValueError("Repository not initialized")
+        with self._object_lock:
+            _, _, _, data = self.repo.git.get_object_data(oid)
+        return data
+
+    def get_blob_size(self, oid):
+        """Reads a blob's size through the persistent `git cat-file --batch-check` process."""
+        if not self.repo:
+            raise ValueError("Repository not initialized")
+        with self._object_lock:
+            _, _, size = self.repo.git.get_object_header(oid)
+        return size
+
+    def refresh_paths(self, paths):
+        """
+        Updates the cached snapshot for only the given repo-relative paths
+        with a path-limited `git status`, instead of rescanning the worktree.
+        Returns the new snapshot.
+        """
+        if not self.repo:
+            raise ValueError("Repository not initialized")
+        if self._status is None or len(paths) > _MAX_PATHSPEC_REFRESH:
+            return self.refresh_status(optional_locks=False)
+        output = self._run_git(
+            ['status', '--porcelain=v2', '-z', '--branch', '--untracked-files=all', '--', *paths],
+            optional_locks=False,
+            env={'GIT_LITERAL_PATHSPECS': '1'},
+        )
+        self._status = self._status.with_paths(paths, parse_porcelain_v2(output.decode('utf-8', errors='replace')))
+        return self._status
+
+    def get_ignored(self, paths):
+        """Returns the subset of paths excluded by .gitignore (one `git check-ignore` call)."""
+        if not self.repo or not paths:
+            return set()
+        output = self._run_git(
+            ['check-ignore', '-z', '--stdin'],
+            input_bytes=b"\0".join(p.encode('utf-8') for p in paths) + b"\0",
+            ok_codes=(0, 1),
+        )
+        return {p for p in output.decode('utf-8', errors='replace').split('\0') if p}
+
+    def _run_git(self, args, input_bytes=None, ok_codes=(0,), optional_locks=True, env=None):
+        """
+        Runs git directly (bypassing GitPython) when stdin input, exit codes
+        or environment need control. Returns stdout as bytes.
+        """
+        git_exe = self.repo.git.GIT_PYTHON_GIT_EXECUTABLE or 'git'
+        run_env = dict(os.environ, **(env or {}))
+        if not optional_locks:
+            # Don't let status rewrite .git/index; the watcher would see it as a change
+            run_env['GIT_OPTIONAL_LOCKS'] = '0'
+        result = subprocess.run(
+            [git_exe, *args], cwd=self.repo.working_dir, input=input_bytes,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=run_env,
+            creationflags=_CREATION_FLAGS,
+        )
+        if result.returncode not in ok_codes:
+            raise git.exc.GitCommandError([git_exe, *args], result.returncode, result.stderr)
+        return result.stdout
+
+    def invalidate_status(self):
+        """Drops the cached snapshot after operations that change the repo."""
+        self._status = None
+
+    def get_diff(self, files=None, plan=None):
         if not self.repo:
             raise ValueError("Repository not initialized")
-        
-        diff_output = []
-        
-        # Split files into tracked and untracked
-        tracked_files = []
-        untracked_files = []
-        
-        all_untracked = set(self.repo.untracked_files)
-        
+
+        if plan is not None:
+            return self._planned_diff(plan)
+
         if files:
-            for f in files:
-                if f in all_untracked:
-                    untracked_files.append(f)
-                else:
-                    tracked_files.append(f)
+            # Served per file from the diff cache; only misses reach git
+            diff_map = self.get_diff_map(files, stub_generated=True)
+            return "\n".join(diff_map[f] for f in files if diff_map[f])
+
+        # If no files specified, diff all tracked changes.
+        # Usually get_diff is called with specific files in this app.
+        return self._tracked_diff([])
+
+    def get_staged_diff(self, files=None):
+        """
+        Diff of the index against HEAD, i.e. exactly what the next commit
+        contains. Generated and vendored files (see get_generated) appear
+        as numstat stubs only.
+        """
+        if not self.repo:
+            raise ValueError("Repository not initialized")
+        snapshot = self.get_status_snapshot()
+        generated = self.get_generated(files or snapshot.staged_files)
+        args = ['--cached', *RENAME_OPTIONS]
+        if files or generated:
+            diffed = [f for f in (files or snapshot.staged_files) if f not in generated]
+            # An empty pathspec would mean everything
+            diff = self.repo.git.diff(*args, '--', *snapshot.diff_pathspec(diffed)) if diffed else ""
         else:
-            # If no files specified, get everything? 
-            # Usually get_diff is called with specific files in this app
-            tracked_files = [] # standard diff will capture modified
-            untracked_files = [] # we might miss untracked if not explicitly requested?
-            # For now, rely on 'files' arg being populated by UI
+            diff = self.repo.git.diff(*args)
+        if not generated:
+            return diff
+        numstat = parse_numstat(self.repo.git.diff(*args, '--numstat', '-z', '--', *sorted(generated)))
+        stubs = [format_stats_stub(replace(stat, is_generated=True)) for stat in numstat.values()]
+        return "\n".join(part for part in [diff, *stubs] if part)
+
+    def get_diff_map(self, files, stub_generated=False):
+        """
+        Returns {path: diff} for the given files. Diffs are served from the
+        content-addressed diff cache when possible; all remaining tracked
+        files are diffed with a single `git diff` call whose output is split
+        per file, so the cost scales with the diff size rather than the
+        number of files. With stub_generated (for a prompt, not the
+        preview), generated and vendored files (see get_generated) are
+        shown by their numstat and their bodies are never read.
+        """
+        if not self.repo:
+            raise ValueError("Repository not initialized")
+
+        snapshot = self.get_status_snapshot()
+        # -diff and textconv in .gitattributes change diffs too
+        self.diff_cache.sync_head((snapshot.head_oid, self._attributes_state(snapshot)))
+        # A file that may pair up as a move has a diff that depends on the other files
+        uncached = self._move_candidates(files, snapshot)
+
+        diff_map = {}
+        if stub_generated:
+            generated = self.get_generated([f for f in files if f in snapshot and f not in uncached])
+            if generated:
+                stats = self._numstat(sorted(generated), snapshot)
+                for f in generated:
+                    diff_map[f] = format_stats_stub(replace(stats[f], is_generated=True)) if f in stats else ""
+        missing = {}
+        for f in files:
+            if f in diff_map:
+                continue
+            entry = snapshot.get(f)
+            if entry is None:
+                # Unchanged since the snapshot was taken
+                diff_map[f] = ""
+                continue
+            key = self._diff_cache_key(f, entry)
+            cached = None if f in uncached else self.diff_cache.get(key)
+            if cached is not None:
+                diff_map[f] = cached
+            else:
+                missing[f] = key
+
+        if not missing:
+            return {f: diff_map[f] for f in files}
+
+        started_ns = time.time_ns()
+        moves = self._untracked_moves(uncached, snapshot)
+        diff_map.update(self._move_sections(moves))
+
+        tracked_files = [f for f in missing if not snapshot.get(f).is_untracked and f not in diff_map]
+
+        if tracked_files:
+            sections = {}
+            pathspec = snapshot.diff_pathspec(tracked_files)
+            for section in iter_diff_sections(self._tracked_diff(pathspec)):
+                if section.path is None:
+                    continue
+                sections[section.path] = section.text.rstrip('\n')
+                entry = snapshot.get(section.path)
+                if section.status in ("R", "C") and (entry is None or entry.orig_path != section.old_path):
+                    # Paired by git across the requested files, not recorded in the index
+                    uncached.update((section.path, section.old_path))
+            for f in tracked_files:
+                diff_map[f] = sections.get(f, "")
+
+        for f in missing:
+            if snapshot.get(f).is_untracked and f not in moves:
+                diff_map[f] = self._untracked_diff(f) or ""
+
+        for f, key in missing.items():
+            if f not in uncached and not self._is_racy(key, started_ns):
+                self.diff_cache.put(key, diff_map[f])
+
+        return {f: diff_map[f] for f in files}
+
+    def get_generated(self, paths):
+        """
+        Returns the subset of paths that are generated or vendored: marked
+        -diff, linguist-generated or linguist-vendored in .gitattributes
+        (one `git check-attr` call for all of them), named like build
+        output, or whose first few KB look machine-written.
+        """
+        if not self.repo or not paths:
+            return set()
+        try:
+            output = self._run_git(
+                ['check-attr', '-z', '--stdin', *GENERATED_ATTRIBUTES],
+                input_bytes=b"\0".join(p.encode('utf-8') for p in paths) + b"\0",
+            )
+            attributes = parse_check_attr(output.decode('utf-8', errors='replace'))
+        except Exception as e:
+            print(f"Error reading git attributes: {e}")
+            attributes = {}
+
+        generated = set()
+        for path in paths:
+            if is_generated_by_attributes(attributes.get(path, {})) or is_generated_name(path):
+                generated.add(path)
+                continue
+            try:
+                with open(os.path.join(self.repo.working_dir, path), 'rb') as f:
+                    head = f.read(GENERATED_SNIFF_BYTES)
+            except (OSError, TypeError):
+                # Deleted files have no content to look at
+                continue
+            if looks_generated(path, head.decode('utf-8', errors='replace')):
+                generated.add(path)
+        return generated
+
+    def _attributes_state(self, snapshot):
+        """What decides attributes besides HEAD: uncommitted .gitattributes files and info/attributes."""
+        state = [self._diff_cache_key(e.path, e) for e in snapshot.entries
+                 if os.path.basename(e.path) == '.gitattributes']
+        try:
+            st = os.stat(os.path.join(self.repo.git_dir, 'info', 'attributes'))
+            state.append((st.st_size, st.st_mtime_ns))
+        except (OSError, TypeError):
             pass
+        return tuple(state)
+
+    @staticmethod
+    def _move_candidates(files, snapshot):
+        """
+        The requested files that rename detection may pair with each other:
+        new (untracked or added) and deleted ones, if both kinds are present.
+        """
+        added, deleted = [], []
+        for f in files:
+            entry = snapshot.get(f)
+            if entry is None:
+                continue
+            if entry.is_untracked or entry.head_oid is None:
+                added.append(f)
+            elif 'D' in (entry.index_status, entry.worktree_status):
+                deleted.append(f)
+        return set(added + deleted) if added and deleted else set()
+
+    def _untracked_moves(self, candidates, snapshot):
+        """
+        Pairs deleted files with untracked ones holding the same or similar
+        content (see move_detection.find_moves). Returns {new path: Move}
+        for the pairs with both paths among the candidates. The pairing is
+        made once per snapshot, over all of its files, so the numstat and
+        the diffs of one Generate click read the untracked files once.
+        """
+        if not candidates:
+            return {}
+        cached = self._moves
+        if cached is None or cached[0] is not snapshot:
+            cached = self._moves = (snapshot, self._find_moves(snapshot), {})
+        return {path: move for path, move in cached[1].items() if path in candidates and move.old_path in candidates}
+
+    def _find_moves(self, snapshot):
+        deleted, added = {}, {}
+        for f in self._move_candidates([e.path for e in snapshot.entries], snapshot):
+            entry = snapshot.get(f)
+            if entry.is_untracked:
+                added[f] = os.path.join(self.repo.working_dir, f)
+            elif entry.head_oid is not None:
+                deleted[f] = entry.head_oid
+        if not deleted or not added:
+            return {}
+        return find_moves(deleted, added, self.read_blob)
+
+    def _move_sections(self, moves):
+        """{path: diff} for both paths of each move; the source of a move git paired has no section of its own."""
+        if not moves:
+            return {}
+        sections = {section.path: section.text.rstrip('\n')
+                    for section in iter_diff_sections(self._move_diff(moves)) if section.path is not None}
+        return {path: sections.get(path, "") for move in moves.values() for path in (move.new_path, move.old_path)}
 
-        # 1. Get standard diff for tracked files
-        if tracked_files or not files:
+    def _move_diff(self, moves, *options):
+        """
+        Diffs untracked moves with git itself, so filters, textconv and
+        -diff apply as to any other file: the new paths are added to a
+        throwaway index and compared with HEAD, where rename detection
+        pairs them with their deleted sources. Made once per snapshot for
+        the same moves and options.
+        """
+        diffs = self._moves[2]
+        key = (frozenset(moves), options)
+        if key not in diffs:
+            output = self._run_move_diff(moves, *options)
+            if output is None:
+                return ""
+            diffs[key] = output
+        return diffs[key]
+
+    def _run_move_diff(self, moves, *options):
+        pathspec = [*moves, *(move.old_path for move in moves.values())]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            env = {'GIT_INDEX_FILE': os.path.join(temp_dir, 'index'), 'GIT_LITERAL_PATHSPECS': '1'}
             try:
-                args = ['HEAD']
-                if tracked_files:
-                    args.extend(['--', *tracked_files])
-                
-                # Check if this is an initial commit scenario (HEAD invalid)
-                try:
-                    std_diff = self.repo.git.diff(*args)
-                    if std_diff: diff_output.append(std_diff)
-                except git.exc.GitCommandError:
-                     # Initial commit, try cached
-                     args = []
-                     if tracked_files:
-                         args.extend(['--', *tracked_files])
-                     std_diff = self.repo.git.diff(cached=True, *args)
-                     if std_diff: diff_output.append(std_diff)
+                self._run_git(['add', '--', *moves], env=env)
+                output = self._run_git(['diff', '--cached', 'HEAD', *RENAME_OPTIONS, *options, '--', *pathspec],
+                                       optional_locks=False, env=env)
             except Exception as e:
-                print(f"Error getting standard diff: {e}")
+                print(f"Error diffing moved files: {e}")
+                return None
+        return output.decode('utf-8', errors='replace')
+
+    def _diff_cache_key(self, path, entry):
+        """
+        Content address for a file's diff: HEAD blob id, index blob id and
+        the worktree stat signature (size, mtime_ns, inode, mode).
+        """
+        try:
+            st = os.stat(os.path.join(self.repo.working_dir, path))
+            worktree = (st.st_size, st.st_mtime_ns, st.st_ino, st.st_mode)
+        except OSError:
+            worktree = None
+        return (path, entry.head_oid, entry.index_oid, worktree)
+
+    @staticmethod
+    def _is_racy(key, started_ns):
+        """
+        A file modified within the timestamp granularity of the diff run may
+        change again without its stat signature changing; don't cache it.
+        """
+        worktree = key[3]
+        return worktree is not None and worktree[1] >= started_ns - _RACY_WINDOW_NS
+
+    def get_numstat(self, files):
+        """
+        Returns {path: DiffStat} for the given files without reading any diff
+        bodies: one `git diff --numstat -z` call for tracked files, and a
+        local line count for untracked ones. Used to plan the token budget;
+        generated and vendored files are flagged so they are planned as stubs.
+        """
+        if not self.repo:
+            raise ValueError("Repository not initialized")
+
+        stats = self._numstat(files, self.get_status_snapshot())
+        for path in self.get_generated(list(stats)):
+            stats[path] = replace(stats[path], is_generated=True)
+        return stats
+
+    def _numstat(self, files, snapshot):
+        moves = self._untracked_moves(self._move_candidates(files, snapshot), snapshot)
+        moved_from = {move.old_path for move in moves.values()}
+        tracked_files = [f for f in files if f in snapshot and not snapshot.get(f).is_untracked and f not in moved_from]
+        if tracked_files:
+            pathspec = snapshot.diff_pathspec(tracked_files)
+            numstat = parse_numstat(self._tracked_diff(pathspec, '--numstat', '-z'))
+        else:
+            numstat = {}
+        if moves:
+            numstat.update(parse_numstat(self._move_diff(moves, '--numstat', '-z')))
+
+        stats = {}
+        for f in files:
+            entry = snapshot.get(f)
+            if entry is None:
+                continue
+            if f in numstat:
+                stat = replace(numstat[f], size=self._file_size(f, entry))
+            elif entry.is_untracked:
+                stat = self._untracked_stat(f)
+            else:
+                continue
+            if stat is not None:
+                stats[f] = stat
+        requested = set(files)
+        for stat in list(stats.values()):
+            if stat.orig_path in requested and stat.orig_path not in stats:
+                # The source of a rename is part of it; keep it in the plan with nothing to show
+                stats[stat.orig_path] = DiffStat(path=stat.orig_path, added=0, deleted=0)
+        return stats
+
+    def get_diff_excerpts(self, files, max_chars):
+        """
+        Returns {path: diff} where each diff is cut to at most max_chars at a
+        line boundary. Uncached tracked diffs are streamed from one `git diff`
+        process and discarded past the limit instead of being held in memory.
+        Untracked moves are shown as renames, as in get_diff_map.
+        """
+        if not self.repo:
+            raise ValueError("Repository not initialized")
+
+        snapshot = self.get_status_snapshot()
+        moved = self._move_sections(self._untracked_moves(self._move_candidates(files, snapshot), snapshot))
+        excerpts = {}
+        to_stream = []
+        for f in files:
+            entry = snapshot.get(f)
+            if entry is None:
+                excerpts[f] = ""
+                continue
+            if f in moved:
+                excerpts[f] = _clip(moved[f], max_chars)
+                continue
+            cached = self.diff_cache.get(self._diff_cache_key(f, entry))
+            if cached is not None:
+                excerpts[f] = _clip(cached, max_chars)
+            elif entry.is_untracked:
+                excerpts[f] = _clip(self._untracked_diff(f) or "", max_chars)
+            else:
+                to_stream.append(f)
+
+        if to_stream:
+            base = ['HEAD'] if snapshot.head_oid else ['--cached']
+            pathspec = snapshot.diff_pathspec(to_stream)
+            streamed = self._stream_diff_heads([*base, *RENAME_OPTIONS, '--', *pathspec], max_chars)
+            for f in to_stream:
+                excerpts[f] = streamed.get(f, "")
+
+        return {f: excerpts[f] for f in files}
 
-        # 2. Generate pseudo-diff for untracked files
-        # os is imported at top level now
-        for f_path in untracked_files:
+    def _planned_diff(self, plan):
+        """Assembles a diff from a budget plan: full bodies, excerpts, then stats-only stubs."""
+        parts = []
+        full = self.get_diff_map(plan.full_files) if plan.full_files else {}
+        parts.extend(full[f] for f in plan.full_files if full[f])
+        if plan.summary_files:
+            excerpts = self.get_diff_excerpts(plan.summary_files, plan.excerpt_chars)
+            parts.extend(excerpts[f] for f in plan.summary_files if excerpts[f])
+        parts.extend(format_stats_stub(stat) for stat in plan.stats_files)
+        return "\n".join(parts)
+
+    def _stream_diff_heads(self, args, max_chars):
+        """Reads `git diff` output line by line, keeping at most max_chars per file."""
+        heads = {}
+        sizes = {}
+        current = None
+        proc = self.repo.git.diff(*args, as_process=True)
+        try:
+            for raw in proc.stdout:
+                line = raw.decode('utf-8', errors='replace').rstrip('\n')
+                if line.startswith("diff --git "):
+                    a_path, b_path = parse_diff_git_line(line)
+                    current = b_path or a_path
+                    heads[current] = [line]
+                    sizes[current] = len(line)
+                    continue
+                if current is None or sizes[current] > max_chars:
+                    continue
+                sizes[current] += len(line) + 1
+                if sizes[current] > max_chars:
+                    heads[current].append(EXCERPT_MARKER)
+                else:
+                    heads[current].append(line)
+        finally:
+            proc.wait()
+        return {path: "\n".join(lines) for path, lines in heads.items()}
+
+    def _untracked_stat(self, f_path):
+        try:
+            return self.untracked_reader.diff_stat(os.path.join(self.repo.working_dir, f_path), f_path)
+        except OSError:
+            return None
+
+    def _file_size(self, path, entry):
+        try:
+            return os.path.getsize(os.path.join(self.repo.working_dir, path))
+        except OSError:
+            pass
+        try:
+            return self.get_blob_size(entry.head_oid) if entry.head_oid else 0
+        except Exception:
+            return 0
+
+    def _tracked_diff(self, tracked_files, *options):
+        """Runs one `git diff HEAD` for the given tracked files (or everything if empty)."""
+        try:
+            args = ['HEAD', *RENAME_OPTIONS, *options]
+            if tracked_files:
+                args.extend(['--', *tracked_files])
+
+            # Check if this is an initial commit scenario (HEAD invalid)
             try:
-                full_path = os.path.join(self.repo.working_dir, f_path)
-                if os.path.exists(full_path) and os.path.isfile(full_path):
-                    with open(full_path, 'r', encoding='utf-8', errors='replace') as f:
-                        content = f.readlines()
-                        
-                    # Format as git diff
-                    diff_output.append(f"diff --git a/{f_path} b/{f_path}")
-                    diff_output.append(f"new file mode 100644")
-                    diff_output.append(f"--- /dev/null")
-                    diff_output.append(f"+++ b/{f_path}")
-                    diff_output.append(f"@@ -0,0 +1,{len(content)} @@")
-                    for line in content:
-                        diff_output.append(f"+{line.rstrip()}")
-            except Exception as e:
-                print(f"Error reading untracked file {f_path}: {e}")
+                return self.repo.git.diff(*args)
+            except git.exc.GitCommandError:
+                # Initial commit, try cached
+                args = [*RENAME_OPTIONS, *options]
+                if tracked_files:
+                    args.extend(['--', *tracked_files])
+                return self.repo.git.diff(cached=True, *args)
+        except Exception as e:
+            print(f"Error getting standard diff: {e}")
+            return ""
 
-        return "\n".join(diff_output)
+    def _untracked_diff(self, f_path):
+        """Formats an untracked file as a git-style 'new file' diff (head/tail window only)."""
+        try:
+            full_path = os.path.join(self.repo.working_dir, f_path)
+            if not (os.path.exists(full_path) and os.path.isfile(full_path)):
+                return None
+            return self.untracked_reader.diff(full_path, f_path)
+        except Exception as e:
+            print(f"Error reading untracked file {f_path}: {e}")
+            return None
 
     def stage_all(self):
         if not self.repo:
              raise ValueError("Repository not initialized")
         self.repo.git.add('.')
+        self.invalidate_status()
 
     def commit_changes(self, message):
+        """
+        Commits the current index with plumbing (write-tree, commit-tree,
+        update-ref) so the index is never parsed in Python. Runs the same
+        pre-commit/commit-msg/post-commit hooks as `repo.index.commit`.
+        """
         if not self.repo:
              raise ValueError("Repository not initialized")
-        self.repo.index.commit(message)
+        # IndexFile is lazy; the hooks only need its path, not its entries
+        index = self.repo.index
+        run_commit_hook("pre-commit", index)
+        message = self._run_commit_msg_hook(index, message)
+
+        tree = self._run_git(['write-tree']).decode().strip()
+        parent = self._run_git(['rev-parse', '--verify', '-q', 'HEAD'], ok_codes=(0, 1)).decode().strip()
+        parent_args = ['-p', parent] if parent else []
+        commit = self._run_git(
+            ['commit-tree', tree, *parent_args],
+            input_bytes=message.encode('utf-8'),
+            env=self._identity_env(),
+        ).decode().strip()
+
+        subject = message.split('\n', 1)[0]
+        reflog = f"commit: {subject}" if parent else f"commit (initial): {subject}"
+        # The old value guards against HEAD moving underneath us; "" means it must not exist yet
+        self._run_git(['update-ref', '-m', reflog, 'HEAD', commit, parent])
+        self.invalidate_status()
+
+        run_commit_hook("post-commit", index)
+        return commit
+
+    def _run_commit_msg_hook(self, index, message):
+        msg_path = os.path.join(self.repo.git_dir, "COMMIT_EDITMSG")
+        with open(msg_path, "wb") as f:
+            f.write(message.encode('utf-8'))
+        run_commit_hook("commit-msg", index, msg_path)
+        with open(msg_path, "rb") as f:
+            return f.read().decode('utf-8')
+
+    def _identity_env(self):
+        """Author/committer resolved the way GitPython does (env vars, config, then user@host)."""
+        with self.repo.config_reader() as config:
+            author = Actor.author(config)
+            committer = Actor.committer(config)
+        return {
+            'GIT_AUTHOR_NAME': author.name, 'GIT_AUTHOR_EMAIL': author.email,
+            'GIT_COMMITTER_NAME': committer.name, 'GIT_COMMITTER_EMAIL': committer.email,
+        }
 
     def stage_files(self, files):
+        """Stages files by feeding the paths on stdin, so large selections can't exceed ARG_MAX."""
         if not self.repo:
              raise ValueError("Repository not initialized")
-        self.repo.git.add(files)
+        if not files:
+            return
+        self._run_git(
+            ['add', '--pathspec-from-file=-', '--pathspec-file-nul'],
+            input_bytes=b"\0".join(f.encode('utf-8') for f in files),
+            env={'GIT_LITERAL_PATHSPECS': '1'},
+        )
+        self.invalidate_status()
 
     def get_current_branch(self):
         if not self.repo:
              return "Unknown"
-        try:
-            return self.repo.active_branch.name
-        except TypeError:
-            return "Detached HEAD"
+        branch = self.get_status_snapshot().branch
+        return branch if branch is not None else "Detached HEAD"
 
     def push_changes(self, remote_name="origin"):
         if not self.repo:
@@ -123,6 +691,7 @@ class GitService:
         # Check if remote exists
         if remote_name in self.repo.remotes:
             self.repo.remotes[remote_name].push()
+            self.invalidate_status()
         else:
             raise ValueError(f"Remote '{remote_name}' not found")
 
@@ -131,6 +700,7 @@ class GitService:
              raise ValueError("Repository not initialized")
         if remote_name in self.repo.remotes:
             self.repo.remotes[remote_name].pull()
+            self.invalidate_status()
         else:
              raise ValueError(f"Remote '{remote_name}' not found")
 
@@ -138,27 +708,14 @@ class GitService:
         """Returns a list of changed files (staged + unstaged/untracked)"""
         if not self.repo:
             return []
-        
-        changed_files = set()
-        # Unstaged
-        changed_files.update([item.a_path for item in self.repo.index.diff(None)])
-        # Staged
-        changed_files.update([item.a_path for item in self.repo.index.diff("HEAD")])
-        # Untracked
-        changed_files.update(self.repo.untracked_files)
-        
-        return list(changed_files)
+        return self.get_status_snapshot().changed_files
 
     def get_staged_files(self):
         if not self.repo:
             return []
-        return [item.a_path for item in self.repo.index.diff("HEAD")]
+        return self.get_status_snapshot().staged_files
 
     def get_unstaged_files(self):
         if not self.repo:
             return []
-        unstaged = [item.a_path for item in self.repo.index.diff(None)]
-        unstaged.extend(self.repo.untracked_files)
-        return unstaged
-
-
+        return self.get_status_snapshot().unstaged_files
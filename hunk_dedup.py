@@ -0,0 +1,45 @@
+from typing import List, Tuple
+
+# Polynomial rolling hash over a hunk's lines, modulo a Mersenne prime
+_BASE = 1_000_003
+_MODULUS = (1 << 61) - 1
+
+SAME_HUNK_MARKER = "[SAME HUNK IN {count} MORE FILES]"
+
+def split_hunks(text: str) -> Tuple[str, List[str]]:
+    """Splits a file's diff into its headers and its hunks, each with its "@@" line."""
+    starts = [0] if text.startswith("@@ ") else []
+    pos = text.find("\n@@ ")
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = text.find("\n@@ ", pos + 1)
+    if not starts:
+        return text, []
+    ends = starts[1:] + [len(text)]
+    return text[:starts[0]], [text[start:end] for start, end in zip(starts, ends)]
+
+def hunk_fingerprint(hunk: str):
+    """
+    Identifies a hunk by what it changes: a rolling hash of its added and
+    removed lines with whitespace runs collapsed, so the same edit matches
+    at other line numbers, under other context lines or at another
+    indentation. Together with the number and length of those lines, to
+    make a collision between different edits practically impossible.
+    None for a hunk that changes nothing.
+    """
+    value = lines = length = 0
+    for line in hunk.splitlines()[1:]:
+        sign = line[:1]
+        if sign != "+" and sign != "-":
+            continue
+        normalized = sign + " ".join(line[1:].split())
+        value = (value * _BASE + hash(normalized)) % _MODULUS
+        lines += 1
+        length += len(normalized)
+    return (value, lines, length) if lines else None
+
+def same_hunk_note(paths: List[str], listed: int) -> str:
+    """The line that follows a hunk standing in for its copies in `paths`."""
+    shown = ", ".join(paths[:listed])
+    more = f" (+{len(paths) - listed} more)" if len(paths) > listed else ""
+    return f"{SAME_HUNK_MARKER.format(count=len(paths))} {shown}{more}\n"
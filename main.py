@@ -1,37 +1,95 @@
+import time
+_T0 = time.perf_counter()
+
+import argparse
+from startup import StartupTrace, ServiceWarmup
 from models.app_state import AppState
 from views.main_window import MainWindow
 from controllers.main_controller import MainController
-from git_service import GitService
-from ai_service import AIService
-import sys
 
-def main():
+def _create_git_service():
+    from git_service import GitService
+    return GitService()
+
+def _create_ai_service():
+    from ai_service import AIService
+    return AIService()
+
+def _create_async_git_service():
+    from async_git_service import AsyncGitService
+    return AsyncGitService()
+
+def _create_async_bridge(app):
+    from async_bridge import AsyncBridge
+    return AsyncBridge(dispatch=lambda callback: app.after(0, callback))
+
+def _repo_watcher_factory(*args, **kwargs):
+    from repo_watcher import RepoWatcher
+    return RepoWatcher(*args, **kwargs)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="AI Auto-Committer")
+    parser.add_argument("--startup-trace", action="store_true", help="Print a startup timeline.")
+    parser.add_argument("--exit-after-startup", action="store_true", help="Quit once services are ready (for benchmarks).")
+    parser.add_argument("--no-watch", action="store_true",
+                        help="Don't watch the working tree; refresh the file list only on open, commit and pull.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    trace = StartupTrace(enabled=args.startup_trace, t0=_T0)
+    trace.mark("gui modules imported")
     print("Starting AI Auto-Committer (MVC)...")
-    
-    # Initialize Services
-    try:
-        git_service = GitService()
-        ai_service = AIService()
-    except Exception as e:
-        print(f"Error initializing services: {e}")
-        sys.exit(1)
-        
+
     # Initialize Model
     app_state = AppState()
-    
+
     # Initialize View
     # Note: MainWindow init doesn't require arguments now
     app = MainWindow()
-    
+    trace.mark("window built")
+
+    # Services (GitPython, openai, tiktoken, config) are built in the
+    # background once the window is on screen; the controller holds
+    # stand-ins that block only if used before they are ready.
+    warmup = ServiceWarmup(trace)
+    git_service = warmup.add("GitService", _create_git_service)
+    ai_service = warmup.add("AIService", _create_ai_service)
+    # Load the BPE file now so the first Generate click doesn't pay for it
+    warmup.add("Tokenizer", lambda: ai_service.preload_tokenizer().join())
+    async_git = warmup.add("AsyncGitService", _create_async_git_service)
+    bridge = warmup.add("AsyncBridge", lambda: _create_async_bridge(app))
+
     # Initialize Controller
     # Controller binds itself to the view events
-    controller = MainController(app_state, app, git_service, ai_service)
-    
+    watcher_factory = None if args.no_watch else _repo_watcher_factory
+    controller = MainController(app_state, app, git_service, ai_service, watcher_factory=watcher_factory,
+                                async_git=async_git, bridge=bridge)
+
+    def _on_service_error(name, error):
+        app.after(0, lambda: app.show_error("Startup Error", f"Error initializing {name}: {error}"))
+
+    def _on_services_ready():
+        trace.mark("services ready")
+        if args.exit_after_startup:
+            app.after(0, app.destroy)
+        else:
+            app.after(0, lambda: app.set_status("Ready"))
+
+    def _on_first_paint():
+        # Idle callbacks run after Tk's own pending redraws
+        trace.mark("first paint")
+        warmup.start(on_error=_on_service_error, on_done=_on_services_ready)
+        app.set_status("Loading services...")
+
+    app.after_idle(_on_first_paint)
+
     # Start (load initial state, etc)
     controller.start()
-    
+
     # Start Event Loop
     app.mainloop()
+    controller.shutdown()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
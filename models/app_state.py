@@ -90,3 +90,15 @@ class AppState:
         if not isinstance(value, bool):
             raise TypeError("truncation_warning must be a boolean")
         self._truncation_warning = value
+
+    def apply_file_changes(self, added: List[str], removed: List[str]):
+        """
+        Updates changed_files in place for a watcher delta. Added files are
+        selected by default, as after a full refresh.
+        """
+        removed_set = set(removed)
+        current = set(self._changed_files)
+        self._changed_files = [f for f in self._changed_files if f not in removed_set]
+        self._changed_files.extend(f for f in added if f not in current)
+        self._selected_files -= removed_set
+        self._selected_files.update(added)
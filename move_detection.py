@@ -0,0 +1,123 @@
+import hashlib
+import os
+from collections import Counter
+from dataclasses import dataclass
+from blob_utils import is_binary
+
+# `git diff` options that detect renames and copies, so a moved file costs
+# a header instead of its content twice
+RENAME_OPTIONS = ('-M', '-C')
+
+# git's default -M threshold: pairs less similar than this stay a delete and an add
+RENAME_THRESHOLD = 50
+# Content comparisons allowed for inexact pairing (git's diff.renameLimit plays the same role)
+MAX_RENAME_PAIRS = 1000
+# Larger files are only paired when identical
+MAX_SIMILARITY_BYTES = 256 * 1024
+# Larger untracked files are not read to look for a move at all
+MAX_HASH_BYTES = 64 * 1024 * 1024
+# Files too large to compare are hashed this much at a time
+HASH_BLOCK_BYTES = 1024 * 1024
+
+@dataclass(frozen=True)
+class Move:
+    """A deleted tracked file that reappeared, possibly edited, as an untracked one."""
+    old_path: str
+    new_path: str
+    score: int          # similarity in percent, 100 for identical content
+    size: int           # bytes of the untracked file
+
+def _lines(content: bytes) -> Counter:
+    return Counter(content.replace(b"\r\n", b"\n").splitlines(keepends=True))
+
+def _score(old: Counter, new: Counter, old_size: int, new_size: int) -> int:
+    # Share of the larger file made of lines both have, like git's byte-based index
+    common = sum(len(line) * count for line, count in (old & new).items())
+    largest = max(old_size, new_size)
+    return common * 100 // largest if largest else 100
+
+def similarity(old: bytes, new: bytes) -> int:
+    """git-style similarity index of two contents, in percent, by shared lines."""
+    return _score(_lines(old), _lines(new), len(old), len(new))
+
+def _hash_file(full_path: str):
+    """
+    A file's git blob id and size, read in blocks, with its content if it
+    is small enough to be compared line-wise. None above MAX_HASH_BYTES.
+    """
+    with open(full_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size > MAX_HASH_BYTES:
+            return None
+        digest = hashlib.sha1(b"blob %d\0" % size)
+        if size <= MAX_SIMILARITY_BYTES:
+            content = f.read()
+            digest.update(content)
+            return digest.hexdigest(), size, content
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+        return digest.hexdigest(), size, None
+
+def find_moves(deleted: dict, added: dict, read_blob, threshold: int = RENAME_THRESHOLD) -> dict:
+    """
+    Pairs deleted tracked files with untracked files holding the same or
+    similar content, which `git diff -M` can't do because untracked files
+    aren't in the index. `deleted` maps path -> HEAD blob id,
+    `added` maps path -> full worktree path, and `read_blob(oid)` returns
+    a blob's content. Identical files are matched by blob id without
+    reading any blob; the rest are compared line-wise, best scores first,
+    unless that would take more than MAX_RENAME_PAIRS comparisons.
+    Returns {new path: Move}.
+    """
+    by_oid = {}
+    for path, oid in deleted.items():
+        by_oid.setdefault(oid, []).append(path)
+
+    moves = {}
+    contents = {}
+    for new_path, full_path in added.items():
+        try:
+            hashed = _hash_file(full_path)
+        except OSError:
+            continue
+        if hashed is None:
+            continue
+        oid, size, content = hashed
+        if by_oid.get(oid):
+            old_path = by_oid[oid].pop()
+            moves[new_path] = Move(old_path, new_path, 100, size)
+        elif content is not None and not is_binary(content):
+            contents[new_path] = content
+
+    sources = [path for paths in by_oid.values() for path in paths]
+    if not contents or not sources or len(contents) * len(sources) > MAX_RENAME_PAIRS:
+        return moves
+
+    blobs = {}
+    for old_path in sources:
+        try:
+            data = read_blob(deleted[old_path])
+        except Exception:
+            continue
+        if len(data) <= MAX_SIMILARITY_BYTES and not is_binary(data):
+            blobs[old_path] = (len(data), _lines(data))
+
+    scored = []
+    for new_path, content in contents.items():
+        new_lines = _lines(content)
+        for old_path, (old_size, old_lines) in blobs.items():
+            smaller, larger = sorted((old_size, len(content)))
+            # Too different in size to reach the threshold
+            if smaller * 100 < larger * threshold:
+                continue
+            score = _score(old_lines, new_lines, old_size, len(content))
+            if score >= threshold:
+                scored.append((score, new_path, old_path))
+
+    taken = set()
+    for score, new_path, old_path in sorted(scored, key=lambda item: -item[0]):
+        if new_path in moves or old_path in taken:
+            continue
+        taken.add(old_path)
+        moves[new_path] = Move(old_path, new_path, score, len(contents[new_path]))
+    return moves
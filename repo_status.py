@@ -0,0 +1,172 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Optional, Tuple
+
+@dataclass(frozen=True)
+class StatusEntry:
+    """One path from `git status --porcelain=v2`."""
+    path: str
+    index_status: str        # X column: '.', 'M', 'A', 'D', 'R', 'C', 'U' or '?' for untracked
+    worktree_status: str     # Y column
+    head_oid: Optional[str] = None
+    index_oid: Optional[str] = None
+    head_mode: Optional[str] = None
+    index_mode: Optional[str] = None
+    worktree_mode: Optional[str] = None
+    orig_path: Optional[str] = None
+
+    @property
+    def is_untracked(self) -> bool:
+        return self.index_status == '?'
+
+    @property
+    def is_staged(self) -> bool:
+        return self.index_status not in ('.', '?')
+
+    @property
+    def is_unstaged(self) -> bool:
+        return self.is_untracked or self.worktree_status != '.'
+
+    @property
+    def is_renamed(self) -> bool:
+        return self.orig_path is not None
+
+@dataclass(frozen=True)
+class RepoStatusSnapshot:
+    """
+    Immutable view of the repository state taken from a single
+    `git status --porcelain=v2 -z --branch` call.
+    """
+    entries: Tuple[StatusEntry, ...] = ()
+    branch: Optional[str] = None      # None when HEAD is detached
+    head_oid: Optional[str] = None    # None when HEAD is unborn
+    upstream: Optional[str] = None
+    ahead: int = 0
+    behind: int = 0
+    _by_path: MappingProxyType = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, '_by_path', MappingProxyType({e.path: e for e in self.entries}))
+
+    def get(self, path: str) -> Optional[StatusEntry]:
+        return self._by_path.get(path)
+
+    def __contains__(self, path) -> bool:
+        return path in self._by_path
+
+    @property
+    def changed_files(self) -> list:
+        return [e.path for e in self.entries]
+
+    @property
+    def staged_files(self) -> list:
+        return [e.path for e in self.entries if e.is_staged]
+
+    @property
+    def unstaged_files(self) -> list:
+        """Tracked files with worktree changes, followed by untracked files."""
+        tracked = [e.path for e in self.entries if not e.is_untracked and e.worktree_status != '.']
+        return tracked + self.untracked_files
+
+    @property
+    def untracked_files(self) -> list:
+        return [e.path for e in self.entries if e.is_untracked]
+
+    @property
+    def renamed_files(self) -> dict:
+        """Maps new path -> original path for staged renames and copies."""
+        return {e.path: e.orig_path for e in self.entries if e.is_renamed}
+
+    @property
+    def is_detached(self) -> bool:
+        return self.branch is None
+
+    def diff_pathspec(self, files) -> list:
+        """
+        The pathspec for diffing files: git only reports a rename when both
+        of its paths are in it, so the sources of staged renames are added.
+        """
+        sources = [self.get(f).orig_path for f in files if f in self and self.get(f).is_renamed]
+        return list(dict.fromkeys([*files, *sources]))
+
+    def with_paths(self, paths, partial: "RepoStatusSnapshot") -> "RepoStatusSnapshot":
+        """
+        Returns a new snapshot where the entries at (or under) `paths` are
+        replaced by those of `partial`, a status limited to the same paths.
+        Branch and tracking info is taken from `partial`.
+        """
+        prefixes = tuple(p.rstrip('/') + '/' for p in paths)
+        touched = set(paths)
+        kept = [e for e in self.entries if e.path not in touched and not e.path.startswith(prefixes)]
+        merged = {e.path: e for e in kept}
+        merged.update((e.path, e) for e in partial.entries)
+        return RepoStatusSnapshot(
+            entries=tuple(sorted(merged.values(), key=lambda e: (e.is_untracked, e.path))),
+            branch=partial.branch, head_oid=partial.head_oid,
+            upstream=partial.upstream, ahead=partial.ahead, behind=partial.behind,
+        )
+
+def parse_porcelain_v2(output: str) -> RepoStatusSnapshot:
+    """Parses NUL-separated `git status --porcelain=v2 -z --branch` output."""
+    entries = []
+    branch = head_oid = upstream = None
+    ahead = behind = 0
+
+    records = output.split('\0')
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if not record:
+            continue
+
+        kind = record[0]
+        if kind == '#':
+            key, _, value = record[2:].partition(' ')
+            if key == 'branch.oid':
+                head_oid = None if value == '(initial)' else value
+            elif key == 'branch.head':
+                branch = None if value == '(detached)' else value
+            elif key == 'branch.upstream':
+                upstream = value
+            elif key == 'branch.ab':
+                a, _, b = value.partition(' ')
+                ahead, behind = int(a.lstrip('+')), int(b.lstrip('-'))
+        elif kind == '1':
+            # 1 XY sub mH mI mW hH hI path
+            parts = record.split(' ', 8)
+            entries.append(StatusEntry(
+                path=parts[8], index_status=parts[1][0], worktree_status=parts[1][1],
+                head_mode=parts[3], index_mode=parts[4], worktree_mode=parts[5],
+                head_oid=_oid(parts[6]), index_oid=_oid(parts[7]),
+            ))
+        elif kind == '2':
+            # 2 XY sub mH mI mW hH hI Xscore path, followed by origPath as its own record
+            parts = record.split(' ', 9)
+            orig_path = records[i] if i < len(records) else None
+            i += 1
+            entries.append(StatusEntry(
+                path=parts[9], index_status=parts[1][0], worktree_status=parts[1][1],
+                head_mode=parts[3], index_mode=parts[4], worktree_mode=parts[5],
+                head_oid=_oid(parts[6]), index_oid=_oid(parts[7]),
+                orig_path=orig_path,
+            ))
+        elif kind == 'u':
+            # u XY sub m1 m2 m3 mW h1 h2 h3 path; stage 2 ("ours") matches HEAD
+            parts = record.split(' ', 10)
+            entries.append(StatusEntry(
+                path=parts[10], index_status=parts[1][0], worktree_status=parts[1][1],
+                head_mode=parts[4], worktree_mode=parts[6], head_oid=_oid(parts[8]),
+            ))
+        elif kind == '?':
+            entries.append(StatusEntry(path=record[2:], index_status='?', worktree_status='?'))
+        # '!' (ignored) records are not requested and are skipped
+
+    return RepoStatusSnapshot(
+        entries=tuple(entries), branch=branch, head_oid=head_oid,
+        upstream=upstream, ahead=ahead, behind=behind,
+    )
+
+def _oid(value: str) -> Optional[str]:
+    """Returns None for the all-zero object id git uses for 'no object'."""
+    return None if not value or value.strip('0') == '' else value
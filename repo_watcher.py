@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog is optional; fall back to polling
+    FileSystemEventHandler = object
+    Observer = None
+
+# Files under .git whose changes mean the index, HEAD or refs moved
+# (commit, checkout, stage from another tool). Everything else in .git,
+# notably .git/objects, is ignored.
+_GIT_STATE_FILES = ("index", "HEAD", "ORIG_HEAD", "MERGE_HEAD", "packed-refs")
+
+class RepoWatcher:
+    """
+    Watches a working tree and reports debounced batches of touched paths.
+
+    Uses inotify/FSEvents/ReadDirectoryChangesW through watchdog when it is
+    installed, otherwise a polling fallback. on_change(paths, git_changed)
+    is called from a background thread with repo-relative paths; git_changed
+    is True when the index, HEAD or refs changed. is_ignored(paths) may be
+    given to drop paths excluded by .gitignore before they are reported.
+    """
+    def __init__(self, root, on_change, is_ignored=None, debounce=0.05, max_delay=0.15,
+                 poll_interval=1.0, use_polling=None):
+        self.root = os.path.abspath(root)
+        self.on_change = on_change
+        self.is_ignored = is_ignored
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.use_polling = Observer is None if use_polling is None else use_polling
+
+        self._git_dir = os.path.join(self.root, ".git")
+        self._pending = set()
+        self._git_changed = False
+        self._first_event = None
+        self._timer = None
+        self._lock = threading.Lock()
+        self._observer = None
+        self._poll_thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._stop.clear()
+        if self.use_polling:
+            self._poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
+            self._poll_thread.start()
+        else:
+            self._observer = Observer()
+            self._observer.schedule(_EventHandler(self), self.root, recursive=True)
+            self._observer.daemon = True
+            self._observer.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._observer:
+            self._observer.stop()
+            self._observer.join(timeout=1)
+            self._observer = None
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            self._pending.clear()
+            self._git_changed = False
+
+    def record(self, abs_path):
+        """Queues one touched path; flushes after `debounce` seconds of quiet."""
+        abs_path = os.path.abspath(abs_path)
+        if abs_path == self._git_dir or abs_path.startswith(self._git_dir + os.sep):
+            rel_git = os.path.relpath(abs_path, self._git_dir).replace(os.sep, "/")
+            if rel_git in _GIT_STATE_FILES or rel_git.startswith("refs/"):
+                self._schedule(git_changed=True)
+            return
+        rel_path = os.path.relpath(abs_path, self.root).replace(os.sep, "/")
+        if rel_path.startswith(".."):
+            return
+        self._schedule(path=rel_path)
+
+    def _schedule(self, path=None, git_changed=False):
+        with self._lock:
+            if self._stop.is_set():
+                return
+            if path is not None:
+                self._pending.add(path)
+            self._git_changed = self._git_changed or git_changed
+
+            now = time.monotonic()
+            if self._first_event is None:
+                self._first_event = now
+            # Restart the quiet-period timer, but never hold a burst past max_delay
+            delay = min(self.debounce, max(0.0, self._first_event + self.max_delay - now))
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(delay, self._flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush(self):
+        with self._lock:
+            paths, git_changed = self._pending, self._git_changed
+            self._pending, self._git_changed = set(), False
+            self._first_event = None
+            self._timer = None
+        if paths and self.is_ignored:
+            try:
+                paths -= self.is_ignored(paths)
+            except Exception as e:
+                print(f"Error checking ignored paths: {e}")
+        if paths or git_changed:
+            try:
+                self.on_change(paths, git_changed)
+            except Exception as e:
+                print(f"Error handling file changes: {e}")
+
+    def _poll_loop(self):
+        previous = self._scan()
+        while not self._stop.wait(self.poll_interval):
+            current = self._scan()
+            for path in previous.keys() ^ current.keys():
+                self.record(path)
+            for path, signature in current.items():
+                if path in previous and previous[path] != signature:
+                    self.record(path)
+            previous = current
+
+    def _scan(self):
+        """
+        Stat signatures of the worktree files plus the git state files. The
+        tree is walked a level at a time so that directories excluded by
+        .gitignore (node_modules, build output) are checked in one
+        is_ignored call per level and never entered.
+        """
+        signatures = {}
+        for name in _GIT_STATE_FILES:
+            path = os.path.join(self._git_dir, name)
+            try:
+                st = os.stat(path)
+                signatures[path] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                pass
+        level = [self.root]
+        while level:
+            subdirs = []
+            for dirpath in level:
+                try:
+                    entries = list(os.scandir(dirpath))
+                except OSError:
+                    continue
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.path != self._git_dir:
+                                subdirs.append(entry.path)
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    signatures[entry.path] = (st.st_size, st.st_mtime_ns)
+            level = self._unignored_dirs(subdirs)
+        return signatures
+
+    def _unignored_dirs(self, dirs):
+        if not dirs or not self.is_ignored:
+            return dirs
+        # A trailing slash lets directory-only patterns ("build/") match
+        rel_paths = {os.path.relpath(d, self.root).replace(os.sep, "/") + "/": d for d in dirs}
+        try:
+            ignored = self.is_ignored(list(rel_paths))
+        except Exception as e:
+            print(f"Error checking ignored paths: {e}")
+            return dirs
+        return [d for rel_path, d in rel_paths.items() if rel_path not in ignored]
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        if event.is_directory and event.event_type == "modified":
+            return
+        self.watcher.record(event.src_path)
+        dest = getattr(event, "dest_path", "")
+        if dest:
+            self.watcher.record(dest)
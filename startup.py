@@ -0,0 +1,112 @@
+import threading
+import time
+
+class StartupTrace:
+    """Records a timeline of startup milestones, printed with --startup-trace."""
+    def __init__(self, enabled=False, t0=None):
+        self.enabled = enabled
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.marks = []
+        self._lock = threading.Lock()
+
+    def mark(self, label):
+        elapsed_ms = (time.perf_counter() - self.t0) * 1000
+        with self._lock:
+            self.marks.append((label, elapsed_ms))
+        if self.enabled:
+            print(f"[startup] {elapsed_ms:8.1f} ms  {label}")
+
+    def elapsed(self, label):
+        for name, elapsed_ms in self.marks:
+            if name == label:
+                return elapsed_ms
+        return None
+
+class DeferredService:
+    """
+    Stand-in for a service that is still being constructed on the warm-up
+    thread. Attribute access blocks until it is ready (or re-raises the
+    error its construction failed with), so callers can hold it from the
+    start without caring when the real object arrives. Attributes set
+    before then are kept and set on the service once it is built.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._ready = threading.Event()
+        self._instance = None
+        self._error = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, instance):
+        with self._lock:
+            for attr, value in self._pending.items():
+                setattr(instance, attr, value)
+            self._pending.clear()
+            self._instance = instance
+            self._ready.set()
+
+    def fail(self, error):
+        self._error = error
+        self._ready.set()
+
+    @property
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def __getattr__(self, attr):
+        # Only called for attributes not found on the proxy itself
+        self._ready.wait()
+        if self._error is not None:
+            raise RuntimeError(f"{self._name} failed to start: {self._error}") from self._error
+        return getattr(self._instance, attr)
+
+    def __setattr__(self, attr, value):
+        if attr.startswith("_"):
+            object.__setattr__(self, attr, value)
+            return
+        with self._lock:
+            if not self._ready.is_set():
+                self._pending[attr] = value
+                return
+        # A service that failed to start has nothing to set
+        if self._error is None:
+            setattr(self._instance, attr, value)
+
+class ServiceWarmup:
+    """
+    Builds services on a background thread, in order, so heavy imports
+    (GitPython, openai, tiktoken) and config loading happen after the
+    window has been painted.
+    """
+    def __init__(self, trace=None):
+        self.trace = trace or StartupTrace()
+        self._jobs = []
+        self._thread = None
+
+    def add(self, name, factory):
+        """Registers factory() to build a service; returns its DeferredService."""
+        deferred = DeferredService(name)
+        self._jobs.append((name, factory, deferred))
+        return deferred
+
+    def start(self, on_error=None, on_done=None):
+        def _run():
+            for name, factory, deferred in self._jobs:
+                try:
+                    deferred.resolve(factory())
+                    self.trace.mark(f"{name} ready")
+                except Exception as e:
+                    print(f"Error initializing {name}: {e}")
+                    deferred.fail(e)
+                    if on_error:
+                        on_error(name, e)
+            if on_done:
+                on_done()
+
+        self._thread = threading.Thread(target=_run, daemon=True)
+        self._thread.start()
+
+    def join(self, timeout=None):
+        if self._thread:
+            self._thread.join(timeout)
@@ -0,0 +1,150 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# Overrides where the cache lives (tests, portable installs)
+CACHE_DIR_ENV = "AI_COMMITTER_CACHE_DIR"
+SUMMARY_CACHE_FILE = "summaries.sqlite3"
+
+def default_cache_dir() -> str:
+    override = os.getenv(CACHE_DIR_ENV)
+    if override:
+        return override
+    if sys.platform == "win32":
+        base = os.getenv("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ai_auto_committer")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used);
+"""
+
+class SummaryCache:
+    """
+    SQLite cache of per-file diff summaries, shared by the GUI and the CLI.
+
+    Keys hash (model, summarization prompt version, input text), so a
+    regenerate after an edit elsewhere finds every unchanged file's
+    summary. Entries expire `ttl` seconds after they were written; beyond
+    max_entries or max_bytes the least recently used are evicted. If the
+    database can't be opened the cache is simply disabled.
+    """
+    def __init__(self, path: str = None, max_entries: int = 20000, max_bytes: int = 32 * 1024 * 1024,
+                 ttl: float = 30 * 24 * 3600):
+        self.path = path or os.path.join(default_cache_dir(), SUMMARY_CACHE_FILE)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # Summaries are written from DiffProcessor's worker threads
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            # WAL lets the GUI and the CLI use the cache at the same time
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute("DELETE FROM summaries WHERE created < ?", (time.time() - self.ttl,))
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error opening summary cache {self.path}: {e}")
+            self.close()
+
+    @property
+    def enabled(self) -> bool:
+        return self._conn is not None
+
+    @staticmethod
+    def key(model: str, prompt_version, text: str) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (str(model), str(prompt_version), text):
+            digest.update(part.encode('utf-8', errors='surrogatepass'))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, model: str, prompt_version, text: str):
+        if self._conn is None:
+            return None
+        key = self.key(model, prompt_version, text)
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT summary FROM summaries WHERE key = ? AND created >= ?", (key, now - self.ttl)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                self._conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return row[0]
+        except sqlite3.Error as e:
+            print(f"Error reading summary cache: {e}")
+            return None
+
+    def put(self, model: str, prompt_version, text: str, summary: str):
+        size = len(summary.encode('utf-8', errors='surrogatepass'))
+        if self._conn is None or size > self.max_bytes:
+            return
+        key = self.key(model, prompt_version, text)
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO summaries (key, summary, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (key, summary, size, now, now),
+                )
+                self._evict()
+        except sqlite3.Error as e:
+            print(f"Error writing summary cache: {e}")
+
+    def _evict(self):
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM summaries").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk from least recently used until both bounds hold again
+        excess_count, excess_bytes, doomed = count - self.max_entries, total - self.max_bytes, []
+        for key, size in self._conn.execute("SELECT key, size FROM summaries ORDER BY last_used"):
+            if excess_count <= 0 and excess_bytes <= 0:
+                break
+            doomed.append((key,))
+            excess_count -= 1
+            excess_bytes -= size
+        self._conn.executemany("DELETE FROM summaries WHERE key = ?", doomed)
+
+    def clear(self) -> int:
+        """Deletes every cached summary; returns how many there were."""
+        if self._conn is None:
+            return 0
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM summaries").rowcount
+            self._conn.execute("VACUUM")
+            self.hits = 0
+            self.misses = 0
+            return removed
+
+    def stats(self) -> dict:
+        entries, total = 0, 0
+        if self._conn is not None:
+            with self._lock:
+                entries, total = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM summaries"
+                ).fetchone()
+        return {"path": self.path, "entries": entries, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
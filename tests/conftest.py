@@ -0,0 +1,7 @@
+import pytest
+from summary_cache import CACHE_DIR_ENV
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    # Keep AIService's on-disk summary cache out of the user's cache directory
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path / "cache"))
@@ -1,4 +1,3 @@
-import pytest
 from models.app_state import AppState
 
 def test_app_state_initialization():
@@ -43,3 +42,13 @@ def test_app_state_updates():
     # Update loading state
     state.is_loading = True
     assert state.is_loading is True
+
+def test_apply_file_changes():
+    state = AppState()
+    state.changed_files = ["a.py", "b.py"]
+    state.selected_files = {"a.py"}
+
+    state.apply_file_changes(added=["c.py"], removed=["a.py"])
+
+    assert state.changed_files == ["b.py", "c.py"]
+    assert state.selected_files == {"c.py"}
@@ -0,0 +1,163 @@
+import asyncio
+import concurrent.futures
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import pytest
+from git import Repo
+from async_bridge import AsyncBridge
+from async_git_service import AsyncGitService
+from git_service import GitService
+
+@pytest.fixture
+def temp_git_repo():
+    temp_dir = tempfile.mkdtemp()
+    # Earlier tests may leave the process in a deleted directory
+    os.chdir(temp_dir)
+    repo = Repo.init(temp_dir)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "Test User")
+        config.set_value("user", "email", "test@example.com")
+    with open(os.path.join(temp_dir, "tracked.py"), "w") as f:
+        f.write("x = 1\n")
+    repo.index.add(["tracked.py"])
+    repo.index.commit("Initial commit")
+    with open(os.path.join(temp_dir, "tracked.py"), "a") as f:
+        f.write("y = 2\n")
+    with open(os.path.join(temp_dir, "new.txt"), "w") as f:
+        f.write("hello\n")
+    yield temp_dir, repo
+    repo.close()
+    os.chdir(tempfile.gettempdir())
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+def test_push_to_remote(temp_git_repo, tmp_path):
+    temp_dir, repo = temp_git_repo
+    remote = Repo.init(str(tmp_path / "remote.git"), bare=True)
+    repo.create_remote("origin", remote.working_dir)
+    branch = repo.active_branch.name
+    with repo.config_writer() as config:
+        config.set_value(f'branch "{branch}"', "remote", "origin")
+        config.set_value(f'branch "{branch}"', "merge", f"refs/heads/{branch}")
+
+    async def scenario():
+        service = AsyncGitService()
+        assert await service.is_valid_repo(temp_dir)
+        await service.push_changes()
+
+    asyncio.run(scenario())
+    assert remote.commit(branch).hexsha == repo.head.commit.hexsha
+    remote.close()
+
+def test_concurrent_reads(temp_git_repo):
+    temp_dir, _ = temp_git_repo
+
+    async def scenario():
+        service = AsyncGitService()
+        assert await service.is_valid_repo(temp_dir)
+        return await asyncio.gather(
+            service.refresh_status(),
+            service.get_diff_map(["tracked.py", "new.txt"]),
+            service.get_numstat(["tracked.py", "new.txt"]),
+        )
+
+    snapshot, diff_map, stats = asyncio.run(scenario())
+    assert snapshot.changed_files == ["tracked.py", "new.txt"]
+    assert "+y = 2" in diff_map["tracked.py"]
+    assert "+hello" in diff_map["new.txt"]
+    assert (stats["tracked.py"].added, stats["tracked.py"].deleted) == (1, 0)
+    assert stats["new.txt"].added == 1
+
+def test_reads_match_git_service(temp_git_repo):
+    temp_dir, _ = temp_git_repo
+    files = ["tracked.py", "new.txt"]
+    service = GitService()
+    assert service.is_valid_repo(temp_dir)
+    expected = service.get_diff_map(files), service.get_numstat(files)
+    service.close()
+
+    async def scenario():
+        async_service = AsyncGitService()
+        assert await async_service.is_valid_repo(temp_dir)
+        return await async_service.get_diff_map(files), await async_service.get_numstat(files)
+
+    assert asyncio.run(scenario()) == expected
+
+def test_invalid_repo_and_missing_remote(temp_git_repo):
+    temp_dir, _ = temp_git_repo
+
+    async def scenario():
+        service = AsyncGitService()
+        assert not await service.is_valid_repo(tempfile.gettempdir())
+        assert await service.is_valid_repo(temp_dir)
+        with pytest.raises(ValueError):
+            await service.push_changes()
+
+    asyncio.run(scenario())
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses a shell script as the git executable")
+def test_repo_switch_kills_running_git(tmp_path):
+    fake_git = tmp_path / "slow-git"
+    pid_file = tmp_path / "pid"
+    fake_git.write_text(f"#!/bin/sh\necho $$ > {pid_file}\nexec sleep 30\n")
+    fake_git.chmod(0o755)
+
+    async def scenario():
+        service = AsyncGitService(git_executable=str(fake_git))
+        opening = asyncio.create_task(service.is_valid_repo(str(tmp_path)))
+        while not pid_file.exists() or not pid_file.read_text().strip():
+            await asyncio.sleep(0.01)
+        # Switching repos cancels the call still running for the old one
+        switching = asyncio.create_task(service.is_valid_repo(str(tmp_path / "other")))
+        with pytest.raises(asyncio.CancelledError):
+            await opening
+        await switching
+        return int(pid_file.read_text())
+
+    pid = asyncio.run(asyncio.wait_for(scenario(), timeout=10))
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
+
+def test_bridge_dispatches_results_and_errors():
+    dispatched = []
+    bridge = AsyncBridge(dispatch=lambda callback: (dispatched.append(threading.current_thread()), callback()))
+    results, errors = [], []
+    done = threading.Event()
+
+    async def ok():
+        return 42
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    try:
+        bridge.submit(ok(), on_done=results.append).result(timeout=5)
+        bridge.submit(fail(), on_error=lambda e: (errors.append(str(e)), done.set()))
+        assert done.wait(5)
+    finally:
+        bridge.stop()
+
+    assert results == [42]
+    assert errors == ["boom"]
+    assert len(dispatched) == 2
+
+def test_bridge_reports_cancelled_tasks():
+    bridge = AsyncBridge()
+    errors = []
+    started, done = threading.Event(), threading.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(30)
+
+    try:
+        future = bridge.submit(slow(), on_done=lambda _: done.set(), on_error=lambda e: (errors.append(e), done.set()))
+        assert started.wait(5)
+        future.cancel()
+        assert done.wait(5)
+    finally:
+        bridge.stop()
+
+    assert len(errors) == 1 and isinstance(errors[0], concurrent.futures.CancelledError)
@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import pytest
+from git import Repo
+from blob_utils import blob_oid
+from git_service import GitService
+
+@pytest.fixture
+def temp_git_repo():
+    temp_dir = tempfile.mkdtemp()
+    repo = Repo.init(temp_dir)
+
+    lines = [f"def f{i}():\n" if i % 10 == 0 else f"    x = {i}\n" for i in range(100)]
+    for name in ["code.py", "with space.py"]:
+        with open(os.path.join(temp_dir, name), "w") as f:
+            f.write("".join(lines))
+    repo.index.add(["code.py", "with space.py"])
+    repo.index.commit("Initial commit")
+
+    lines[5] = "    y = 5\n"
+    del lines[40]
+    lines.insert(70, "    inserted\n")
+    lines[-1] = lines[-1].rstrip("\n")
+    for name in ["code.py", "with space.py"]:
+        with open(os.path.join(temp_dir, name), "w") as f:
+            f.write("".join(lines))
+
+    yield temp_dir, repo
+    repo.close()
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+def test_blob_oid_matches_git():
+    assert blob_oid(b"hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+def test_get_diff_map_matches_git_diff(temp_git_repo):
+    temp_dir, repo = temp_git_repo
+    service = GitService()
+    assert service.is_valid_repo(temp_dir)
+
+    diff_map = service.get_diff_map(["code.py", "with space.py"])
+
+    for name in ["code.py", "with space.py"]:
+        assert diff_map[name] == repo.git.diff("HEAD", "--", name)
+    service.close()
+
+def test_get_diff_map_applies_textconv(temp_git_repo):
+    temp_dir, repo = temp_git_repo
+    with open(os.path.join(temp_dir, ".git", "info", "attributes"), "w") as f:
+        f.write("code.py diff=upper\n")
+    with repo.config_writer() as config:
+        config.set_value('diff "upper"', "textconv", "tr a-z A-Z <")
+    service = GitService()
+    assert service.is_valid_repo(temp_dir)
+
+    diff_map = service.get_diff_map(["code.py"])
+
+    assert "+    Y = 5" in diff_map["code.py"]
+    assert diff_map["code.py"] == repo.git.diff("HEAD", "--", "code.py")
+    service.close()
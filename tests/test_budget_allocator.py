@@ -0,0 +1,57 @@
+from itertools import product
+
+import budget_allocator
+from budget_allocator import ChunkOption, allocate, OMIT, DROP, SUMMARY, PREFIX, FULL
+
+def _total(plan, attr):
+    return sum(getattr(option, attr) for option in plan)
+
+def test_keeps_everything_that_fits():
+    choices = [[ChunkOption(FULL, 100, 1.0)], [ChunkOption(FULL, 200, 0.5)]]
+    assert [o.kind for o in allocate(choices, 300)] == [FULL, FULL]
+
+def test_leaves_out_what_cannot_fit():
+    choices = [[ChunkOption(FULL, 500, 1.0)], [ChunkOption(FULL, 50, 0.2)]]
+    assert [o.kind for o in allocate(choices, 100)] == [OMIT, FULL]
+
+def test_prefers_keeping_small_chunks_whole():
+    # Cutting all three would fit, but two whole files and a summary are worth more
+    choices = [
+        [ChunkOption(FULL, 40, 1.0), ChunkOption(PREFIX, 20, 0.6, 20)],
+        [ChunkOption(FULL, 40, 1.0), ChunkOption(PREFIX, 20, 0.6, 20)],
+        [ChunkOption(FULL, 400, 0.2), ChunkOption(SUMMARY, 15, 0.14), ChunkOption(DROP, 10, 0.03)],
+    ]
+    assert [o.kind for o in allocate(choices, 100)] == [FULL, FULL, SUMMARY]
+
+def test_matches_exhaustive_search():
+    choices = [
+        [ChunkOption(FULL, 300, 1.0), ChunkOption(PREFIX, 150, 0.7, 150), ChunkOption(PREFIX, 60, 0.45, 60),
+         ChunkOption(DROP, 12, 0.15)],
+        [ChunkOption(FULL, 220, 0.5), ChunkOption(SUMMARY, 30, 0.35), ChunkOption(DROP, 12, 0.075)],
+        [ChunkOption(FULL, 90, 0.33), ChunkOption(PREFIX, 45, 0.2, 45)],
+        [ChunkOption(FULL, 500, 0.2), ChunkOption(SUMMARY, 25, 0.14)],
+    ]
+    budget = 400
+    plan = allocate(choices, budget)
+
+    everything = [[ChunkOption(OMIT, 0, 0.0)] + options for options in choices]
+    best = max(_total(combo, "value") for combo in product(*everything) if _total(combo, "cost") <= budget)
+    assert _total(plan, "cost") <= budget
+    assert abs(_total(plan, "value") - best) < 1e-9
+
+def test_costs_are_rounded_up_to_stay_within_budget():
+    # 3000 / 512 steps: each option is rounded up to a whole step, never down
+    choices = [[ChunkOption(FULL, 1001, 1.0)] for _ in range(3)]
+    plan = allocate(choices, 3000)
+    assert _total(plan, "cost") <= 3000
+    assert [o.kind for o in plan].count(FULL) == 2
+
+def test_empty_budget_leaves_everything_out():
+    assert allocate([[ChunkOption(FULL, 1, 1.0)]], 0) == [ChunkOption(OMIT, 0, 0.0)]
+
+def test_chunks_past_the_cap_get_their_cheapest_option(monkeypatch):
+    monkeypatch.setattr(budget_allocator, "MAX_PLANNED_CHUNKS", 2)
+    choices = [[ChunkOption(FULL, 100, 1.0), ChunkOption(DROP, 10, 0.15)] for _ in range(5)]
+    plan = allocate(choices, 240, resolution=240)
+    assert sorted(o.kind for o in plan) == [DROP, DROP, DROP, FULL, FULL]
+    assert _total(plan, "cost") <= 240
@@ -0,0 +1,76 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import pytest
+from unittest.mock import patch
+import aicommit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_cli_never_imports_gui_modules():
+    code = (
+        "import sys, aicommit, git_service, ai_service;"
+        "print([m for m in sys.modules if m.split('.')[0] in ('views', 'customtkinter', 'tkinter')])"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+@pytest.fixture
+def services():
+    with patch('git_service.GitService') as MockGit, patch('ai_service.AIService') as MockAI:
+        git = MockGit.return_value
+        git.is_valid_repo.return_value = True
+        ai = MockAI.return_value
+        ai.generate_commit_message.return_value = ("feat: title", "- detail", False)
+        yield git, ai
+
+def run(argv):
+    out = io.StringIO()
+    code = aicommit.generate(aicommit.build_parser().parse_args(argv), out=out)
+    return code, out.getvalue()
+
+def test_generate_plain_text(services):
+    git, ai = services
+    git.get_changed_files.return_value = ["a.py", "b.py"]
+    git.get_diff.return_value = "diff"
+
+    code, out = run(["generate", "--repo", "."])
+
+    assert code == 0
+    assert out == "feat: title\n\n- detail\n"
+    git.get_numstat.assert_called_once_with(["a.py", "b.py"])
+    ai.generate_commit_message.assert_called_once_with("diff")
+    git.close.assert_called_once()
+
+def test_generate_staged_json(services):
+    git, ai = services
+    git.get_staged_files.return_value = ["a.py", "b.py"]
+    git.get_staged_diff.return_value = "staged diff"
+
+    code, out = run(["generate", "--staged", "--json", "b.py"])
+
+    assert code == 0
+    assert json.loads(out) == {"title": "feat: title", "description": "- detail", "truncated": False, "files": ["b.py"]}
+    git.get_staged_diff.assert_called_once_with(["b.py"])
+    git.get_diff.assert_not_called()
+
+def test_main_reports_errors(services, capsys):
+    git, ai = services
+    git.get_staged_files.return_value = []
+
+    assert aicommit.main(["generate", "--staged"]) == 1
+    assert "No staged changes." in capsys.readouterr().err
+    ai.generate_commit_message.assert_not_called()
+
+def test_cache_clear():
+    from summary_cache import SummaryCache
+    cache = SummaryCache()
+    cache.put("m", 1, "diff", "summary")
+    cache.close()
+
+    out = io.StringIO()
+    assert aicommit.cache(aicommit.build_parser().parse_args(["cache", "clear"]), out=out) == 0
+    assert out.getvalue().startswith("Removed 1 cached summaries")
+    assert SummaryCache().get("m", 1, "diff") is None
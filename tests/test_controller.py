@@ -1,5 +1,7 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock, patch, ANY
+from unittest.mock import AsyncMock, MagicMock, patch
+from async_bridge import AsyncBridge
 from models.app_state import AppState
 from controllers.main_controller import MainController
 
@@ -104,4 +106,94 @@ def test_commit_flow(mock_thread, mock_chdir, mock_deps):
     # Verify UI clear
     window.commit_view.set_commit_message.assert_called_with("", "")
     # Should trigger refresh
-    git_service.get_current_branch.assert_called()
\ No newline at end of file
+    git_service.get_current_branch.assert_called()
+
+
+@patch('controllers.main_controller.threading.Thread')
+def test_selection_change_fetches_diffs_in_one_call(mock_thread, mock_deps):
+    window, git_service, ai_service, state = mock_deps
+
+    def side_effect(target, daemon=False):
+        target()
+        return MagicMock()
+    mock_thread.side_effect = side_effect
+
+    files = [f"file{i}.py" for i in range(50)]
+    git_service.get_diff_map.return_value = {f: "diff" for f in files}
+
+    controller = MainController(state, window, git_service, ai_service)
+    controller.on_file_selection_change(files)
+
+    git_service.get_diff_map.assert_called_once()
+    git_service.get_diff.assert_not_called()
+    args, _ = window.diff_view.update_diffs.call_args
+    assert len(args[0]) == 50
+
+@patch('controllers.main_controller.threading.Thread')
+def test_watcher_change_updates_file_list_incrementally(mock_thread, mock_deps):
+    window, git_service, ai_service, state = mock_deps
+
+    def side_effect(target, daemon=False):
+        target()
+        return MagicMock()
+    mock_thread.side_effect = side_effect
+
+    state.changed_files = ["a.py", "b.py"]
+    state.selected_files = {"a.py", "b.py"}
+    git_service.refresh_paths.return_value.changed_files = ["a.py", "c.py"]
+    git_service.get_diff_map.return_value = {"a.py": "diff", "c.py": "diff"}
+
+    controller = MainController(state, window, git_service, ai_service)
+    controller._on_repo_change({"b.py", "c.py"}, False)
+
+    git_service.refresh_paths.assert_called_once_with(["b.py", "c.py"])
+    git_service.refresh_status.assert_not_called()
+    assert state.changed_files == ["a.py", "c.py"]
+    assert state.selected_files == {"a.py", "c.py"}
+    window.commit_view.set_file_list.assert_not_called()
+    window.commit_view.remove_file.assert_called_once_with("b.py")
+    window.commit_view.add_file.assert_called_once_with("c.py", True)
+    window.diff_view.update_diffs.assert_called_once()
+
+def test_push_runs_on_async_bridge(mock_deps):
+    window, git_service, ai_service, state = mock_deps
+    async_git = MagicMock()
+    async_git.is_valid_repo = AsyncMock(return_value=True)
+    async_git.push_changes = AsyncMock()
+    bridge = AsyncBridge()
+    state.repo_path = "/path/to/repo"
+
+    controller = MainController(state, window, git_service, ai_service, async_git=async_git, bridge=bridge)
+    try:
+        with patch('controllers.main_controller.threading.Thread') as mock_thread:
+            controller.push_repo()
+        bridge.run(asyncio.sleep(0), timeout=5)
+    finally:
+        controller.shutdown()
+
+    mock_thread.assert_not_called()
+    git_service.push_changes.assert_not_called()
+    async_git.is_valid_repo.assert_awaited_once_with("/path/to/repo")
+    async_git.push_changes.assert_awaited_once()
+    window.set_status.assert_called_with("Push complete.")
+    window.set_loading.assert_called_with(False)
+
+def test_cancelled_push_clears_loading(mock_deps):
+    window, git_service, ai_service, state = mock_deps
+    async_git = MagicMock()
+    async_git.is_valid_repo = AsyncMock(return_value=True)
+    # What cancel_all does to a push in flight
+    async_git.push_changes = AsyncMock(side_effect=asyncio.CancelledError)
+    bridge = AsyncBridge()
+    state.repo_path = "/path/to/repo"
+
+    controller = MainController(state, window, git_service, ai_service, async_git=async_git, bridge=bridge)
+    try:
+        controller.push_repo()
+        bridge.run(asyncio.sleep(0.05), timeout=5)
+    finally:
+        controller.shutdown()
+
+    window.set_loading.assert_called_with(False)
+    window.set_status.assert_called_with("Push cancelled.")
+    window.show_error.assert_not_called()
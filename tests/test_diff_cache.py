@@ -0,0 +1,33 @@
+from diff_cache import DiffCache
+
+def test_lru_eviction_by_bytes():
+    cache = DiffCache(max_bytes=10)
+    cache.put("a", "12345")
+    cache.put("b", "12345")
+    cache.get("a")  # a becomes most recently used
+    cache.put("c", "12345")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "12345"
+    assert cache.get("c") == "12345"
+
+def test_hit_miss_counters():
+    cache = DiffCache()
+    cache.put("k", "diff")
+    cache.get("k")
+    cache.get("missing")
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+def test_head_move_clears_entries():
+    cache = DiffCache()
+    cache.sync_head("head1")
+    cache.put("k", "diff")
+    cache.sync_head("head1")
+    assert cache.get("k") == "diff"
+
+    cache.sync_head("head2")
+    assert cache.get("k") is None
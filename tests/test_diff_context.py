@@ -0,0 +1,41 @@
+from diff_context import reduce_context
+
+HEADER = "diff --git a/x.py b/x.py\nindex 1111111..2222222 100644\n--- a/x.py\n+++ b/x.py\n"
+
+DIFF = HEADER + (
+    "@@ -10,9 +10,9 @@ def foo():\n"
+    " a\n b\n c\n-d\n+D\n e\n f\n g\n h\n"
+    "@@ -30,6 +30,7 @@ class Bar:\n"
+    " 1\n 2\n 3\n+new\n 4\n 5\n 6\n"
+    "\\ No newline at end of file\n"
+)
+
+def test_one_line_of_context():
+    assert reduce_context(DIFF, 1) == HEADER + (
+        "@@ -12,3 +12,3 @@ def foo():\n c\n-d\n+D\n e\n"
+        "@@ -32,2 +32,3 @@ class Bar:\n 3\n+new\n 4\n"
+    )
+
+def test_no_context_uses_git_ranges():
+    assert reduce_context(DIFF, 0) == HEADER + (
+        "@@ -13 +13 @@ def foo():\n-d\n+D\n"
+        "@@ -32,0 +33 @@ class Bar:\n+new\n"
+    )
+
+def test_hunks_split_where_context_falls_apart():
+    diff = HEADER + "@@ -1,9 +1,9 @@\n-a\n+A\n 2\n 3\n 4\n 5\n 6\n 7\n-h\n+H\n"
+    assert reduce_context(diff, 1) == HEADER + "@@ -1,2 +1,2 @@\n-a\n+A\n 2\n@@ -7,2 +7,2 @@\n 7\n-h\n+H\n"
+
+def test_no_newline_marker_stays_with_its_line():
+    diff = HEADER + "@@ -1,3 +1,3 @@\n 1\n 2\n-3\n\\ No newline at end of file\n+3\n\\ No newline at end of file\n"
+    assert reduce_context(diff, 0) == HEADER + (
+        "@@ -3 +3 @@\n-3\n\\ No newline at end of file\n+3\n\\ No newline at end of file\n"
+    )
+
+def test_hunks_within_context_are_unchanged():
+    diff = "diff --git a/new.py b/new.py\nnew file mode 100644\n--- /dev/null\n+++ b/new.py\n@@ -0,0 +1,2 @@\n+a\n+b\n"
+    assert reduce_context(diff, 0) == diff
+
+def test_sections_without_hunks_pass_through():
+    binary = "diff --git a/logo.png b/logo.png\nBinary files a/logo.png and b/logo.png differ\n"
+    assert reduce_context(binary, 0) == binary
@@ -0,0 +1,56 @@
+from diff_paths import parse_diff_git_line, unquote_path, split_diff_by_file, iter_diff_sections
+
+def test_parse_simple_header():
+    assert parse_diff_git_line("diff --git a/main.py b/main.py") == ("main.py", "main.py")
+
+def test_parse_path_with_spaces_and_b_slash():
+    line = "diff --git a/docs/a b/c.md b/docs/a b/c.md"
+    assert parse_diff_git_line(line) == ("docs/a b/c.md", "docs/a b/c.md")
+
+def test_parse_quoted_header():
+    line = 'diff --git "a/caf\\303\\251 \\"x\\".txt" "b/caf\\303\\251 \\"x\\".txt"'
+    assert parse_diff_git_line(line) == ('café "x".txt', 'café "x".txt')
+
+def test_unquote_passthrough():
+    assert unquote_path("plain.txt") == "plain.txt"
+
+def test_split_diff_by_file():
+    diff = "diff --git a/a b/a\n+1\ndiff --git a/b b/b\n+2\n"
+    sections = split_diff_by_file(diff)
+    assert sections == {"a": "diff --git a/a b/a\n+1", "b": "diff --git a/b b/b\n+2"}
+
+def test_iter_diff_sections_reads_extended_headers():
+    diff = (
+        "diff --git a/old name.py b/new name.py\n"
+        "similarity index 90%\n"
+        "rename from old name.py\n"
+        "rename to new name.py\n"
+        "--- a/old name.py\t\n"
+        "+++ b/new name.py\t\n"
+        "@@ -1 +1 @@\n"
+        "-x\n"
+        "+y\n"
+        "diff --git a/run.sh b/run.sh\n"
+        "old mode 100644\n"
+        "new mode 100755\n"
+        'diff --git "a/caf\\303\\251.txt" "b/caf\\303\\251.txt"\n'
+        "deleted file mode 100644\n"
+        'index 1234567..0000000\n'
+        '--- "a/caf\\303\\251.txt"\n'
+        "+++ /dev/null\n"
+        "@@ -1 +0,0 @@\n"
+        "--- not a header\n"
+    )
+    renamed, chmod, deleted = list(iter_diff_sections(diff))
+
+    assert (renamed.status, renamed.old_path, renamed.new_path) == ("R", "old name.py", "new name.py")
+    assert (chmod.path, chmod.old_mode, chmod.new_mode) == ("run.sh", "100644", "100755")
+    assert (deleted.status, deleted.old_path, deleted.new_path, deleted.path) == ("D", "café.txt", None, "café.txt")
+    assert deleted.text.endswith("--- not a header\n")
+
+def test_iter_diff_sections_shares_the_buffer():
+    diff = "diff --git a/a b/a\n+1\ndiff --git a/b b/b\n+2\n"
+    first, second = iter_diff_sections(diff)
+    assert first.buffer is diff and second.buffer is diff
+    assert (first.start, first.end, second.end) == (0, 22, len(diff))
+    assert "".join(s.text for s in (first, second)) == diff
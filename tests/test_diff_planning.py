@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import pytest
+from unittest.mock import MagicMock
+from git import Repo
+from diff_processor import DiffProcessor, DiffChunk
+from diff_stats import DiffStat, parse_numstat, format_stats_stub, is_stats_stub
+from git_service import GitService
+from token_management import FilePrioritizer, FileCategory
+
+def test_parse_numstat():
+    output = "3\t1\tsrc/app.py\0-\t-\timg.png\0" "2\t2\t\0old name.py\0new name.py\0"
+    stats = parse_numstat(output)
+
+    assert stats["src/app.py"].added == 3 and stats["src/app.py"].deleted == 1
+    assert stats["img.png"].is_binary
+    assert stats["new name.py"].orig_path == "old name.py"
+
+def test_plan_budget_prefers_logic_and_small_files():
+    processor = DiffProcessor(MagicMock(), FilePrioritizer(), summarizer=MagicMock())
+    stats = {
+        "src/app.py": DiffStat("src/app.py", added=20, deleted=5),
+        "package-lock.json": DiffStat("package-lock.json", added=20000, deleted=19000),
+        "README.md": DiffStat("README.md", added=10, deleted=0),
+    }
+    stats.update({f"gen/{i}.json": DiffStat(f"gen/{i}.json", added=5000, deleted=5000) for i in range(20)})
+
+    plan = processor.plan_budget(stats, token_limit=4000, max_summaries=4)
+
+    assert plan.full_files[:2] == ["src/app.py", "README.md"]
+    assert "package-lock.json" not in plan.full_files
+    assert len(plan.summary_files) == 4
+    assert len(plan.full_files) + len(plan.summary_files) + len(plan.stats_files) == len(stats)
+
+def test_plan_budget_without_summarizer_uses_stats_only():
+    processor = DiffProcessor(MagicMock(), FilePrioritizer())
+    stats = {"huge.py": DiffStat("huge.py", added=100000, deleted=0)}
+
+    plan = processor.plan_budget(stats, token_limit=4000)
+
+    assert plan.full_files == [] and plan.summary_files == []
+    assert [s.path for s in plan.stats_files] == ["huge.py"]
+
+def test_stats_stubs_are_not_summarized():
+    summarizer = MagicMock(return_value="summary")
+    token_manager = MagicMock()
+    token_manager.count_tokens.side_effect = len
+    token_manager.truncate_to_limit.side_effect = lambda text, limit: text[:limit]
+    processor = DiffProcessor(token_manager, FilePrioritizer(), summarizer)
+
+    stub = format_stats_stub(DiffStat("yarn.lock", added=9000, deleted=100, size=400000))
+    assert is_stats_stub(stub)
+    processor.parse_diff = MagicMock(return_value=[
+        DiffChunk(filename="yarn.lock", content=stub, token_count=len(stub), category=FileCategory.LOCK),
+        DiffChunk(filename="main.py", content="M" * 200, token_count=200, category=FileCategory.LOGIC),
+    ])
+
+    processor.process_diff("dummy", token_limit=150)
+
+    summarizer.assert_not_called()
+
+@pytest.fixture
+def temp_git_repo():
+    temp_dir = tempfile.mkdtemp()
+    repo = Repo.init(temp_dir)
+    for name in ["small.py", "big.json"]:
+        with open(os.path.join(temp_dir, name), "w") as f:
+            f.write("".join(f"line {i}\n" for i in range(2000)))
+    repo.index.add(["small.py", "big.json"])
+    repo.index.commit("Initial commit")
+
+    with open(os.path.join(temp_dir, "small.py"), "a") as f:
+        f.write("added\n")
+    with open(os.path.join(temp_dir, "big.json"), "w") as f:
+        f.write("".join(f"changed {i}\n" for i in range(2000)))
+    repo.close()
+    yield temp_dir
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+def test_planned_diff_reads_only_what_fits(temp_git_repo):
+    service = GitService()
+    assert service.is_valid_repo(temp_git_repo)
+    stats = service.get_numstat(["small.py", "big.json"])
+    assert stats["big.json"].added == 2000 and stats["big.json"].deleted == 2000
+
+    processor = DiffProcessor(MagicMock(), FilePrioritizer(), summarizer=MagicMock())
+    plan = processor.plan_budget(stats, token_limit=500, excerpt_chars=1000)
+    assert plan.full_files == ["small.py"]
+    assert plan.summary_files == ["big.json"]
+
+    diff = service.get_diff(files=["small.py", "big.json"], plan=plan)
+
+    assert "+added" in diff
+    assert "diff --git a/big.json b/big.json" in diff
+    assert "[Excerpt truncated]" in diff
+    assert len(diff) < 2000
+    service.close()
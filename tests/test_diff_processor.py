@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from diff_processor import DiffProcessor
+from diff_processor import DiffProcessor, canonicalize_section
+from diff_paths import iter_diff_sections
 from token_management import TokenManager, FilePrioritizer, FileCategory
 
 @pytest.fixture
@@ -79,4 +80,132 @@ def test_summarization_trigger(diff_processor):
     processed_text, _ = diff_processor.process_diff("dummy", token_limit=1000)
     
     assert "Summary of config" in processed_text
-    diff_processor.summarizer.assert_called_once()
\ No newline at end of file
+    diff_processor.summarizer.assert_called_once()
+
+
+def test_parse_diff_chunks_point_into_the_diff(diff_processor):
+    diff_text = "diff --git a/a.py b/a.py\n+x = 1\ndiff --git a/my notes.md b/my notes.md\n+note\n"
+    chunks = diff_processor.parse_diff(diff_text)
+
+    assert [c.filename for c in chunks] == ["a.py", "my notes.md"]
+    assert all(c.section.buffer is diff_text for c in chunks)
+    assert "".join(c.content for c in chunks) == diff_text
+
+    chunks[0].content = "replaced"
+    assert chunks[0].content == "replaced" and len(chunks[0]) == 8
+
+def _section(diff_text):
+    return next(iter_diff_sections(diff_text))
+
+def test_canonicalize_folds_headers_into_one_line():
+    diff = (
+        "diff --git a/old.py b/new.py\nold mode 100644\nnew mode 100755\nsimilarity index 90%\n"
+        "rename from old.py\nrename to new.py\nindex 83db48f..bf269f4\n--- a/old.py\n+++ b/new.py\n"
+        "@@ -1 +1 @@\n-a\n+b\n"
+    )
+    removed = []
+    assert canonicalize_section(_section(diff), removed) == (
+        "diff --git a/old.py b/new.py [renamed, 90% similar, mode 100644 -> 100755]\n@@ -1 +1 @@\n-a\n+b\n"
+    )
+    assert "index 83db48f..bf269f4\n" in removed
+
+def test_canonicalize_strips_trailing_whitespace_and_newline_markers():
+    diff = ("diff --git a/a.py b/a.py\nindex 1..2 100644\n--- a/a.py\n+++ b/a.py\n"
+            "@@ -1,2 +1,2 @@\n x = 1  \n-y = 2\n+y = 3\t\n\\ No newline at end of file\n")
+    assert canonicalize_section(_section(diff)) == "diff --git a/a.py b/a.py\n@@ -1,2 +1,2 @@\n x = 1\n-y = 2\n+y = 3\n"
+
+def test_canonicalize_keeps_empty_context_lines():
+    diff = "diff --git a/a.py b/a.py\n@@ -1,3 +1,3 @@\n x = 1  \n \n-y = 2\n+y = 3\n"
+    assert canonicalize_section(_section(diff)) == "diff --git a/a.py b/a.py\n@@ -1,3 +1,3 @@\n x = 1\n \n-y = 2\n+y = 3\n"
+
+def test_canonical_text_is_computed_once(diff_processor):
+    diff = "diff --git a/a.py b/a.py\nindex 83db48f..bf269f4 100644\n@@ -1 +1 @@\n-a\n+b\n"
+    with patch('diff_processor.canonicalize_section', wraps=canonicalize_section) as canonicalize:
+        chunk, = diff_processor.parse_diff(diff)
+        assert chunk.content == chunk.content == "diff --git a/a.py b/a.py\n@@ -1 +1 @@\n-a\n+b\n"
+    assert canonicalize.call_count == 1
+
+def test_canonicalize_keeps_whitespace_only_changes():
+    body = "@@ -1 +1 @@\n-y = 2  \n+y = 2\n"
+    diff = "diff --git a/a.py b/a.py\nindex 1..2 100644\n--- a/a.py\n+++ b/a.py\n" + body
+    assert canonicalize_section(_section(diff)) == "diff --git a/a.py b/a.py\n" + body
+
+def test_process_diff_sends_canonical_diff_and_records_tokens(diff_processor):
+    diff = "diff --git a/a.py b/a.py\nindex 83db48f..bf269f4 100644\n--- a/a.py\n+++ b/a.py\n@@ -1 +1 @@\n-a\n+b\n"
+    text, truncated = diff_processor.process_diff(diff, token_limit=1000)
+
+    assert (text, truncated) == ("diff --git a/a.py b/a.py\n@@ -1 +1 @@\n-a\n+b\n", False)
+    stats = diff_processor.stats()
+    assert stats["diffs"] == 1
+    assert stats["tokens_after"] == diff_processor.token_manager.count_tokens(text)
+    assert stats["tokens_before"] > stats["tokens_after"]
+    assert 0 < stats["saved_ratio"] < 1
+
+def _rename(old, new, body=""):
+    score = "90%" if body else "100%"
+    return f"diff --git a/{old} b/{new}\nsimilarity index {score}\nrename from {old}\nrename to {new}\n{body}"
+
+def test_directory_move_becomes_one_line(diff_processor):
+    diff = (_rename("src/pkg/a.py", "lib/pkg/a.py") + _rename("src/b.py", "lib/b.py")
+            + _rename("src/c.py", "lib/c.py", "--- a/src/c.py\n+++ b/lib/c.py\n@@ -1 +1 @@\n-x\n+y\n")
+            + _rename("docs/old.md", "docs/new.md"))
+
+    chunks = diff_processor.parse_diff(diff)
+
+    assert [c.content for c in chunks] == [
+        "diff --git a/src/ b/lib/ [2 files renamed, 100% similar]\n",
+        "diff --git a/src/c.py b/lib/c.py [renamed, 90% similar]\n@@ -1 +1 @@\n-x\n+y\n",
+        "diff --git a/docs/old.md b/docs/new.md [renamed, 100% similar]\n",
+    ]
+    assert chunks[0].token_count == diff_processor.token_manager.count_tokens(chunks[0].content)
+
+def _codemod_diff(files):
+    return "".join(
+        f"diff --git a/pkg/mod_{i}.py b/pkg/mod_{i}.py\nindex 1111111..2222222 100644\n"
+        f"--- a/pkg/mod_{i}.py\n+++ b/pkg/mod_{i}.py\n"
+        f"@@ -1,4 +1,4 @@\n # Copyright 2023 Example Corp\n-from legacy.client import Client\n"
+        f"+from client import Client\n import mod_{i}_helpers\n"
+        + (f"@@ -40,2 +40,2 @@ def run_{i}():\n-    return {i}\n+    return {i} + 1\n" if i % 100 == 0 else "")
+        for i in range(files)
+    )
+
+def test_codemod_hunks_are_sent_once(diff_processor):
+    diff_processor.summarizer.side_effect = AssertionError("should fit without summaries")
+    text, truncated = diff_processor.process_diff(_codemod_diff(600), token_limit=4000)
+
+    assert not truncated
+    assert text.count("+from client import Client") == 1
+    assert "[SAME HUNK IN 599 MORE FILES] pkg/mod_1.py, pkg/mod_2.py" in text
+    # Hunks of their own stay with their files
+    assert "+    return 500 + 1" in text
+    assert text.count("diff --git") == 6
+    stats = diff_processor.stats()
+    assert (stats["hunks"], stats["duplicate_hunks"]) == (606, 599)
+    # One copy kept, the other paths listed after it
+    assert "pkg/mod_20.py (+579 more)\n" in text
+    assert "pkg/mod_1.py\n" not in text and "diff --git a/pkg/mod_1.py" not in text
+
+def test_same_hunk_within_one_file_is_kept(diff_processor):
+    hunk = "@@ -{0},2 +{0},2 @@\n-    retry = 1\n+    retry = 3\n"
+    diff = ("diff --git a/a.py b/a.py\n--- a/a.py\n+++ b/a.py\n" + hunk.format(10) + hunk.format(50)
+            + "diff --git a/b.py b/b.py\n--- a/b.py\n+++ b/b.py\n" + hunk.format(10))
+
+    chunks = diff_processor._deduplicate_hunks(diff_processor.parse_diff(diff))
+
+    assert [c.filename for c in chunks] == ["a.py"]
+    assert chunks[0].content.count("+    retry = 3") == 2
+    assert "[SAME HUNK IN 1 MORE FILES] b.py\n" in chunks[0].content
+
+def test_hunks_are_not_deduplicated_when_the_diff_fits(diff_processor):
+    diff = _codemod_diff(3)
+    text, truncated = diff_processor.process_diff(diff, token_limit=4000)
+
+    assert not truncated
+    assert text.count("+from client import Client") == 3
+    assert "SAME HUNK" not in text
+    assert diff_processor.stats()["duplicate_hunks"] == 0
+
+def test_deduplication_can_be_turned_off():
+    processor = DiffProcessor(TokenManager(), FilePrioritizer(), MagicMock(), deduplicate=False)
+    chunks = processor.parse_diff(_codemod_diff(3))
+    assert [c.content.count("+from client import Client") for c in chunks] == [1, 1, 1]
@@ -1,6 +1,8 @@
 import pytest
-from diff_processor import DiffProcessor, DiffChunk
-from token_management import TokenManager, FilePrioritizer, FileCategory
+import re
+from diff_processor import DiffProcessor, DiffChunk, REMAINING_MARKER, TRUNCATED_MARKER
+from budget_allocator import PREFIX
+from token_management import TokenManager, TokenCache, TokenEstimator, FilePrioritizer, FileCategory
 from unittest.mock import MagicMock
 
 class MockTokenManager:
@@ -116,3 +118,259 @@ def test_proportional_budgeting(diff_processor):
     
     # Allow some wiggle room for headers
     assert abs(count_a - count_b) < 200 
+
+class CountingTokenManager(MockTokenManager):
+    def __init__(self):
+        self.counted = []
+
+    def count_tokens(self, text: str) -> int:
+        self.counted.append(text)
+        return super().count_tokens(text)
+
+def _estimating_processor():
+    # 1 byte per token matches the mock's exact counts, +-20%
+    estimator = TokenEstimator({category: 1.0 for category in FileCategory}, error=0.2)
+    return DiffProcessor(CountingTokenManager(), FilePrioritizer(), estimator=estimator)
+
+def test_estimator_skips_exact_counting_when_clearly_under():
+    processor = _estimating_processor()
+    diff = "diff --git a/a.py b/a.py\n+small change\n"
+    assert processor.process_diff(diff, token_limit=1000) == (diff, False)
+    assert processor.token_manager.counted == []
+
+def test_estimator_never_counts_huge_chunks_exactly():
+    processor = _estimating_processor()
+    huge = "diff --git a/package-lock.json b/package-lock.json\n" + "+x\n" * 50000
+    small = "diff --git a/main.py b/main.py\n+print(1)\n"
+
+    final_text, truncated = processor.process_diff(huge + small, token_limit=500)
+
+    assert truncated
+    assert "+print(1)" in final_text
+    assert all(len(text) < 1000 for text in processor.token_manager.counted)
+
+def test_estimator_counts_exactly_near_the_edge():
+    processor = _estimating_processor()
+    diff = "diff --git a/a.py b/a.py\n" + "+y\n" * 30
+    # Estimate is ~116 +-24: ambiguous against a limit of 120
+    assert processor.process_diff(diff, token_limit=120) == (diff, False)
+    assert len(processor.token_manager.counted) == 1
+
+class BatchingTokenManager(MockTokenManager):
+    def __init__(self):
+        self.batches = []
+
+    def count_tokens_batch(self, texts, num_threads=1):
+        self.batches.append((len(texts), num_threads))
+        return [self.count_tokens(text) for text in texts]
+
+def _multi_file_diff(files, lines):
+    return "".join(f"diff --git a/f{i}.py b/f{i}.py\n" + "+x\n" * lines for i in range(files))
+
+def test_small_diffs_are_counted_in_one_sequential_batch():
+    processor = DiffProcessor(BatchingTokenManager(), FilePrioritizer(), workers=8)
+    chunks = processor.parse_diff(_multi_file_diff(files=20, lines=5))
+    assert len(chunks) == 20
+    assert processor.token_manager.batches == [(20, 1)]
+
+def test_large_diffs_are_counted_with_all_workers():
+    processor = DiffProcessor(BatchingTokenManager(), FilePrioritizer(), workers=8, parallel_min_bytes=1000)
+    chunks = processor.parse_diff(_multi_file_diff(files=20, lines=50))
+    assert [c.token_count for c in chunks] == [len(c.content) for c in chunks]
+    assert processor.token_manager.batches == [(20, 8)]
+
+def test_truncation_keeps_chunks_within_budget_at_line_boundaries():
+    tm = TokenManager(cache=TokenCache())
+    processor = DiffProcessor(tm, FilePrioritizer())
+    diff = "".join(
+        f"diff --git a/f{i}.py b/f{i}.py\n@@ -1,0 +1,200 @@\n" + "+value = compute(1, 2)\n" * 200 for i in range(3)
+    )
+
+    final_text, truncated = processor.process_diff(diff, token_limit=600)
+
+    assert truncated
+    assert tm.count_tokens(final_text) <= 600
+    for section in final_text.split("diff --git ")[1:]:
+        lines = section.rstrip("\n").split("\n")
+        assert lines[1] == "@@ -1,0 +1,200 @@"
+        assert lines[-1] == "...[Truncated]..."
+        assert all(line == "+value = compute(1, 2)" for line in lines[2:-2])
+
+def _lock_chunks(count, size=1000):
+    return [DiffChunk(filename=f"dep{i}.lock", content=f"{i}" * size, token_count=size, category=FileCategory.LOCK)
+            for i in range(count)]
+
+def test_summaries_run_concurrently_in_a_stable_order():
+    import threading
+    import time
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow_summarizer(text):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return f"summary of {text[0]}"
+
+    processor = DiffProcessor(MockTokenManager(), FilePrioritizer(), slow_summarizer, summary_workers=4)
+    processor.parse_diff = MagicMock(return_value=_lock_chunks(6))
+
+    final_text, truncated = processor.process_diff("dummy", token_limit=1000)
+
+    assert truncated
+    assert peak[0] == 4
+    summaries = [line for line in final_text.split("\n") if line.startswith("summary of")]
+    assert summaries == [f"summary of {i}" for i in range(6)]
+
+def test_summarizes_only_as_many_chunks_as_needed():
+    summarizer = MagicMock(return_value="short")
+    processor = DiffProcessor(MockTokenManager(), FilePrioritizer(), summarizer)
+    processor.parse_diff = MagicMock(return_value=_lock_chunks(5))
+
+    processor.process_diff("dummy", token_limit=3500)
+
+    # Two summaries free 2 * ~960 tokens: enough, so the other three stay whole
+    assert summarizer.call_count == 2
+
+def test_slow_summary_is_abandoned_after_timeout():
+    import threading
+    release = threading.Event()
+
+    def summarizer(text):
+        if text.startswith("0"):
+            release.wait(5)
+        return "ok"
+
+    processor = DiffProcessor(MockTokenManager(), FilePrioritizer(), summarizer, summary_timeout=0.1)
+    processor.parse_diff = MagicMock(return_value=_lock_chunks(2))
+    try:
+        final_text, _ = processor.process_diff("dummy", token_limit=500)
+    finally:
+        release.set()
+
+    assert "dep0.lock [TRUNCATED]\n...Diff too large and summarization timed out..." in final_text
+    assert "dep1.lock [SUMMARIZED]\nok" in final_text
+
+def test_small_logic_files_stay_whole_when_one_is_too_big():
+    tm = TokenManager(cache=TokenCache())
+    processor = DiffProcessor(tm, FilePrioritizer())
+    small = "".join(f"diff --git a/s{i}.py b/s{i}.py\n@@ -1 +1 @@\n-a = {i}\n+a = {i + 1}\n" for i in range(5))
+    big = "diff --git a/big.py b/big.py\n@@ -1,0 +1,400 @@\n" + "+value = compute(1, 2)\n" * 400
+
+    final_text, truncated = processor.process_diff(small + big, token_limit=800)
+
+    assert truncated
+    assert tm.count_tokens(final_text) <= 800
+    # The cut falls on the big file alone instead of on every file
+    for i in range(5):
+        assert f"-a = {i}\n+a = {i + 1}\n" in final_text
+    assert final_text.count("...[Truncated]...") == 1
+    assert "diff --git a/big.py b/big.py\n@@ -1,0 +1,400 @@\n+value" in final_text
+
+def test_summaries_are_replanned_with_their_real_size():
+    # Planned at the cost of their header, the summaries come back too long to all fit
+    summarizer = MagicMock(side_effect=lambda text: "s" * 150)
+    processor = DiffProcessor(MockTokenManager(), FilePrioritizer(), summarizer)
+    processor.parse_diff = MagicMock(return_value=_lock_chunks(3))
+
+    final_text, _ = processor.process_diff("dummy", token_limit=400)
+
+    assert len(final_text) <= 400
+    assert summarizer.call_count == 3
+    # Two of them, at ~190 tokens each, are all that fit
+    assert final_text.count("[SUMMARIZED]") == 2
+
+def test_context_is_reduced_before_anything_is_cut():
+    tm = TokenManager(cache=TokenCache())
+    processor = DiffProcessor(tm, FilePrioritizer())
+    context = "".join(f" unchanged_{j} = {j}\n" for j in range(3))
+    diff = "".join(
+        f"diff --git a/f{i}.py b/f{i}.py\n@@ -1,7 +1,7 @@ def f{i}():\n{context}-old_{i}\n+new_{i}\n{context}"
+        for i in range(6)
+    )
+    full = tm.count_tokens(diff)
+
+    final_text, truncated = processor.process_diff(diff, token_limit=full * 2 // 3)
+
+    assert truncated
+    assert "...[Truncated]..." not in final_text
+    for i in range(6):
+        # Every change is still there, with its function name
+        assert f"def f{i}():\n" in final_text
+        assert f"-old_{i}\n+new_{i}\n" in final_text
+    assert " unchanged_1 = 1" not in final_text
+
+def test_estimator_counts_straddling_chunks_in_one_batch():
+    # The production setup: AIService always passes an estimator
+    estimator = TokenEstimator({category: 1.0 for category in FileCategory}, error=0.2)
+    processor = DiffProcessor(BatchingTokenManager(), FilePrioritizer(), estimator=estimator)
+    diff = _multi_file_diff(files=20, lines=30)
+
+    # ~2380 +-490 estimated: ambiguous against 2450 until most chunks are counted
+    assert processor.process_diff(diff, token_limit=2450) == (diff, False)
+    assert len(processor.token_manager.batches) == 1
+    assert 1 < processor.token_manager.batches[0][0] < 20
+
+def test_chunks_that_may_stay_whole_are_counted_in_one_batch():
+    estimator = TokenEstimator({category: 1.0 for category in FileCategory}, error=0.2)
+    processor = DiffProcessor(BatchingTokenManager(), FilePrioritizer(), estimator=estimator)
+    diff = _multi_file_diff(files=10, lines=30)
+
+    final_text, truncated = processor.process_diff(diff, token_limit=600)
+
+    assert truncated
+    # One batch for the ten chunks, then the planner's own batches
+    assert processor.token_manager.batches[0] == (10, 1)
+
+class LineCuttingTokenManager(MockTokenManager):
+    def __init__(self):
+        self.cuts = []
+
+    def truncate_with_count(self, text, limit, marker=""):
+        self.cuts.append(marker)
+        return text, self.count_tokens(text)
+
+def test_fitting_result_is_not_cut_again():
+    processor = DiffProcessor(LineCuttingTokenManager(), FilePrioritizer())
+    small = "diff --git a/main.py b/main.py\n+print(1)\n"
+    huge = "diff --git a/yarn.lock b/yarn.lock\n" + "+x\n" * 1000
+
+    final_text, truncated = processor.process_diff(small + huge, token_limit=200)
+
+    assert truncated
+    assert "+print(1)" in final_text
+    assert len(final_text) <= 200
+    # Counted once as a whole; only an overflow goes through the line-wise cut
+    assert REMAINING_MARKER not in processor.token_manager.cuts
+
+def _file_diff(i):
+    context = "".join(f" context line {j} of module {i}\n" for j in range(8))
+    return (f"diff --git a/src/m{i}.py b/src/m{i}.py\n@@ -1,17 +1,17 @@\n{context}"
+            f"-    return {i}\n+    return {i} + 1\n{context}")
+
+def test_files_left_out_are_counted():
+    processor = DiffProcessor(MockTokenManager(), FilePrioritizer())
+    text, truncated = processor.process_diff("".join(_file_diff(i) for i in range(400)), token_limit=4000)
+
+    assert truncated
+    omitted = re.search(r"\.\.\.\[(\d+) more files omitted\]\.\.\.$", text)
+    assert omitted is not None
+    assert text.count("diff --git") + int(omitted.group(1)) == 400
+    assert len(text) <= 4000
+
+def test_cuts_keep_at_least_one_changed_line():
+    processor = DiffProcessor(MockTokenManager(), FilePrioritizer())
+    context = "".join(f" line {j}\n" for j in range(20))
+    content = "diff --git a/a.py b/a.py\n@@ -1,41 +1,41 @@\n" + context + "-x\n+y\n" + context * 3
+    chunk = DiffChunk("a.py", content, token_count=len(content), category=FileCategory.LOGIC)
+
+    options = processor._chunk_options(chunk, 400, 20, len("\n" + TRUNCATED_MARKER), 1)
+
+    cuts = [o for o in options if o.kind == PREFIX]
+    assert cuts
+    for option in cuts:
+        # MockTokenManager: one token per character
+        assert "\n-x\n" in content[:option.limit - len("\n" + TRUNCATED_MARKER)]
@@ -0,0 +1,51 @@
+import threading
+from unittest.mock import patch
+from encoding_registry import EncodingRegistry, encoding_name_for_model, resolve_encoding_name
+from token_management import TokenManager
+
+def test_encoding_name_for_model():
+    assert encoding_name_for_model("gpt-4o-mini") == "o200k_base"
+    assert encoding_name_for_model("gpt-5-mini-2025-08-07") == "o200k_base"
+    assert encoding_name_for_model("gpt-4") == "cl100k_base"
+    # Non-OpenAI models are approximated
+    assert encoding_name_for_model("gemini-2.5-flash") == "cl100k_base"
+    assert encoding_name_for_model("llama3") == "cl100k_base"
+    assert encoding_name_for_model("") == "cl100k_base"
+
+def test_resolve_encoding_name_accepts_both():
+    assert resolve_encoding_name("o200k_base") == "o200k_base"
+    assert resolve_encoding_name("gpt-4o") == "o200k_base"
+
+def test_registry_loads_each_encoding_once():
+    registry = EncodingRegistry()
+    release = threading.Event()
+    calls = []
+
+    def slow_load(name):
+        calls.append(name)
+        release.wait(1)
+        return object()
+
+    with patch("encoding_registry.tiktoken.get_encoding", side_effect=slow_load):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get("cl100k_base"))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        release.set()
+        for t in threads:
+            t.join(1)
+
+    assert calls == ["cl100k_base"]
+    assert len(results) == 4 and all(r is results[0] for r in results)
+    assert registry.is_loaded("cl100k_base")
+
+def test_preload_runs_in_background_and_reports_errors(capsys):
+    registry = EncodingRegistry()
+    with patch("encoding_registry.tiktoken.get_encoding", side_effect=ValueError("offline")):
+        registry.preload(["o200k_base"]).join(1)
+    assert not registry.is_loaded("o200k_base")
+    assert "Error preloading encoding o200k_base" in capsys.readouterr().out
+
+def test_token_managers_share_encodings():
+    assert TokenManager().encoding is TokenManager("gpt-4").encoding
+    assert TokenManager("gpt-4o").encoding is TokenManager("o200k_base").encoding
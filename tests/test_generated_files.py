@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+import pytest
+from git import Repo
+from diff_processor import DiffProcessor
+from diff_stats import DiffStat, is_stats_stub
+from generated_files import is_generated_by_attributes, is_generated_name, looks_generated, parse_check_attr
+from git_service import GitService
+from token_management import TokenManager, FilePrioritizer
+
+CODE = "".join(f"def handler_{i}(request):\n    return respond(request, {i})\n" for i in range(50))
+MINIFIED = "var a=" + ",".join(f"f{i}=function(x){{return x+{i}}}" for i in range(400)) + ";\n"
+
+@pytest.fixture
+def temp_git_repo():
+    temp_dir = tempfile.mkdtemp()
+    repo = Repo.init(temp_dir)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "Test")
+        config.set_value("user", "email", "test@example.com")
+    files = {
+        ".gitattributes": "schema/*.py linguist-generated\n*.dat -diff\n",
+        "app.py": CODE,
+        "schema/models.py": CODE,
+        "blob.dat": CODE,
+        "api_pb.py": "# Generated by the protocol buffer compiler.  DO NOT EDIT!\n" + CODE,
+        "static/app.js": MINIFIED,
+    }
+    for name, content in files.items():
+        os.makedirs(os.path.dirname(os.path.join(temp_dir, name)), exist_ok=True)
+        with open(os.path.join(temp_dir, name), "w") as f:
+            f.write(content)
+    repo.git.add("-A")
+    repo.git.commit("-q", "-m", "Initial commit")
+    for name in files:
+        if name != ".gitattributes":
+            with open(os.path.join(temp_dir, name), "a") as f:
+                f.write("changed = 1\n")
+    yield temp_dir, repo
+    repo.close()
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+def test_parse_check_attr():
+    output = "a.py\0diff\0unspecified\0a.py\0linguist-generated\0set\0b.bin\0diff\0unset\0"
+    attributes = parse_check_attr(output)
+    assert attributes == {"a.py": {"diff": "unspecified", "linguist-generated": "set"}, "b.bin": {"diff": "unset"}}
+    assert is_generated_by_attributes(attributes["a.py"])
+    assert is_generated_by_attributes(attributes["b.bin"])
+    assert not is_generated_by_attributes({"diff": "set", "linguist-generated": "false"})
+
+def test_generated_names_and_content():
+    assert is_generated_name("web/dist/vendor.min.js")
+    assert is_generated_name("proto/user_pb2.py")
+    assert not is_generated_name("src/minimal.py")
+
+    assert looks_generated("api/user.go", "// Code generated by protoc-gen-go. DO NOT EDIT.\npackage api\n")
+    assert looks_generated("tool/out.py", "# @generated by tool\nx = 1\n")
+    assert looks_generated("static/app.js", MINIFIED)
+    assert not looks_generated("app.py", CODE)
+    # Only known generators' markers in comments at the top count
+    assert not looks_generated("app.py", 'message = "generated by the server"\n' + CODE)
+    assert not looks_generated("app.py", CODE + "# Code generated by tool. DO NOT EDIT.\n")
+    assert not looks_generated("app.py", "# Generated by hand, do not edit without review\n" + CODE)
+    assert not looks_generated("api/user.go", "// Code generated by protoc-gen-go. DO NOT EDIT.\n", top=False)
+
+def test_prose_and_long_code_lines_are_not_minified():
+    paragraph = " ".join(["The budget is shared between the files of a diff."] * 40)
+    guide = "".join(f"{paragraph}\n\n" for _ in range(5))
+    assert not looks_generated("docs/guide.md", guide)
+    # Long lines only count in code and asset files, and only one several KB long
+    assert not looks_generated("app.py", MINIFIED)
+    assert not looks_generated("static/app.js", "".join(f"var x{i} = [{'1, ' * 100}1];\n" for i in range(20)))
+    assert looks_generated("data/fixtures.json", "[" + ",".join(f'{{"id": {i}}}' for i in range(500)) + "]")
+
+def test_git_service_shows_generated_files_as_stubs(temp_git_repo):
+    temp_dir, repo = temp_git_repo
+    service = GitService()
+    assert service.is_valid_repo(temp_dir)
+    files = service.get_changed_files()
+
+    assert service.get_generated(files) == {"schema/models.py", "blob.dat", "api_pb.py", "static/app.js"}
+    diff_map = service.get_diff_map(files, stub_generated=True)
+    assert "+changed = 1" in diff_map["app.py"]
+    for name in ["schema/models.py", "api_pb.py", "static/app.js"]:
+        assert is_stats_stub(diff_map[name])
+        assert "generated, +1 -0 lines" in diff_map[name]
+    # -diff makes git treat the file as binary
+    assert "[STATS ONLY] generated, binary file" in diff_map["blob.dat"]
+    assert service.get_diff(files).count("[STATS ONLY] generated, ") == 4
+    # The preview shows generated files' diffs as they are
+    preview = service.get_diff_map(files)
+    assert "+changed = 1" in preview["schema/models.py"] and "+changed = 1" in preview["static/app.js"]
+    assert not any(is_stats_stub(diff) for diff in preview.values())
+    stats = service.get_numstat(files)
+    assert stats["schema/models.py"].is_generated and not stats["app.py"].is_generated
+
+    repo.git.add("-A")
+    service.invalidate_status()
+    staged = service.get_staged_diff()
+    assert staged.count("diff --git") == 5
+    assert "+changed = 1" in staged.split("diff --git a/api_pb.py")[0]
+    assert staged.count("[STATS ONLY] generated, ") == 4
+    service.close()
+
+def test_generated_diffs_become_stubs_before_counting():
+    token_manager = TokenManager()
+    processor = DiffProcessor(token_manager, FilePrioritizer())
+    minified = "".join(f"+{MINIFIED}" for _ in range(20))
+    diff = ("diff --git a/app.py b/app.py\n@@ -1 +1 @@\n-a\n+b\n"
+            f"diff --git a/static/app.js b/static/app.js\n@@ -1,0 +1,20 @@\n{minified}"
+            "diff --git a/api/user_pb2.py b/api/user_pb2.py\n@@ -1 +1,2 @@\n-x = 1\n+x = 2\n+y = 3\n")
+
+    chunks = processor.parse_diff(diff)
+
+    assert [c.content for c in chunks[1:]] == [
+        "diff --git a/static/app.js b/static/app.js\n[STATS ONLY] generated, +20 -0 lines\n",
+        "diff --git a/api/user_pb2.py b/api/user_pb2.py\n[STATS ONLY] generated, +2 -1 lines\n",
+    ]
+    assert processor.stats()["generated_files"] == 2
+    assert processor.stats()["generated_bytes"] > len(minified)
+
+def test_markers_below_the_top_and_prose_stay_diffs():
+    processor = DiffProcessor(TokenManager(), FilePrioritizer())
+    prose = "".join(f"+{' '.join(['Long paragraphs are not minified.'] * 200)}\n" for _ in range(3))
+    diff = ("diff --git a/tool.py b/tool.py\n@@ -40 +40,2 @@\n x = 1\n+# Code generated by tool. DO NOT EDIT.\n"
+            "diff --git a/api.go b/api.go\n@@ -1 +1,2 @@\n+// Code generated by protoc-gen-go. DO NOT EDIT.\n package api\n"
+            f"diff --git a/docs/guide.md b/docs/guide.md\n@@ -1,0 +1,3 @@\n{prose}")
+
+    chunks = processor.parse_diff(diff)
+
+    assert [is_stats_stub(c.content) for c in chunks] == [False, True, False]
+
+def test_plan_budget_stubs_generated_files():
+    processor = DiffProcessor(TokenManager(), FilePrioritizer(), summarizer=lambda text: "summary")
+    stats = {
+        "app.py": DiffStat("app.py", added=10, deleted=2, size=4000),
+        "schema/models.py": DiffStat("schema/models.py", added=10, deleted=2, size=4000, is_generated=True),
+    }
+    plan = processor.plan_budget(stats, token_limit=4000)
+    assert plan.full_files == ["app.py"]
+    assert [s.path for s in plan.stats_files] == ["schema/models.py"]
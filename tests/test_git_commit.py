@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import pytest
+from git import Repo
+from git_service import GitService
+
+@pytest.fixture
+def temp_git_repo():
+    temp_dir = tempfile.mkdtemp()
+    # Earlier tests may leave the process in a deleted directory
+    os.chdir(temp_dir)
+    repo = Repo.init(temp_dir)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "Test User")
+        config.set_value("user", "email", "test@example.com")
+    yield temp_dir, repo
+    repo.close()
+    os.chdir(tempfile.gettempdir())
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+def _write(temp_dir, name, content):
+    with open(os.path.join(temp_dir, name), "w") as f:
+        f.write(content)
+
+def test_commit_on_unborn_head_then_on_top(temp_git_repo):
+    temp_dir, repo = temp_git_repo
+    _write(temp_dir, "a*.txt", "a\n")
+    _write(temp_dir, "with space.txt", "b\n")
+    _write(temp_dir, "unselected.txt", "c\n")
+
+    service = GitService()
+    assert service.is_valid_repo(temp_dir)
+    service.stage_files(["a*.txt", "with space.txt"])
+    first = service.commit_changes("feat: first\n\nbody")
+
+    assert repo.head.commit.hexsha == first
+    assert repo.head.commit.parents == ()
+    assert repo.head.commit.message == "feat: first\n\nbody"
+    assert repo.head.commit.author.email == "test@example.com"
+    # Pathspecs are literal: "a*.txt" did not match anything else
+    assert sorted(b.path for b in repo.head.commit.tree.blobs) == ["a*.txt", "with space.txt"]
+    assert service.get_changed_files() == ["unselected.txt"]
+
+    os.remove(os.path.join(temp_dir, "a*.txt"))
+    service.stage_files(["a*.txt"])
+    second = service.commit_changes("fix: second")
+
+    assert repo.head.commit.hexsha == second
+    assert [p.hexsha for p in repo.head.commit.parents] == [first]
+    assert [b.path for b in repo.head.commit.tree.blobs] == ["with space.txt"]
+    assert repo.git.reflog("-1", "--format=%gs") == "commit: fix: second"
+    service.close()
+
+def test_commit_runs_commit_msg_hook(temp_git_repo):
+    temp_dir, repo = temp_git_repo
+    hook = os.path.join(repo.git_dir, "hooks", "commit-msg")
+    os.makedirs(os.path.dirname(hook), exist_ok=True)
+    with open(hook, "w") as f:
+        f.write('#!/bin/sh\necho "Reviewed-by: hook" >> "$1"\n')
+    os.chmod(hook, 0o755)
+    _write(temp_dir, "file.txt", "x\n")
+
+    service = GitService()
+    assert service.is_valid_repo(temp_dir)
+    service.stage_files(["file.txt"])
+    service.commit_changes("chore: hooked\n")
+
+    assert repo.head.commit.message == "chore: hooked\nReviewed-by: hook\n"
+    service.close()
+
+def test_stage_many_files(temp_git_repo):
+    temp_dir, repo = temp_git_repo
+    # Long enough names that the joined argv would exceed ARG_MAX on some platforms
+    names = [f"{'n' * 100}_{i}.txt" for i in range(3000)]
+    for name in names:
+        _write(temp_dir, name, "x\n")
+
+    service = GitService()
+    assert service.is_valid_repo(temp_dir)
+    service.stage_files(names)
+
+    assert sorted(service.get_staged_files()) == sorted(names)
+    service.close()
@@ -27,7 +27,7 @@ def test_get_diff(mock_git_repo):
     
     diff = service.get_diff()
     assert diff == "diff content"
-    mock_repo_instance.git.diff.assert_called_with('HEAD') # or just diff depending on logic
+    mock_repo_instance.git.diff.assert_called_with('HEAD', '-M', '-C')
 
 def test_stage_all(mock_git_repo):
     mock_repo_instance = mock_git_repo.return_value
@@ -37,11 +37,21 @@ def test_stage_all(mock_git_repo):
     service.stage_all()
     mock_repo_instance.git.add.assert_called_with('.')
 
-def test_commit_changes(mock_git_repo):
+@patch('git_service.run_commit_hook')
+def test_commit_changes(mock_hook, mock_git_repo):
     mock_repo_instance = mock_git_repo.return_value
     service = GitService()
     service.repo = mock_repo_instance
+    service._identity_env = MagicMock(return_value={})
+    service._run_commit_msg_hook = MagicMock(side_effect=lambda index, message: message)
+    outputs = {'write-tree': b"tree1\n", 'rev-parse': b"", 'commit-tree': b"commit1\n", 'update-ref': b""}
+    service._run_git = MagicMock(side_effect=lambda args, **kwargs: outputs[args[0]])
     
-    service.commit_changes("Initial commit")
-    mock_repo_instance.index.commit.assert_called_with("Initial commit")
+    assert service.commit_changes("Initial commit") == "commit1"
+    mock_repo_instance.index.commit.assert_not_called()
+    
+    calls = [c.args[0] for c in service._run_git.call_args_list]
+    assert calls[2] == ['commit-tree', 'tree1']  # unborn HEAD: no parent
+    assert calls[3] == ['update-ref', '-m', 'commit (initial): Initial commit', 'HEAD', 'commit1', '']
+    assert service._run_git.call_args_list[2].kwargs['input_bytes'] == b"Initial commit"
 
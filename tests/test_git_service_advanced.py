@@ -12,15 +12,19 @@ def test_stage_files(mock_git_repo):
     service = GitService()
     service.repo = mock_repo_instance
     
+    service._run_git = MagicMock(return_value=b"")
+    
     files_to_stage = ["file1.txt", "file2.py"]
     service.stage_files(files_to_stage)
     
-    # repo.git.add should be called with the list of files
-    mock_repo_instance.git.add.assert_called_with(files_to_stage)
+    # Paths go through stdin, not argv
+    args, kwargs = service._run_git.call_args
+    assert args[0] == ['add', '--pathspec-from-file=-', '--pathspec-file-nul']
+    assert kwargs['input_bytes'] == b"file1.txt\0file2.py"
 
 def test_get_current_branch(mock_git_repo):
     mock_repo_instance = mock_git_repo.return_value
-    mock_repo_instance.active_branch.name = "feature-branch"
+    mock_repo_instance.git.status.return_value = "# branch.oid abc\0# branch.head feature-branch\0"
     
     service = GitService()
     service.repo = mock_repo_instance
@@ -51,28 +55,34 @@ def test_pull_changes(mock_git_repo):
     service.pull_changes()
     mock_remote.pull.assert_called_once()
 
+STATUS_OUTPUT = "\0".join([
+    "# branch.oid 1111111111111111111111111111111111111111",
+    "# branch.head main",
+    "# branch.upstream origin/main",
+    "# branch.ab +2 -1",
+    "1 A. N... 000000 100644 100644 0000000000000000000000000000000000000000 aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa staged_file.py",
+    "1 .M N... 100644 100644 100644 bbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb bbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb unstaged_file.py",
+    "2 R. N... 100644 100644 100644 cccccccccccccccccccccccccccccccccccccccc cccccccccccccccccccccccccccccccccccccccc R100 new name.py",
+    "old name.py",
+    "? untracked.txt",
+    "",
+])
+
 def test_get_staged_files(mock_git_repo):
     mock_repo_instance = mock_git_repo.return_value
-    # Mock index.diff("HEAD")
-    mock_diff_item = MagicMock()
-    mock_diff_item.a_path = "staged_file.py"
-    mock_repo_instance.index.diff.return_value = [mock_diff_item]
+    mock_repo_instance.git.status.return_value = STATUS_OUTPUT
     
     service = GitService()
     service.repo = mock_repo_instance
     
     staged = service.get_staged_files()
     assert "staged_file.py" in staged
-    mock_repo_instance.index.diff.assert_called_with("HEAD")
+    assert "new name.py" in staged
+    assert "unstaged_file.py" not in staged
 
 def test_get_unstaged_files(mock_git_repo):
     mock_repo_instance = mock_git_repo.return_value
-    # Mock index.diff(None) for unstaged
-    mock_diff_item = MagicMock()
-    mock_diff_item.a_path = "unstaged_file.py"
-    mock_repo_instance.index.diff.return_value = [mock_diff_item]
-    # Mock untracked files
-    mock_repo_instance.untracked_files = ["untracked.txt"]
+    mock_repo_instance.git.status.return_value = STATUS_OUTPUT
     
     service = GitService()
     service.repo = mock_repo_instance
@@ -80,3 +90,98 @@ def test_get_unstaged_files(mock_git_repo):
     unstaged = service.get_unstaged_files()
     assert "unstaged_file.py" in unstaged
     assert "untracked.txt" in unstaged
+    assert "staged_file.py" not in unstaged
+
+def test_status_queries_share_one_scan(mock_git_repo):
+    mock_repo_instance = mock_git_repo.return_value
+    mock_repo_instance.git.status.return_value = STATUS_OUTPUT
+
+    service = GitService()
+    service.repo = mock_repo_instance
+
+    service.get_current_branch()
+    service.get_changed_files()
+    service.get_staged_files()
+    service.get_unstaged_files()
+
+    mock_repo_instance.git.status.assert_called_once_with('--porcelain=v2', '-z', '--branch', '--untracked-files=all')
+    mock_repo_instance.index.diff.assert_not_called()
+
+def test_get_diff_map_single_git_call(mock_git_repo):
+    mock_repo_instance = mock_git_repo.return_value
+    mock_repo_instance.working_dir = "/nonexistent"
+    mock_repo_instance.git.status.return_value = (
+        "1 .M N... 100644 100644 100644 " + "a" * 40 + " " + "a" * 40 + " a.py\0"
+        "1 .M N... 100644 100644 100644 " + "b" * 40 + " " + "b" * 40 + " my file.txt\0"
+    )
+    mock_repo_instance.git.diff.return_value = (
+        "diff --git a/a.py b/a.py\n"
+        "--- a/a.py\n"
+        "+++ b/a.py\n"
+        "@@ -1 +1 @@\n"
+        "-old\n"
+        "+new\n"
+        "diff --git a/my file.txt b/my file.txt\n"
+        "--- a/my file.txt\n"
+        "+++ b/my file.txt\n"
+        "@@ -1 +1 @@\n"
+        "-x\n"
+        "+y"
+    )
+
+    service = GitService()
+    service.repo = mock_repo_instance
+
+    diff_map = service.get_diff_map(["a.py", "my file.txt", "clean.py"])
+
+    mock_repo_instance.git.diff.assert_called_once_with('HEAD', '-M', '-C', '--', "a.py", "my file.txt")
+    assert diff_map["a.py"].startswith("diff --git a/a.py b/a.py")
+    assert "+new" in diff_map["a.py"]
+    assert "+y" in diff_map["my file.txt"]
+    assert "+y" not in diff_map["a.py"]
+    assert diff_map["clean.py"] == ""
+
+def test_get_diff_map_served_from_cache(mock_git_repo):
+    mock_repo_instance = mock_git_repo.return_value
+    mock_repo_instance.working_dir = "/nonexistent"
+    mock_repo_instance.git.status.return_value = (
+        "# branch.oid " + "1" * 40 + "\0"
+        "1 .M N... 100644 100644 100644 " + "a" * 40 + " " + "a" * 40 + " a.py\0"
+    )
+    mock_repo_instance.git.diff.return_value = "diff --git a/a.py b/a.py\n+new"
+
+    service = GitService()
+    service.repo = mock_repo_instance
+
+    preview = service.get_diff_map(["a.py"])
+    generated = service.get_diff(files=["a.py"])
+
+    assert generated == preview["a.py"]
+    mock_repo_instance.git.diff.assert_called_once()
+    assert service.diff_cache.stats()["hits"] == 1
+
+    # HEAD moving invalidates the cache
+    mock_repo_instance.git.status.return_value = mock_repo_instance.git.status.return_value.replace("1" * 40, "2" * 40)
+    service.invalidate_status()
+    service.get_diff_map(["a.py"])
+    assert mock_repo_instance.git.diff.call_count == 2
+
+def test_snapshot_rechecks_head_without_watcher(mock_git_repo):
+    mock_repo_instance = mock_git_repo.return_value
+    mock_repo_instance.git.status.return_value = "# branch.oid " + "1" * 40 + "\0"
+
+    service = GitService()
+    service.repo = mock_repo_instance
+    service.check_head = True
+
+    with patch.object(service, '_run_git', return_value=("1" * 40 + "\n").encode()) as run_git:
+        service.get_status_snapshot()
+        service.get_status_snapshot()
+        assert mock_repo_instance.git.status.call_count == 1
+        run_git.assert_called_with(['rev-parse', '-q', '--verify', 'HEAD'], ok_codes=(0, 1))
+
+        # A commit made outside the app moved HEAD
+        mock_repo_instance.git.status.return_value = "# branch.oid " + "2" * 40 + "\0"
+        run_git.return_value = ("2" * 40 + "\n").encode()
+        assert service.get_status_snapshot().head_oid == "2" * 40
+        assert mock_repo_instance.git.status.call_count == 2
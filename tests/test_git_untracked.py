@@ -1,27 +1,30 @@
+import os
+import shutil
+import tempfile
 import unittest
-from unittest.mock import MagicMock, patch, mock_open
+from unittest.mock import MagicMock
 from git_service import GitService
+from hunk_dedup import split_hunks
 
 class TestGitUntracked(unittest.TestCase):
     def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.work_dir, "new_file.txt"), "w") as f:
+            f.write("line1\nline2")
+
         self.service = GitService()
         self.service.repo = MagicMock()
-        self.service.repo.untracked_files = ["new_file.txt"]
-        self.service.repo.working_dir = "/repo"
+        self.service.repo.git.status.return_value = "# branch.head main\0? new_file.txt\0"
+        self.service.repo.working_dir = self.work_dir
         
         # Default git diff returns empty for tracked checks
         self.service.repo.git.diff.side_effect = lambda *args, **kwargs: ""
 
-    @patch("git_service.os")
-    def test_get_diff_untracked_only(self, mock_os):
-        # Setup mocks
-        mock_os.path.join.side_effect = lambda a, b: f"{a}/{b}"
-        mock_os.path.exists.return_value = True
-        mock_os.path.isfile.return_value = True
-        
-        # Mock open
-        with patch("builtins.open", mock_open(read_data="line1\nline2")) as m:
-            diff = self.service.get_diff(files=["new_file.txt"])
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_get_diff_untracked_only(self):
+        diff = self.service.get_diff(files=["new_file.txt"])
             
         print(f"DEBUG DIFF: {diff}")
         
@@ -29,22 +32,56 @@ class TestGitUntracked(unittest.TestCase):
         self.assertIn("new file mode 100644", diff)
         self.assertIn("+line1", diff)
         self.assertIn("+line2", diff)
+        self.service.repo.git.diff.assert_not_called()
 
-    @patch("git_service.os")
-    def test_get_diff_mixed(self, mock_os):
-        # Setup mocks
-        mock_os.path.join.side_effect = lambda a, b: f"{a}/{b}"
-        mock_os.path.exists.return_value = True
-        mock_os.path.isfile.return_value = True
+    def test_get_diff_mixed(self):
+        self.service.repo.git.status.return_value = (
+            "# branch.head main\0"
+            "1 .M N... 100644 100644 100644 " + "a" * 40 + " " + "a" * 40 + " tracked.txt\0"
+            "? new_file.txt\0"
+        )
         
         # Tracked file diff
-        self.service.repo.git.diff.side_effect = lambda *args, **kwargs: "diff --git a/tracked.txt..." if "tracked.txt" in args else ""
+        self.service.repo.git.diff.side_effect = lambda *args, **kwargs: "diff --git a/tracked.txt b/tracked.txt\n+changed" if "tracked.txt" in args else ""
         
-        with patch("builtins.open", mock_open(read_data="new content")):
-            diff = self.service.get_diff(files=["tracked.txt", "new_file.txt"])
+        diff = self.service.get_diff(files=["tracked.txt", "new_file.txt"])
             
         self.assertIn("diff --git a/tracked.txt", diff)
         self.assertIn("diff --git a/new_file.txt", diff)
 
+    def test_get_diff_large_untracked_keeps_head_and_tail(self):
+        with open(os.path.join(self.work_dir, "big.log"), "w") as f:
+            for i in range(10000):
+                f.write(f"entry {i}\n")
+        self.service.repo.git.status.return_value = "? big.log\0"
+        self.service.untracked_reader.head_lines = 5
+        self.service.untracked_reader.tail_lines = 3
+
+        diff = self.service.get_diff(files=["big.log"])
+
+        self.assertIn("@@ -0,0 +1,5 @@\n+entry 0\n", diff)
+        self.assertIn("+entry 4\n@@ -0,0 +9998,3 @@ ... [9992 lines omitted; file has 10000 lines, ", diff)
+        self.assertNotIn("+entry 5\n", diff)
+        self.assertIn("+entry 9997", diff)
+        self.assertIn("+entry 9999", diff)
+        self.assertNotIn("+entry 9996", diff)
+        # Each hunk holds as many lines as its header says
+        _, hunks = split_hunks(diff)
+        self.assertEqual(len(hunks), 2)
+        for hunk, count in zip(hunks, (5, 3)):
+            body = hunk.rstrip("\n").split("\n")[1:]
+            self.assertEqual(len(body), count)
+            self.assertTrue(all(line.startswith("+") for line in body))
+
+    def test_get_diff_binary_untracked(self):
+        with open(os.path.join(self.work_dir, "image.png"), "wb") as f:
+            f.write(b"\x89PNG\0\0" * 100)
+        self.service.repo.git.status.return_value = "? image.png\0"
+
+        diff = self.service.get_diff(files=["image.png"])
+
+        self.assertIn("Binary files /dev/null and b/image.png differ", diff)
+        self.assertNotIn("@@", diff)
+
 if __name__ == '__main__':
     unittest.main()
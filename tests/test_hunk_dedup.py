@@ -0,0 +1,21 @@
+from hunk_dedup import hunk_fingerprint, same_hunk_note, split_hunks
+
+def test_split_hunks():
+    text = "diff --git a/a.py b/a.py\n@@ -1 +1 @@\n-a\n+b\n@@ -9 +9 @@ def f():\n-c\n+d"
+    assert split_hunks(text) == ("diff --git a/a.py b/a.py\n",
+                                 ["@@ -1 +1 @@\n-a\n+b\n", "@@ -9 +9 @@ def f():\n-c\n+d"])
+    assert split_hunks("diff --git a/b.bin b/b.bin\nBinary files differ\n") == (
+        "diff --git a/b.bin b/b.bin\nBinary files differ\n", [])
+
+def test_fingerprint_ignores_position_context_and_indentation():
+    hunk = "@@ -3,3 +3,3 @@\n import os\n-from old import api\n+from new import api\n import sys\n"
+    moved = "@@ -10,3 +10,3 @@ class A:\n     x = 1\n-    from old  import api\n+    from new import api\n"
+    assert hunk_fingerprint(hunk) == hunk_fingerprint(moved)
+    assert hunk_fingerprint(hunk) != hunk_fingerprint(hunk.replace("+from new", "+from newer"))
+    # Sides matter: the reverse edit is a different change
+    assert hunk_fingerprint(hunk) != hunk_fingerprint(hunk.replace("-from", "+FROM").replace("+from", "-from"))
+    assert hunk_fingerprint("@@ -1 +1 @@\n context\n") is None
+
+def test_same_hunk_note_lists_a_few_paths():
+    assert same_hunk_note(["a.py", "b.py"], 5) == "[SAME HUNK IN 2 MORE FILES] a.py, b.py\n"
+    assert same_hunk_note(["a.py", "b.py", "c.py"], 1) == "[SAME HUNK IN 3 MORE FILES] a.py (+2 more)\n"
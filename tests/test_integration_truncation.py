@@ -50,7 +50,8 @@ def test_full_truncation_flow(integration_setup):
     controller.state.selected_files = {"main.py"}
     
     # 3. Call Generate
-    with patch('threading.Thread') as mock_thread:
+    # Only the controller's threads run inline; the summarizer's pool keeps real ones
+    with patch('controllers.main_controller.threading') as mock_threading:
         # Execute the target function immediately
         def side_effect(*args, **kwargs):
             target = kwargs.get('target')
@@ -58,7 +59,7 @@ def test_full_truncation_flow(integration_setup):
                 target()
             return MagicMock()
             
-        mock_thread.side_effect = side_effect
+        mock_threading.Thread.side_effect = side_effect
         
         controller.generate_commit_message()
         
@@ -99,14 +100,15 @@ def test_smart_sacrifice_integration(integration_setup):
     
     controller.state.selected_files = {"dist/bundle.js", "src/logic.py"}
     
-    with patch('threading.Thread') as mock_thread:
+    # Only the controller's threads run inline; the summarizer's pool keeps real ones
+    with patch('controllers.main_controller.threading') as mock_threading:
         def side_effect(*args, **kwargs):
             target = kwargs.get('target')
             if target:
                 target()
             return MagicMock()
             
-        mock_thread.side_effect = side_effect
+        mock_threading.Thread.side_effect = side_effect
         
         controller.generate_commit_message()
         
@@ -133,14 +135,15 @@ def test_no_truncation_flow(integration_setup):
     ai.client.chat.completions.create.return_value = mock_response
     controller.state.selected_files = {"main.py"}
 
-    with patch('threading.Thread') as mock_thread:
+    # Only the controller's threads run inline; the summarizer's pool keeps real ones
+    with patch('controllers.main_controller.threading') as mock_threading:
         def side_effect(*args, **kwargs):
             target = kwargs.get('target')
             if target:
                 target()
             return MagicMock()
             
-        mock_thread.side_effect = side_effect
+        mock_threading.Thread.side_effect = side_effect
         
         controller.generate_commit_message()
         
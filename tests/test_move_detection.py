@@ -0,0 +1,154 @@
+import os
+import shutil
+import tempfile
+import pytest
+from unittest.mock import patch
+from git import Repo
+from blob_utils import blob_oid
+from git_service import GitService
+import move_detection
+from move_detection import Move, find_moves, similarity
+
+LINES = "".join(f"value_{i} = compute({i})\n" for i in range(40))
+
+@pytest.fixture
+def temp_git_repo():
+    temp_dir = tempfile.mkdtemp()
+    repo = Repo.init(temp_dir)
+    os.makedirs(os.path.join(temp_dir, "src", "pkg"))
+    for name in ["src/pkg/a.py", "src/pkg/b.py", "src/edited.py"]:
+        with open(os.path.join(temp_dir, name), "w") as f:
+            f.write(f"# {name}\n{LINES}")
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "Test")
+        config.set_value("user", "email", "test@example.com")
+    # git itself rather than IndexFile, which needs a valid working directory
+    repo.git.add("-A")
+    repo.git.commit("-q", "-m", "Initial commit")
+    yield temp_dir, repo
+    repo.close()
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+def test_similarity():
+    assert similarity(b"a\nb\n", b"a\nb\n") == 100
+    assert similarity(b"a\nb\n", b"c\nd\n") == 0
+    assert similarity(b"a\nb\nc\nd\n", b"a\nb\n") == 50
+
+def test_find_moves_pairs_identical_files_without_reading_blobs(tmp_path):
+    content = LINES.encode()
+    (tmp_path / "moved.py").write_bytes(content)
+    (tmp_path / "other.py").write_bytes(b"unrelated\n")
+    deleted = {"old.py": blob_oid(content)}
+    added = {"moved.py": str(tmp_path / "moved.py"), "other.py": str(tmp_path / "other.py")}
+
+    def read_blob(oid):
+        raise AssertionError("identical files are matched by blob id")
+
+    moves = find_moves(deleted, added, read_blob)
+
+    assert list(moves) == ["moved.py"]
+    assert moves["moved.py"] == Move("old.py", "moved.py", 100, len(content))
+
+def test_find_moves_hashes_large_files_in_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(move_detection, "MAX_SIMILARITY_BYTES", 100)
+    monkeypatch.setattr(move_detection, "HASH_BLOCK_BYTES", 64)
+    content = LINES.encode()
+    (tmp_path / "moved.py").write_bytes(content)
+
+    moves = find_moves({"old.py": blob_oid(content)}, {"moved.py": str(tmp_path / "moved.py")}, None)
+
+    assert moves["moved.py"] == Move("old.py", "moved.py", 100, len(content))
+
+def test_find_moves_pairs_most_similar_file_first(tmp_path):
+    old = LINES.encode()
+    (tmp_path / "close.py").write_bytes(old.replace(b"compute(3)", b"compute(4)"))
+    (tmp_path / "far.py").write_bytes(old[:len(old) // 2] + b"x = 1\n" * 40)
+    (tmp_path / "new.py").write_bytes(b"nothing alike\n" * 50)
+    added = {name: str(tmp_path / name) for name in ["far.py", "close.py", "new.py"]}
+
+    moves = find_moves({"old.py": "1" * 40}, added, {"1" * 40: old}.__getitem__)
+
+    assert list(moves) == ["close.py"]
+    move = moves["close.py"]
+    assert move.old_path == "old.py" and 90 <= move.score < 100
+
+def test_get_diff_map_pairs_untracked_moves(temp_git_repo):
+    temp_dir, repo = temp_git_repo
+    os.makedirs(os.path.join(temp_dir, "lib", "pkg"))
+    for name in ["pkg/a.py", "pkg/b.py", "edited.py"]:
+        os.rename(os.path.join(temp_dir, "src", name), os.path.join(temp_dir, "lib", name))
+    with open(os.path.join(temp_dir, "lib", "edited.py"), "a") as f:
+        f.write("extra = True\n")
+    service = GitService()
+    assert service.is_valid_repo(temp_dir)
+    files = service.get_changed_files()
+
+    diff_map = service.get_diff_map(files)
+    stats = service.get_numstat(files)
+
+    assert diff_map["src/pkg/a.py"] == ""
+    assert diff_map["lib/pkg/a.py"] == (
+        "diff --git a/src/pkg/a.py b/lib/pkg/a.py\nsimilarity index 100%\n"
+        "rename from src/pkg/a.py\nrename to lib/pkg/a.py"
+    )
+    assert "rename from src/edited.py" in diff_map["lib/edited.py"]
+    assert "+extra = True" in diff_map["lib/edited.py"]
+    assert "-value_0" not in diff_map["lib/edited.py"]
+    assert (stats["lib/edited.py"].added, stats["lib/edited.py"].deleted) == (1, 0)
+    assert stats["lib/edited.py"].orig_path == "src/edited.py"
+    assert stats["src/edited.py"].changed_lines == 0
+    # Pairs depend on which files are asked for, so they aren't cached
+    assert service.diff_cache.stats()["entries"] == 0
+    service.close()
+
+def test_moves_are_paired_once_per_snapshot(temp_git_repo):
+    temp_dir, repo = temp_git_repo
+    os.rename(os.path.join(temp_dir, "src", "edited.py"), os.path.join(temp_dir, "edited.py"))
+    service = GitService()
+    assert service.is_valid_repo(temp_dir)
+    files = service.get_changed_files()
+
+    with patch("git_service.find_moves", wraps=find_moves) as pairing, \
+            patch.object(service, "_run_move_diff", wraps=service._run_move_diff) as move_diff:
+        service.get_numstat(files)
+        service.get_diff_map(files)
+        service.get_diff_excerpts(files, 10000)
+        assert pairing.call_count == 1
+        # One diff and one numstat of the moves, however often they are asked for
+        assert move_diff.call_count == 2
+        service.refresh_status()
+        service.get_numstat(files)
+        assert pairing.call_count == 2
+        assert move_diff.call_count == 3
+    service.close()
+
+def test_excerpts_show_untracked_moves_as_renames(temp_git_repo):
+    temp_dir, repo = temp_git_repo
+    os.rename(os.path.join(temp_dir, "src", "edited.py"), os.path.join(temp_dir, "edited.py"))
+    with open(os.path.join(temp_dir, "edited.py"), "a") as f:
+        f.write("extra = True\n")
+    service = GitService()
+    assert service.is_valid_repo(temp_dir)
+    files = service.get_changed_files()
+
+    excerpts = service.get_diff_excerpts(files, 10000)
+
+    assert excerpts["src/edited.py"] == ""
+    assert "rename from src/edited.py" in excerpts["edited.py"]
+    assert "+extra = True" in excerpts["edited.py"]
+    assert "new file mode" not in excerpts["edited.py"]
+    assert excerpts["edited.py"] == service.get_diff_map(files)["edited.py"]
+    service.close()
+
+def test_get_diff_map_detects_staged_renames(temp_git_repo):
+    temp_dir, repo = temp_git_repo
+    repo.git.mv("src/pkg/a.py", "moved.py")
+    service = GitService()
+    assert service.is_valid_repo(temp_dir)
+
+    diff_map = service.get_diff_map(["moved.py"])
+
+    assert diff_map["moved.py"] == (
+        "diff --git a/src/pkg/a.py b/moved.py\nsimilarity index 100%\nrename from src/pkg/a.py\nrename to moved.py"
+    )
+    service.close()
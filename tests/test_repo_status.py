@@ -0,0 +1,64 @@
+import pytest
+from repo_status import parse_porcelain_v2
+
+def test_parse_branch_and_tracking():
+    snapshot = parse_porcelain_v2(
+        "# branch.oid 1234\0# branch.head main\0# branch.upstream origin/main\0# branch.ab +3 -2\0"
+    )
+    assert snapshot.branch == "main"
+    assert snapshot.head_oid == "1234"
+    assert snapshot.upstream == "origin/main"
+    assert (snapshot.ahead, snapshot.behind) == (3, 2)
+
+def test_parse_unborn_and_detached():
+    unborn = parse_porcelain_v2("# branch.oid (initial)\0# branch.head master\0")
+    assert unborn.head_oid is None
+    assert unborn.branch == "master"
+
+    detached = parse_porcelain_v2("# branch.oid 1234\0# branch.head (detached)\0")
+    assert detached.is_detached
+
+def test_parse_entries():
+    output = "\0".join([
+        "1 MM N... 100644 100644 100644 " + "a" * 40 + " " + "b" * 40 + " both.py",
+        "1 .D N... 100644 100644 000000 " + "c" * 40 + " " + "c" * 40 + " removed.py",
+        "2 R. N... 100644 100644 100644 " + "d" * 40 + " " + "d" * 40 + " R95 dir/new path.py",
+        "dir/old path.py",
+        "u UU N... 100644 100644 100644 100644 " + "1" * 40 + " " + "2" * 40 + " " + "3" * 40 + " conflict.py",
+        "? new.txt",
+        "",
+    ])
+    snapshot = parse_porcelain_v2(output)
+
+    assert snapshot.changed_files == ["both.py", "removed.py", "dir/new path.py", "conflict.py", "new.txt"]
+    assert "both.py" in snapshot.staged_files and "both.py" in snapshot.unstaged_files
+    assert snapshot.untracked_files == ["new.txt"]
+    assert snapshot.renamed_files == {"dir/new path.py": "dir/old path.py"}
+    assert snapshot.get("both.py").head_oid == "a" * 40
+    assert snapshot.get("both.py").index_oid == "b" * 40
+    assert snapshot.get("conflict.py").head_oid == "2" * 40
+
+def test_snapshot_is_immutable():
+    snapshot = parse_porcelain_v2("? a.txt\0")
+    with pytest.raises(Exception):
+        snapshot.branch = "other"
+
+def test_with_paths_replaces_only_touched_entries():
+    full = parse_porcelain_v2("\0".join([
+        "# branch.oid 1234", "# branch.head main",
+        "1 .M N... 100644 100644 100644 " + "a" * 40 + " " + "a" * 40 + " keep.py",
+        "1 .M N... 100644 100644 100644 " + "b" * 40 + " " + "b" * 40 + " touched.py",
+        "? dir/gone.txt",
+        "",
+    ]))
+    partial = parse_porcelain_v2("\0".join([
+        "# branch.oid 1234", "# branch.head main",
+        "? added.txt",
+        "",
+    ]))
+
+    merged = full.with_paths(["touched.py", "dir", "added.txt"], partial)
+
+    assert merged.changed_files == ["keep.py", "added.txt"]
+    assert merged.get("keep.py") is full.get("keep.py")
+    assert "touched.py" not in merged
@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import pytest
+from git import Repo
+from git_service import GitService
+from repo_watcher import RepoWatcher
+
+@pytest.fixture
+def temp_git_repo():
+    temp_dir = tempfile.mkdtemp()
+    # Earlier tests may leave the process in a deleted directory
+    os.chdir(temp_dir)
+    repo = Repo.init(temp_dir)
+    with open(os.path.join(temp_dir, "tracked.py"), "w") as f:
+        f.write("x = 1\n")
+    with open(os.path.join(temp_dir, ".gitignore"), "w") as f:
+        f.write("*.log\n")
+    repo.index.add(["tracked.py", ".gitignore"])
+    repo.index.commit("Initial commit")
+    yield temp_dir
+    repo.close()
+    os.chdir(tempfile.gettempdir())
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+class _Recorder:
+    def __init__(self):
+        self.calls = []
+        self.event = threading.Event()
+
+    def __call__(self, paths, git_changed):
+        self.calls.append((set(paths), git_changed))
+        self.event.set()
+
+def test_burst_is_debounced_into_one_batch(tmp_path):
+    recorder = _Recorder()
+    watcher = RepoWatcher(str(tmp_path), recorder, debounce=0.05, use_polling=True)
+
+    for name in ["a.py", "b.py", "a.py"]:
+        watcher.record(str(tmp_path / name))
+
+    assert recorder.event.wait(1)
+    time.sleep(0.1)
+    assert recorder.calls == [({"a.py", "b.py"}, False)]
+
+def test_git_directory_filtering(tmp_path):
+    recorder = _Recorder()
+    watcher = RepoWatcher(str(tmp_path), recorder, debounce=0.01, use_polling=True)
+
+    watcher.record(str(tmp_path / ".git" / "objects" / "ab" / "cdef"))
+    time.sleep(0.1)
+    assert recorder.calls == []
+
+    watcher.record(str(tmp_path / ".git" / "index"))
+    assert recorder.event.wait(1)
+    assert recorder.calls == [(set(), True)]
+
+def test_ignored_paths_are_dropped(tmp_path):
+    recorder = _Recorder()
+    watcher = RepoWatcher(
+        str(tmp_path), recorder, debounce=0.01, use_polling=True,
+        is_ignored=lambda paths: {p for p in paths if p.endswith(".log")},
+    )
+
+    watcher.record(str(tmp_path / "debug.log"))
+    watcher.record(str(tmp_path / "main.py"))
+
+    assert recorder.event.wait(1)
+    assert recorder.calls == [({"main.py"}, False)]
+
+def test_polling_fallback_detects_writes(tmp_path):
+    recorder = _Recorder()
+    watcher = RepoWatcher(str(tmp_path), recorder, debounce=0.01, poll_interval=0.05, use_polling=True)
+    watcher.start()
+    try:
+        time.sleep(0.1)
+        (tmp_path / "new.py").write_text("print(1)\n")
+        assert recorder.event.wait(2)
+    finally:
+        watcher.stop()
+    assert recorder.calls[0] == ({"new.py"}, False)
+
+def test_polling_scan_skips_ignored_directories(temp_git_repo):
+    for path in ("node_modules/pkg/index.js", "src/app/main.py", "src/build/out.o"):
+        os.makedirs(os.path.join(temp_git_repo, os.path.dirname(path)), exist_ok=True)
+        with open(os.path.join(temp_git_repo, path), "w") as f:
+            f.write("x\n")
+    with open(os.path.join(temp_git_repo, ".gitignore"), "a") as f:
+        f.write("node_modules/\nbuild/\n")
+    service = GitService()
+    assert service.is_valid_repo(temp_git_repo)
+    asked = []
+
+    def is_ignored(paths):
+        asked.append(sorted(paths))
+        return service.get_ignored(paths)
+
+    watcher = RepoWatcher(temp_git_repo, lambda paths, git_changed: None, is_ignored=is_ignored, use_polling=True)
+    scanned = {os.path.relpath(path, temp_git_repo).replace(os.sep, "/") for path in watcher._scan()}
+    service.close()
+
+    assert "src/app/main.py" in scanned and "tracked.py" in scanned
+    assert not any(path.startswith(("node_modules/", "src/build/")) for path in scanned)
+    # One call per level of the tree, never for what is inside an ignored directory
+    assert asked == [["node_modules/", "src/"], ["src/app/", "src/build/"]]
+
+def test_refresh_paths_updates_only_touched_files(temp_git_repo):
+    service = GitService()
+    assert service.is_valid_repo(temp_git_repo)
+    assert service.get_changed_files() == []
+
+    with open(os.path.join(temp_git_repo, "tracked.py"), "a") as f:
+        f.write("y = 2\n")
+    with open(os.path.join(temp_git_repo, "new.txt"), "w") as f:
+        f.write("hello\n")
+
+    # Only tracked.py was reported, so new.txt is not picked up yet
+    assert service.refresh_paths(["tracked.py"]).changed_files == ["tracked.py"]
+    assert service.refresh_paths(["new.txt"]).changed_files == ["tracked.py", "new.txt"]
+
+    with open(os.path.join(temp_git_repo, "tracked.py"), "w") as f:
+        f.write("x = 1\n")
+    assert service.refresh_paths(["tracked.py"]).changed_files == ["new.txt"]
+    service.close()
+
+def test_get_ignored_uses_gitignore(temp_git_repo):
+    service = GitService()
+    assert service.is_valid_repo(temp_git_repo)
+    assert service.get_ignored(["debug.log", "main.py", "logs/app.log"]) == {"debug.log", "logs/app.log"}
+    assert service.get_ignored(["main.py"]) == set()
+    service.close()
@@ -0,0 +1,134 @@
+import ast
+import os
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+import main
+from startup import DeferredService, ServiceWarmup, StartupTrace
+
+class _Service:
+    def greet(self):
+        return "hello"
+
+def test_deferred_service_blocks_until_resolved():
+    deferred = DeferredService("Example")
+    results = []
+    caller = threading.Thread(target=lambda: results.append(deferred.greet()))
+    caller.start()
+    time.sleep(0.05)
+    assert results == []
+
+    deferred.resolve(_Service())
+    caller.join(1)
+    assert results == ["hello"]
+    assert deferred.is_ready
+
+def test_deferred_service_sets_attributes_on_the_service():
+    deferred = DeferredService("Example")
+    deferred.check_head = True
+    service = _Service()
+    deferred.resolve(service)
+    assert service.check_head is True
+
+    deferred.check_head = False
+    assert service.check_head is False
+    assert deferred.check_head is False
+    assert "check_head" not in vars(deferred)
+
+def test_deferred_service_reraises_construction_error():
+    deferred = DeferredService("Example")
+    deferred.fail(ValueError("bad config"))
+    with pytest.raises(RuntimeError, match="Example failed to start: bad config"):
+        deferred.greet()
+
+def test_warmup_builds_services_in_background_and_traces():
+    trace = StartupTrace()
+    warmup = ServiceWarmup(trace)
+    built_on = []
+
+    def factory():
+        built_on.append(threading.current_thread())
+        return _Service()
+
+    first = warmup.add("First", factory)
+    second = warmup.add("Second", lambda: (_ for _ in ()).throw(OSError("no git")))
+    errors, done = [], threading.Event()
+    warmup.start(on_error=lambda name, e: errors.append(name), on_done=done.set)
+
+    assert done.wait(1)
+    assert first.greet() == "hello"
+    assert built_on[0] is not threading.current_thread()
+    assert errors == ["Second"]
+    with pytest.raises(RuntimeError):
+        second.greet()
+    assert trace.elapsed("First ready") is not None
+    assert trace.elapsed("Second ready") is None
+
+def _main_window_methods():
+    # Read from the source: other tests swap customtkinter and views.main_window for mocks
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "views", "main_window.py")
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    window = next(node for node in tree.body if isinstance(node, ast.ClassDef) and node.name == "MainWindow")
+    return {node.name for node in window.body if isinstance(node, ast.FunctionDef)}
+
+class _StubWindow:
+    """Just the MainWindow API that startup uses, so a missing method fails instead of being mocked."""
+    def __init__(self):
+        self.commit_view = SimpleNamespace()
+        self.diff_view = SimpleNamespace()
+        self.statuses = []
+        self.errors = []
+        self.destroyed = False
+        self._queue = []
+        self._lock = threading.Lock()
+
+    def after(self, delay, callback):
+        with self._lock:
+            self._queue.append(callback)
+
+    def after_idle(self, callback):
+        self.after(0, callback)
+
+    def set_status(self, message):
+        self.statuses.append(message)
+
+    def show_error(self, title, message):
+        self.errors.append(message)
+
+    def destroy(self):
+        self.destroyed = True
+
+    def mainloop(self):
+        deadline = time.monotonic() + 5
+        while not self.destroyed and "Ready" not in self.statuses:
+            assert time.monotonic() < deadline, "startup never finished"
+            with self._lock:
+                queue, self._queue = self._queue, []
+            for callback in queue:
+                callback()
+            time.sleep(0.01)
+
+class _StubAIService:
+    def preload_tokenizer(self):
+        return SimpleNamespace(join=lambda: None)
+
+def test_main_starts_services_after_first_paint(monkeypatch):
+    window = _StubWindow()
+    # The stub's own methods, besides Tk's after/after_idle/destroy/mainloop
+    assert {"set_status", "show_error"} <= _main_window_methods()
+    git_service = SimpleNamespace()
+    bridge = SimpleNamespace(stop=lambda: None)
+    monkeypatch.setattr(main, "MainWindow", lambda: window)
+    monkeypatch.setattr(main, "_create_git_service", lambda: git_service)
+    monkeypatch.setattr(main, "_create_ai_service", _StubAIService)
+    monkeypatch.setattr(main, "_create_async_git_service", SimpleNamespace)
+    monkeypatch.setattr(main, "_create_async_bridge", lambda app: bridge)
+
+    main.main(["--no-watch"])
+
+    assert window.statuses == ["Loading services...", "Ready"]
+    assert window.errors == []
+    # The controller's flag went through the stand-in to the service
+    assert git_service.check_head is True
@@ -0,0 +1,85 @@
+import os
+from unittest.mock import patch
+import summary_cache
+from summary_cache import SummaryCache
+
+def test_summary_survives_reopen(tmp_path):
+    path = str(tmp_path / "s.sqlite3")
+    cache = SummaryCache(path)
+    cache.put("gpt-4o", 1, "diff a", "Changed a")
+    cache.close()
+
+    cache = SummaryCache(path)
+    assert cache.get("gpt-4o", 1, "diff a") == "Changed a"
+    assert cache.get("gpt-4o", 2, "diff a") is None
+    assert cache.get("gemini", 1, "diff a") is None
+    assert cache.get("gpt-4o", 1, "diff b") is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = SummaryCache(str(tmp_path / "s.sqlite3"), ttl=60)
+    with patch.object(summary_cache.time, "time", return_value=1000.0):
+        cache.put("m", 1, "diff", "summary")
+    with patch.object(summary_cache.time, "time", return_value=1059.0):
+        assert cache.get("m", 1, "diff") == "summary"
+    with patch.object(summary_cache.time, "time", return_value=1061.0):
+        assert cache.get("m", 1, "diff") is None
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = SummaryCache(str(tmp_path / "s.sqlite3"), max_entries=2)
+    start = summary_cache.time.time()
+    for i in range(3):
+        with patch.object(summary_cache.time, "time", return_value=start + i):
+            if i == 2:
+                cache.get("m", 1, "diff 0")  # keeps diff 0 fresh
+            cache.put("m", 1, f"diff {i}", f"summary {i}")
+
+    assert cache.get("m", 1, "diff 0") == "summary 0"
+    assert cache.get("m", 1, "diff 1") is None
+    assert cache.stats()["entries"] == 2
+
+def test_eviction_by_bytes(tmp_path):
+    cache = SummaryCache(str(tmp_path / "s.sqlite3"), max_bytes=25)
+    cache.put("m", 1, "a", "x" * 10)
+    cache.put("m", 1, "b", "y" * 10)
+    cache.put("m", 1, "c", "z" * 10)
+    assert cache.stats()["bytes"] <= 25
+    assert cache.get("m", 1, "c") == "z" * 10
+
+def test_clear(tmp_path):
+    cache = SummaryCache(str(tmp_path / "s.sqlite3"))
+    cache.put("m", 1, "a", "summary")
+    assert cache.clear() == 1
+    assert cache.get("m", 1, "a") is None
+
+def test_unopenable_cache_is_disabled(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = SummaryCache(str(blocker / "s.sqlite3"))
+    assert not cache.enabled
+    cache.put("m", 1, "a", "summary")
+    assert cache.get("m", 1, "a") is None
+
+def test_default_location_honours_override(tmp_path, monkeypatch):
+    monkeypatch.setenv(summary_cache.CACHE_DIR_ENV, str(tmp_path))
+    assert SummaryCache().path == os.path.join(str(tmp_path), summary_cache.SUMMARY_CACHE_FILE)
+
+def test_ai_service_reuses_cached_summaries():
+    with patch('ai_service.ConfigManager') as MockConfig, patch('ai_service.OpenAI') as MockOpenAI:
+        config = MockConfig.return_value
+        config.api_key = "key"
+        config.model_name = "gpt-4o-mini"
+        config.get_provider.return_value = "openai"
+        client = MockOpenAI.return_value
+        client.chat.completions.create.return_value.choices[0].message.content = "Bumped deps"
+        from ai_service import AIService
+
+        assert AIService().summarize_file_diff("diff --git a/x.lock b/x.lock") == "Bumped deps"
+        # A new service (or a new process) finds it on disk
+        assert AIService().summarize_file_diff("diff --git a/x.lock b/x.lock") == "Bumped deps"
+        assert client.chat.completions.create.call_count == 1
+
+        client.chat.completions.create.side_effect = Exception("offline")
+        assert AIService().summarize_file_diff("diff --git a/y.lock b/y.lock") == "Summary generation failed."
+        client.chat.completions.create.side_effect = None
+        assert AIService().summarize_file_diff("diff --git a/y.lock b/y.lock") == "Bumped deps"
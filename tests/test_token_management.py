@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import MagicMock
-from token_management import TokenManager, FilePrioritizer, FileCategory
+from token_management import TokenManager, TokenCache, TokenEstimator, FilePrioritizer, FileCategory
 
 class TestTokenManager:
     def test_count_tokens(self):
@@ -70,3 +70,109 @@ class TestFilePrioritizer:
         assert sorted_files[1] == "config.json"
         # The exact order of docs vs config depends on implementation, but Lock should be last.
         assert sorted_files[-1] == "poetry.lock"
+
+class TestTruncateWithCount:
+    DIFF = "diff --git a/a.py b/a.py\n@@ -1,3 +1,3 @@\n" + "+x = 1\n" * 50 + "@@ -90,2 +90,2 @@\n" + "+y = 2\n" * 50
+
+    def test_text_that_fits_is_unchanged(self):
+        tm = TokenManager(cache=TokenCache())
+        assert tm.truncate_with_count(self.DIFF, 10_000, marker="...") == (self.DIFF, tm.count_tokens(self.DIFF))
+
+    def test_cuts_at_line_boundary_with_exact_count(self):
+        tm = TokenManager(cache=TokenCache())
+        text, count = tm.truncate_with_count(self.DIFF, 60, marker="[cut]")
+
+        assert count == tm.count_tokens(text) <= 60
+        assert text.endswith("\n[cut]")
+        body = text[:-len("[cut]")]
+        assert self.DIFF.startswith(body) and body.endswith("\n")
+
+    def test_hunk_header_is_not_left_dangling(self):
+        tm = TokenManager(cache=TokenCache())
+        first_hunk = self.DIFF.index("@@ -90")
+        limit = tm.count_tokens(self.DIFF[:first_hunk + len("@@ -90,2 +90,2 @@\n")])
+
+        text, _ = tm.truncate_with_count(self.DIFF, limit)
+
+        assert "@@ -90" not in text
+        assert text == self.DIFF[:first_hunk][:len(text)]
+
+    def test_work_grows_with_budget_not_input(self):
+        tm = TokenManager(cache=TokenCache())
+        tm.encoding = MagicMock(wraps=tm.encoding)
+        huge = "+line of code\n" * 100_000
+
+        text, count = tm.truncate_with_count(huge, 50)
+
+        assert count <= 50
+        encoded = sum(len(call.args[0]) for call in tm.encoding.encode.call_args_list)
+        assert encoded < 2000
+
+    def test_single_long_line_is_cut_by_tokens(self):
+        tm = TokenManager(cache=TokenCache())
+        text, count = tm.truncate_with_count("x" * 1_000_000, 20, marker="...")
+        assert count == tm.count_tokens(text) <= 20
+        assert text.startswith("x") and text.endswith("\n...")
+
+class TestTokenCache:
+    def test_repeated_text_is_encoded_once(self):
+        cache = TokenCache()
+        tm = TokenManager(cache=cache)
+        tm.encoding = MagicMock(wraps=tm.encoding)
+        text = "def main():\n    return 42\n" * 20
+
+        first = tm.count_tokens(text)
+        # A new manager (as AIService builds per generation) shares the cache
+        other = TokenManager(cache=cache)
+        other.encoding = tm.encoding
+        assert other.count_tokens(text) == first
+        other.truncate_to_limit(text, 5)
+
+        assert tm.encoding.encode.call_count == 1
+        stats = tm.cache_stats()
+        assert (stats["hits"], stats["misses"]) == (2, 1)
+        assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+    def test_lru_is_bounded_by_tokens(self):
+        cache = TokenCache(max_tokens=10)
+        cache.put(("enc", b"a"), [1] * 6)
+        cache.put(("enc", b"b"), [1] * 6)
+        assert cache.get(("enc", b"a")) is None
+        assert cache.stats()["tokens"] == 6
+
+    def test_special_tokens_in_diffs_are_plain_text(self):
+        tm = TokenManager(cache=TokenCache())
+        assert tm.count_tokens("+ marker = '<|endoftext|>'") > 1
+
+    def test_encode_batch_matches_encode(self):
+        tm = TokenManager(cache=TokenCache())
+        texts = [f"+line {i}\n" * (i + 1) for i in range(6)]
+        expected = [len(tm.encoding.encode(t)) for t in texts]
+
+        assert tm.count_tokens_batch(texts, num_threads=4) == expected
+        assert tm.count_tokens_batch(texts) == expected
+
+    def test_encode_batch_only_encodes_cache_misses(self):
+        tm = TokenManager(cache=TokenCache())
+        tm.encoding = MagicMock(wraps=tm.encoding)
+        tm.count_tokens("cached")
+
+        tm.encode_batch(["cached", "new one", "another"], num_threads=2)
+
+        tm.encoding.encode_batch.assert_called_once_with(["new one", "another"], num_threads=2, disallowed_special=())
+        assert tm.cache_stats()["entries"] == 3
+
+class TestTokenEstimator:
+    def test_estimate_has_error_margin(self):
+        estimator = TokenEstimator({FileCategory.LOGIC: 4.0}, error=0.25)
+        estimate, error = estimator.estimate("x" * 400, FileCategory.LOGIC)
+        assert estimate == 101
+        assert error == 26
+
+    def test_calibrate_fits_bytes_per_token(self):
+        samples = [("a" * 300, FileCategory.LOGIC, 100), ("b" * 600, FileCategory.LOGIC, 200),
+                   ("c" * 200, FileCategory.DOCS, 40)]
+        estimator = TokenEstimator.calibrate(samples)
+        assert estimator.bytes_per_token[FileCategory.LOGIC] == pytest.approx(3.0)
+        assert estimator.bytes_per_token[FileCategory.DOCS] == pytest.approx(5.0)
+        assert estimator.error < 0.05
@@ -1,6 +1,11 @@
-import tiktoken
 from enum import Enum, auto
+import hashlib
 import os
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Tuple
+from encoding_registry import registry, resolve_encoding_name
 
 class FileCategory(Enum):
     LOGIC = auto()
@@ -10,20 +15,259 @@ class FileCategory(Enum):
     IGNORED = auto()
     UNKNOWN = auto()
 
+class TokenCache:
+    """
+    Bounded LRU of token ids keyed by (encoding, blake2b of the text).
+
+    Shared by every TokenManager in the process, so regenerating a message
+    for the same selection (new DiffProcessor, same chunks) does no BPE
+    work. Ids are kept as compact uint32 arrays; the bound is on the total
+    number of cached tokens.
+    """
+    def __init__(self, max_tokens: int = 4_000_000, max_entries: int = 8192):
+        self.max_tokens = max_tokens
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._tokens = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(encoding_name: str, text: str):
+        digest = hashlib.blake2b(text.encode('utf-8', errors='surrogatepass'), digest_size=16).digest()
+        return encoding_name, digest
+
+    def get(self, key):
+        with self._lock:
+            ids = self._entries.get(key)
+            if ids is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return ids
+
+    def put(self, key, ids):
+        if len(ids) > self.max_tokens:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._tokens -= len(old)
+            self._entries[key] = ids
+            self._tokens += len(ids)
+            while self._entries and (self._tokens > self.max_tokens or len(self._entries) > self.max_entries):
+                _, evicted = self._entries.popitem(last=False)
+                self._tokens -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "tokens": self._tokens,
+            }
+
+# Process-wide default, like encoding_registry.registry
+token_cache = TokenCache()
+
+# truncate_with_count treats a line longer than this many characters per
+# token of budget as not fitting, rather than tokenizing all of it
+LONG_LINE_CHARS_PER_TOKEN = 32
+
 class TokenManager:
-    def __init__(self, model="cl100k_base"):
-        self.encoding = tiktoken.get_encoding(model)
+    def __init__(self, model="cl100k_base", cache: TokenCache = None):
+        # `model` may be an encoding or a model name; encodings are loaded once per process
+        self.encoding_name = resolve_encoding_name(model)
+        self.encoding = registry.get(self.encoding_name)
+        self.cache = token_cache if cache is None else cache
+
+    def encode(self, text: str) -> array:
+        """Token ids of text, served from the shared cache when the same text was seen before."""
+        key = self.cache.key(self.encoding_name, text)
+        ids = self.cache.get(key)
+        if ids is None:
+            # Diffs may legitimately contain strings like "<|endoftext|>"
+            ids = array('I', self.encoding.encode(text, disallowed_special=()))
+            self.cache.put(key, ids)
+        return ids
 
     def count_tokens(self, text: str) -> int:
-        return len(self.encoding.encode(text))
+        return len(self.encode(text))
+
+    def encode_batch(self, texts, num_threads: int = 1) -> list:
+        """
+        Token ids for many texts. Cache misses are encoded together with
+        tiktoken's encode_batch, which releases the GIL, on up to num_threads
+        threads; with num_threads=1 they are encoded in order on this thread.
+        """
+        keys = [self.cache.key(self.encoding_name, text) for text in texts]
+        results = [self.cache.get(key) for key in keys]
+        missing = [i for i, ids in enumerate(results) if ids is None]
+        if not missing:
+            return results
+
+        missing_texts = [texts[i] for i in missing]
+        if num_threads > 1 and len(missing) > 1:
+            encoded = self.encoding.encode_batch(missing_texts, num_threads=num_threads, disallowed_special=())
+        else:
+            encoded = [self.encoding.encode(text, disallowed_special=()) for text in missing_texts]
+        for i, ids in zip(missing, encoded):
+            results[i] = array('I', ids)
+            self.cache.put(keys[i], results[i])
+        return results
+
+    def count_tokens_batch(self, texts, num_threads: int = 1) -> list:
+        return [len(ids) for ids in self.encode_batch(texts, num_threads)]
+
+    def truncate_with_count(self, text: str, limit: int, marker: str = "") -> Tuple[str, int]:
+        """
+        Cuts text at a line boundary so that it plus `marker` is at most
+        `limit` tokens, and returns (text, exact token count). Text that
+        already fits comes back unchanged, without the marker.
+
+        Lines are encoded one at a time and the walk stops once the budget
+        is spent, so the work grows with `limit`, not with len(text). A hunk
+        header left without any of its lines is dropped too. Only when not
+        even the first line fits is the text cut mid-line, by tokens.
+        """
+        # Counted with the newline that may have to go in front of it
+        marker_count = self._count("\n" + marker) if marker else 0
+        if marker_count >= limit:
+            # No room for the marker
+            marker, marker_count = "", 0
+        body_limit = limit - marker_count
+        long_line = max(limit, 1) * LONG_LINE_CHARS_PER_TOKEN
+
+        pos = spent = cut = 0
+        n = len(text)
+        while pos < n:
+            end = text.find("\n", pos, pos + long_line)
+            if end == -1 and n - pos > long_line:
+                # Can't fit; don't tokenize a huge line to find that out
+                break
+            end = n if end == -1 else end + 1
+            # Per-line counts almost never undercount the whole; checked below
+            spent += self._count(text[pos:end])
+            if spent > limit:
+                break
+            pos = end
+            if spent <= body_limit:
+                cut = pos
+        else:
+            # Everything fit line by line; the text is about `limit` tokens
+            count = self._count(text)
+            if count <= limit:
+                return text, count
+
+        head = text[:cut]
+        last_line = head.rfind("\n", 0, len(head) - 1) + 1
+        if head.startswith("@@", last_line):
+            head = head[:last_line]
+        if not head:
+            head = self._cut_tokens(text, body_limit)
+
+        while True:
+            separator = "\n" if marker and head and not head.endswith("\n") else ""
+            result = head + separator + marker
+            count = self._count(result)
+            if count <= limit or not head:
+                return result, count
+            # The line sums undercounted; give back one more line
+            head = head[:head.rfind("\n", 0, len(head) - 1) + 1]
+
+    def _count(self, text: str) -> int:
+        # Uncached: for the throwaway pieces of truncate_with_count
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def _cut_tokens(self, text: str, limit: int) -> str:
+        """The first `limit` tokens of text, encoding a prefix that doubles until it is long enough."""
+        if limit <= 0:
+            return ""
+        chars = (limit + 1) * 4
+        while True:
+            ids = self.encoding.encode(text[:chars], disallowed_special=())
+            if len(ids) > limit or chars >= len(text):
+                return self.encoding.decode(ids[:limit])
+            chars *= 2
 
     def truncate_to_limit(self, text: str, limit: int) -> str:
-        tokens = self.encoding.encode(text)
+        tokens = self.encode(text)
         if len(tokens) <= limit:
             return text
         
         truncated_tokens = tokens[:limit]
-        return self.encoding.decode(truncated_tokens)
+        return self.encoding.decode(truncated_tokens.tolist())
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
+
+# Bytes per BPE token on unified diffs, per file category. Starting values
+# for cl100k_base/o200k_base; re-fit them with
+# `python benchmarks/bench_token_estimator.py --calibrate <repo>`.
+CATEGORY_BYTES_PER_TOKEN = {
+    FileCategory.LOGIC: 3.3,
+    FileCategory.CONFIG: 2.9,
+    FileCategory.DOCS: 4.0,
+    FileCategory.LOCK: 2.3,
+    FileCategory.IGNORED: 3.3,
+    FileCategory.UNKNOWN: 3.1,
+}
+# Worst relative estimation error we allow for; estimates are trusted only
+# when the whole interval is on one side of the budget
+ESTIMATE_ERROR = 0.5
+
+class TokenEstimator:
+    """
+    Byte-length token estimates with an error bound, for deciding cheaply
+    whether a chunk clearly fits or clearly overflows a budget. DiffProcessor
+    falls back to exact counting only when the interval straddles the limit.
+    """
+    def __init__(self, bytes_per_token: dict = None, error: float = ESTIMATE_ERROR):
+        self.bytes_per_token = dict(CATEGORY_BYTES_PER_TOKEN)
+        if bytes_per_token:
+            self.bytes_per_token.update(bytes_per_token)
+        self.error = error
+
+    def estimate(self, text: str, category: FileCategory = FileCategory.UNKNOWN) -> tuple:
+        """Returns (estimated tokens, error margin in tokens)."""
+        # isascii() is a flag check; only non-ASCII text pays for an encode
+        n_bytes = len(text) if text.isascii() else len(text.encode('utf-8', errors='surrogatepass'))
+        estimate = int(n_bytes / self.bytes_per_token.get(category, CATEGORY_BYTES_PER_TOKEN[FileCategory.UNKNOWN])) + 1
+        return estimate, int(estimate * self.error) + 1
+
+    @classmethod
+    def calibrate(cls, samples, error_quantile: float = 1.0):
+        """
+        Fits bytes/token per category from (text, category, exact_count)
+        samples. The error bound is the worst relative error over the samples
+        (or the given quantile of it).
+        """
+        totals = {}
+        for text, category, exact in samples:
+            n_bytes, n_tokens = totals.get(category, (0, 0))
+            totals[category] = (n_bytes + len(text.encode('utf-8')), n_tokens + exact)
+        fitted = {cat: b / t for cat, (b, t) in totals.items() if t}
+
+        estimator = cls(fitted, error=0.0)
+        errors = sorted(
+            abs(estimator.estimate(text, category)[0] - exact) / exact
+            for text, category, exact in samples if exact
+        )
+        if errors:
+            estimator.error = errors[min(len(errors) - 1, int(len(errors) * error_quantile))]
+        return estimator
 
 class FilePrioritizer:
     def __init__(self):
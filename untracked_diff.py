@@ -0,0 +1,131 @@
+import mmap
+import os
+import stat
+from dataclasses import dataclass
+from blob_utils import NO_NEWLINE_MARKER
+from diff_paths import quote_path
+from diff_stats import DiffStat
+
+# git treats a file as binary if its first 8000 bytes contain a NUL
+BINARY_SNIFF_BYTES = 8000
+_COUNT_BLOCK = 1024 * 1024
+
+@dataclass(frozen=True)
+class UntrackedFileStats:
+    size: int
+    lines: int
+    is_binary: bool
+    mode: str
+
+class UntrackedFileReader:
+    """
+    Builds 'new file' pseudo-diffs for untracked files without loading them.
+
+    Files are read through mmap: line counts come from a block-wise scan and
+    only a head and tail window of lines is decoded, so memory stays flat no
+    matter how large the file is.
+    """
+    def __init__(self, head_lines: int = 200, tail_lines: int = 50, max_line_chars: int = 1000):
+        self.head_lines = head_lines
+        self.tail_lines = tail_lines
+        self.max_line_chars = max_line_chars
+
+    def stats(self, full_path: str) -> UntrackedFileStats:
+        st = os.stat(full_path)
+        mode = "100755" if st.st_mode & stat.S_IXUSR else "100644"
+        if st.st_size == 0:
+            return UntrackedFileStats(size=0, lines=0, is_binary=False, mode=mode)
+
+        with open(full_path, 'rb') as f:
+            if b"\0" in f.read(BINARY_SNIFF_BYTES):
+                return UntrackedFileStats(size=st.st_size, lines=0, is_binary=True, mode=mode)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                lines = _count_lines(mm)
+        return UntrackedFileStats(size=st.st_size, lines=lines, is_binary=False, mode=mode)
+
+    def diff_stat(self, full_path: str, rel_path: str) -> DiffStat:
+        """The numstat of the file's pseudo-diff: only its head/tail window counts as added."""
+        file_stats = self.stats(full_path)
+        return DiffStat(
+            path=rel_path, added=min(file_stats.lines, self.head_lines + self.tail_lines), deleted=0,
+            is_binary=file_stats.is_binary, size=file_stats.size,
+        )
+
+    def diff(self, full_path: str, rel_path: str) -> str:
+        file_stats = self.stats(full_path)
+        a_name, b_name = quote_path(f"a/{rel_path}"), quote_path(f"b/{rel_path}")
+        out = [
+            f"diff --git {a_name} {b_name}",
+            f"new file mode {file_stats.mode}",
+        ]
+        if file_stats.size == 0:
+            return "\n".join(out)
+        if file_stats.is_binary:
+            out.append(f"Binary files /dev/null and {b_name} differ")
+            return "\n".join(out)
+
+        tab = "\t" if " " in rel_path else ""
+        out.append("--- /dev/null")
+        out.append(f"+++ {b_name}{tab}")
+
+        with open(full_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if file_stats.lines <= self.head_lines + self.tail_lines:
+                out.append(_hunk_header(1, file_stats.lines))
+                self._emit(out, mm, 0, len(mm))
+            else:
+                # One hunk for the head and one for the tail, the gap noted after the last @@
+                omitted = file_stats.lines - self.head_lines - self.tail_lines
+                note = f"... [{omitted} lines omitted; file has {file_stats.lines} lines, {file_stats.size} bytes] ..."
+                if self.head_lines:
+                    out.append(_hunk_header(1, self.head_lines, "" if self.tail_lines else note))
+                    self._emit(out, mm, 0, _nth_line_end(mm, self.head_lines))
+                if self.tail_lines:
+                    out.append(_hunk_header(file_stats.lines - self.tail_lines + 1, self.tail_lines, note))
+                    self._emit(out, mm, _nth_line_start_from_end(mm, self.tail_lines), len(mm))
+
+        return "\n".join(out)
+
+    def _emit(self, out, mm, start, end):
+        pos = start
+        while pos < end:
+            nl = mm.find(b"\n", pos, end)
+            line_end = end if nl == -1 else nl
+            # Only the visible part of very long (e.g. minified) lines is copied
+            visible = mm[pos:min(line_end, pos + self.max_line_chars)]
+            text = visible.decode('utf-8', errors='replace').rstrip('\r')
+            if line_end - pos > self.max_line_chars:
+                text += f" ... [{line_end - pos - self.max_line_chars} more bytes]"
+            out.append("+" + text)
+            if nl == -1:
+                out.append(NO_NEWLINE_MARKER)
+                break
+            pos = nl + 1
+
+def _hunk_header(start: int, count: int, heading: str = "") -> str:
+    """A hunk of `count` added lines from line `start` of the new file, as git writes it."""
+    new = f"+{start}" if count == 1 else f"+{start},{count}"
+    return f"@@ -0,0 {new} @@" + (f" {heading}" if heading else "")
+
+def _count_lines(mm) -> int:
+    newlines = 0
+    for offset in range(0, len(mm), _COUNT_BLOCK):
+        newlines += mm[offset:offset + _COUNT_BLOCK].count(b"\n")
+    if len(mm) and mm[len(mm) - 1:] != b"\n":
+        newlines += 1
+    return newlines
+
+def _nth_line_end(mm, n) -> int:
+    """Offset just past the n-th newline."""
+    pos = 0
+    for _ in range(n):
+        pos = mm.find(b"\n", pos) + 1
+    return pos
+
+def _nth_line_start_from_end(mm, n) -> int:
+    """Offset where the last n lines begin."""
+    end = len(mm)
+    if mm[end - 1:] == b"\n":
+        end -= 1
+    for _ in range(n):
+        end = mm.rfind(b"\n", 0, end)
+    return end + 1
@@ -11,6 +11,8 @@ class CommitView(ctk.CTkFrame):
         self.on_selection_change = on_selection_change_callback
         
         self.file_vars = {}
+        self.file_checkboxes = {}
+        self._empty_label = None
         
         self.grid_rowconfigure(1, weight=1)
         self.grid_columnconfigure(0, weight=1)
@@ -69,27 +71,54 @@ class CommitView(ctk.CTkFrame):
         # Clear existing
         for w in self.file_list_frame.winfo_children(): w.destroy()
         self.file_vars = {}
+        self.file_checkboxes = {}
+        self._empty_label = None
         
         if not files:
-            ctk.CTkLabel(self.file_list_frame, text="No changes", text_color="gray").pack(pady=20)
+            self._show_empty_label()
             return
 
         for f in files:
             is_selected = True # Default to true
             if selected_files is not None:
                 is_selected = f in selected_files
-            
-            var = ctk.BooleanVar(value=is_selected)
-            self.file_vars[f] = var
-            chk = ctk.CTkCheckBox(
-                self.file_list_frame, 
-                text=f, 
-                variable=var, 
-                font=styles.get_font_small_ui(),
-                text_color=styles.COLOR_TEXT,
-                command=self._on_check_change
-            )
-            chk.pack(anchor="w", pady=2, padx=5)
+            self._add_checkbox(f, is_selected)
+
+    def add_file(self, filename, selected=True):
+        """Appends one file to the list without rebuilding the others."""
+        if filename in self.file_checkboxes:
+            return
+        if self._empty_label is not None:
+            self._empty_label.destroy()
+            self._empty_label = None
+        self._add_checkbox(filename, selected)
+
+    def remove_file(self, filename):
+        """Removes one file from the list without rebuilding the others."""
+        chk = self.file_checkboxes.pop(filename, None)
+        self.file_vars.pop(filename, None)
+        if chk is not None:
+            chk.destroy()
+        if not self.file_checkboxes and self._empty_label is None:
+            self._show_empty_label()
+
+    def _add_checkbox(self, filename, is_selected):
+        var = ctk.BooleanVar(value=is_selected)
+        self.file_vars[filename] = var
+        chk = ctk.CTkCheckBox(
+            self.file_list_frame, 
+            text=filename, 
+            variable=var, 
+            font=styles.get_font_small_ui(),
+            text_color=styles.COLOR_TEXT,
+            command=self._on_check_change
+        )
+        chk.pack(anchor="w", pady=2, padx=5)
+        self.file_checkboxes[filename] = chk
+
+    def _show_empty_label(self):
+        self._empty_label = ctk.CTkLabel(self.file_list_frame, text="No changes", text_color="gray")
+        self._empty_label.pack(pady=20)
 
     def _on_check_change(self):
         if self.on_selection_change:
@@ -29,6 +29,8 @@ class DiffView(ctk.CTkFrame):
             text_color=styles.COLOR_TEXT
         )
         self.diff_tabs.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        self._textboxes = {}
+        self._texts = {}
         
     def set_warning(self, visible: bool):
         if visible:
@@ -53,19 +55,26 @@ class DiffView(ctk.CTkFrame):
         for t in current_tabs:
             if t not in new_files:
                 self.diff_tabs.delete(t)
+                self._textboxes.pop(t, None)
+                self._texts.pop(t, None)
                 
         # Add or Update tabs
         for filename, diff_text in diff_map.items():
             if filename not in current_tabs:
                 self._create_tab(filename, diff_text)
             else:
-                # Optional: Update text if tab exists? 
-                # For now assume we don't update existing tabs often unless refreshed
-                # But let's support it if needed.
-                # Since accessing the textbox inside isn't direct in CTkTabview public API,
-                # we might just recreate or find it.
-                # Simplified: only create if not exists.
-                pass
+                self.set_diff(filename, diff_text)
+
+    def set_diff(self, filename, diff_text):
+        """Replaces the text of an existing tab in place."""
+        textbox = self._textboxes.get(filename)
+        if textbox is None or self._texts.get(filename) == diff_text:
+            return
+        self._texts[filename] = diff_text
+        textbox.configure(state="normal")
+        textbox.delete("0.0", END)
+        self._insert_diff(textbox, diff_text)
+        textbox.configure(state="disabled")
 
     def _create_tab(self, filename, diff_text):
         self.diff_tabs.add(filename)
@@ -81,11 +90,17 @@ class DiffView(ctk.CTkFrame):
             text_color=styles.COLOR_DIFF_TEXT
         )
         textbox.grid(row=0, column=0, sticky="nsew")
+        self._textboxes[filename] = textbox
+        self._texts[filename] = diff_text
         
         # Configure tags
         for tag, kargs in styles.DIFF_TAGS.items():
             textbox.tag_config(tag, **kargs)
             
+        self._insert_diff(textbox, diff_text)
+        textbox.configure(state="disabled")
+
+    def _insert_diff(self, textbox, diff_text):
         if not diff_text:
             textbox.insert("0.0", "No changes detected.")
         else:
@@ -98,5 +113,3 @@ class DiffView(ctk.CTkFrame):
                     textbox.insert(END, line + "\n", "diff_rem")
                 else:
                     textbox.insert(END, line + "\n")
-        
-        textbox.configure(state="disabled")
@@ -190,6 +190,9 @@ class MainWindow(ctk.CTk):
         self.btn_push.configure(state=state)
         self.btn_pull.configure(state=state)
 
+    def set_status(self, message):
+        self.status_message.set(message)
+
     def show_error(self, title, message):
         ErrorDialog(self, title, message)
 